@@ -0,0 +1,102 @@
+"""
+로컬 ANN(IVF) 인덱스 vs ChromaDB 벡터 검색 recall / 지연 시간 벤치마크.
+
+ChromaDB 컬렉션(recipes_kr_sbert)의 임베딩으로 IVF 인덱스를 만들고,
+저장된 임베딩에 잡음을 섞은 쿼리로 두 백엔드의 상위 k개를 비교한다.
+  - recall(chroma): Chroma 결과 중 ANN 결과에도 있는 비율
+  - recall(exact): 전체 벡터 정확 계산(모든 클러스터 탐색) 결과 중 ANN 결과에도 있는 비율
+--synthetic N을 주면 Chroma 없이 군집 형태의 무작위 벡터 N개로 정확 계산 결과와만 비교한다.
+
+실행: python benchmarks/ann_search.py [--queries 200] [--k 10] [--nprobe 1 4 8 16] [--synthetic 20000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "market_service"))
+
+from vectordb import IVFIndex, RecipeVectorStore
+from vectordb.ann import export_collection
+
+
+def synthetic_vectors(count, dim, seed=0):
+    """
+    SBERT 임베딩처럼 주제별로 모인 무작위 벡터 (주제 중심 + 잡음)
+    """
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(max(1, count // 50), dim)).astype(np.float32)
+    labels = rng.integers(len(topics), size=count)
+    return topics[labels] + 0.6 * rng.normal(size=(count, dim)).astype(np.float32)
+
+
+def timed(run, queries):
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(run(query))
+        latencies.append(time.perf_counter() - started)
+    latencies = np.array(latencies) * 1000
+    return results, np.percentile(latencies, 50), np.percentile(latencies, 95)
+
+
+def recall(found, expected):
+    hits = [len(set(f) & set(e)) / max(1, len(e)) for f, e in zip(found, expected)]
+    return float(np.mean(hits))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--noise", type=float, default=0.3, help="쿼리 잡음 크기 (벡터 표준편차 대비)")
+    parser.add_argument("--synthetic", type=int, default=None, help="Chroma 대신 무작위 벡터 N개 사용")
+    args = parser.parse_args()
+
+    collection, metric = None, "l2"
+    if args.synthetic:
+        vectors = synthetic_vectors(args.synthetic, 768)
+        ids = [f"rec_{i}" for i in range(len(vectors))]
+        metadatas = [{"id": i} for i in range(len(vectors))]
+    else:
+        collection = RecipeVectorStore().collection
+        ids, vectors, metadatas = export_collection(collection)
+        metric = (collection.metadata or {}).get("hnsw:space", "l2")
+
+    started = time.perf_counter()
+    index = IVFIndex.build(vectors, ids, metadatas, metric=metric, nlist=args.nlist)
+    print(f"벡터 {len(vectors)}개 × {vectors.shape[1]}차원 / 클러스터 {index.nlist}개 "
+          f"/ 인덱스 생성 {time.perf_counter() - started:.2f}초")
+
+    rng = np.random.default_rng(1)
+    picked = rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)
+    scale = args.noise * float(vectors.std())
+    queries = (vectors[picked] + scale * rng.normal(size=(len(picked), vectors.shape[1]))).astype(np.float32)
+
+    # 모든 클러스터를 보면 정확 계산과 같음
+    exact = [index.records(index.search(q, args.k, index.nlist)[0])[0] for q in queries]
+
+    expected = {"exact": exact}
+    if collection is not None:
+        chroma, p50, p95 = timed(
+            lambda q: collection.query(query_embeddings=[q.tolist()], n_results=args.k)["ids"][0], queries
+        )
+        expected["chroma"] = chroma
+        print(f"\n{'chroma':>10}  recall(exact) {recall(chroma, exact):.3f}  p50 {p50:.2f} ms  p95 {p95:.2f} ms")
+
+    print()
+    for nprobe in args.nprobe:
+        found, p50, p95 = timed(
+            lambda q: index.records(index.search(q, args.k, nprobe)[0])[0], queries
+        )
+        recalls = "  ".join(f"recall({name}) {recall(found, rows):.3f}" for name, rows in expected.items())
+        print(f"nprobe {nprobe:>3}  {recalls}  p50 {p50:.2f} ms  p95 {p95:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
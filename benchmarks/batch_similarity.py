@@ -0,0 +1,66 @@
+"""
+전체 사용자 similarity 일괄 재계산 벤치마크. (data/ 폴더의 레시피 스냅샷 + 무작위 사용자 프로필)
+
+rebuild_similarity()로 users × recipes 유사도를 청크 단위로 계산하고 테이블 행으로 펼치는 시간과 최대 메모리(RSS)를 잰다.
+(쓰기는 행 수만 세며, MySQL 적재 속도는 benchmarks/bulk_write.py 참고)
+온보딩 방식(generate_similarity_table을 사용자마다 호출)은 --legacy-users 명만 재서 전체 사용자 수로 환산한다.
+
+실행: python benchmarks/batch_similarity.py [--users 100000] [--picks 5] [--workers 1] [--chunk-size N]
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "market_service"))
+
+from data import load_snapshot
+from preference import generate_similarity_table
+from preference.batch import rebuild_similarity
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--picks", type=int, default=5, help="사용자당 선택 레시피 수")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--legacy-users", type=int, default=200)
+    args = parser.parse_args()
+
+    recipe_df = load_snapshot("recipe")
+    rng = np.random.default_rng(0)
+    interactions = pd.DataFrame({
+        "userNum": np.repeat(np.arange(1, args.users + 1), args.picks),
+        "id": rng.choice(recipe_df["id"].to_numpy(), args.users * args.picks),
+    })
+
+    written = [0]
+
+    def count(rows):
+        written[0] += len(rows)
+
+    started = time.perf_counter()
+    stats = rebuild_similarity(recipe_df, interactions, count, chunk_size=args.chunk_size, workers=args.workers)
+    elapsed = time.perf_counter() - started
+    print(f"일괄 재계산: 사용자 {stats['users']}명 × 레시피 {len(recipe_df)}개 = {written[0]}행, {elapsed:.1f}s "
+          f"(프로필 {stats['profile_seconds']:.2f}s / 계산 {stats['score_seconds']:.2f}s / 행 변환 {stats['write_seconds']:.2f}s)")
+
+    # 최대 메모리 사용량 (Linux의 ru_maxrss 단위는 KB, 재계산까지의 프로세스 최대값)
+    print(f"최대 RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+    started = time.perf_counter()
+    groups = interactions.groupby("userNum")["id"]
+    for _, ids in list(groups)[:args.legacy_users]:
+        generate_similarity_table(recipe_df, ids.tolist(), [])
+    per_user = (time.perf_counter() - started) / args.legacy_users
+    print(f"사용자별 계산: {per_user * 1000:.1f} ms/명 → {args.users}명 환산 {per_user * args.users:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+preference / similarity 덮어쓰기 벤치마크. (로컬 sqlite를 MySQL 대용으로 사용)
+
+기존 방식(DELETE 후 행마다 execute)과 staging 테이블 교체 방식(bulk_replace_table)의 초당 행 수를 비교한다.
+sqlite는 네트워크 왕복이 없으므로, --latency-ms 로 execute / executemany 호출마다 왕복 지연을 흉내 낸다.
+(pymysql은 INSERT ... VALUES 의 executemany를 여러 행 INSERT 하나로 묶어 보내므로 배치당 왕복 1회)
+
+실행: python benchmarks/bulk_write.py [--rows 40000] [--latency-ms 0.2] [--batch-size 5000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from update_preference_similarity import ATTRS, bulk_replace_table
+
+COLUMNS = ['userNum', 'id'] + ATTRS
+
+
+class RoundTripConnection:
+    """
+    execute / executemany 호출마다 latency 초만큼 기다리는 sqlite 커넥션 래퍼.
+    """
+
+    def __init__(self, conn, latency):
+        self._conn = conn
+        self.latency = latency
+        self.round_trips = 0
+
+    def cursor(self):
+        return RoundTripCursor(self, self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+
+class RoundTripCursor:
+
+    def __init__(self, owner, cursor):
+        self._owner = owner
+        self._cursor = cursor
+
+    def _round_trip(self):
+        self._owner.round_trips += 1
+        if self._owner.latency:
+            time.sleep(self._owner.latency)
+
+    def execute(self, *args):
+        self._round_trip()
+        return self._cursor.execute(*args)
+
+    def executemany(self, *args):
+        self._round_trip()
+        return self._cursor.executemany(*args)
+
+    def close(self):
+        self._cursor.close()
+
+
+def make_rows(count, seed=0):
+    rng = np.random.default_rng(seed)
+    values = np.column_stack([
+        rng.integers(1, 1000, count),
+        rng.integers(7000000, 7100000, count),
+        rng.random((count, len(ATTRS))),
+    ])
+    return values.astype(float).tolist()
+
+
+def create_table(conn):
+    conn.execute("DROP TABLE IF EXISTS preference")
+    conn.execute(
+        "CREATE TABLE preference (userNum TEXT, id INTEGER, instruction REAL, ingredient REAL, style REAL)"
+    )
+    conn.commit()
+
+
+def legacy_write(conn, rows):
+    """
+    기존 방식: DELETE 후 행마다 INSERT.
+    """
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM preference")
+    for row in rows:
+        cursor.execute(
+            "INSERT INTO preference (userNum, id, instruction, ingredient, style) VALUES (?, ?, ?, ?, ?)",
+            row
+        )
+    conn.commit()
+    cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=40000)
+    parser.add_argument("--latency-ms", type=float, default=0.2)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        results = {}
+
+        for name in ("legacy", "staging swap"):
+            create_table(raw)
+            conn = RoundTripConnection(raw, args.latency_ms / 1000)
+            started = time.perf_counter()
+            if name == "legacy":
+                legacy_write(conn, rows)
+            else:
+                bulk_replace_table(conn, "preference", COLUMNS, rows, args.batch_size, dialect="sqlite")
+            seconds = time.perf_counter() - started
+
+            stored = raw.execute("SELECT userNum, id, instruction, ingredient, style FROM preference").fetchall()
+            assert len(stored) == len(rows), (name, len(stored))
+            results[name] = (seconds, conn.round_trips, stored)
+
+        raw.close()
+
+    assert results["legacy"][2] == results["staging swap"][2]
+    print(f"rows={args.rows:,} latency={args.latency_ms}ms batch={args.batch_size:,}")
+    for name, (seconds, round_trips, _) in results.items():
+        print(f"{name:>13}: {seconds:7.2f}s {len(rows) / seconds:>12,.0f} rows/sec {round_trips:>8,} round trips")
+    print(f"speedup: {results['legacy'][0] / results['staging swap'][0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
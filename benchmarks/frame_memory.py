@@ -0,0 +1,86 @@
+"""
+preference / similarity 데이터프레임 메모리 / 추천 필터링 벤치마크.
+
+MySQL 커넥터가 돌려주는 형태(pd.DataFrame(rows), userNum은 "1.0" 같은 문자열, 나머지는 object/float64)와
+로드 시 compact_frame()으로 변환한 형태의 컬럼별 메모리 사용량과,
+recommend_recipes의 사용자 유사도 필터링 시간을 비교한다. (data/ 폴더의 CSV 스냅샷 사용)
+
+실행: python benchmarks/frame_memory.py [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "market_service"))
+
+from data import (
+    PREFERENCE_DTYPES,
+    SIMILARITY_DTYPES,
+    compact_frame,
+    frame_memory_report,
+    load_snapshot
+)
+
+
+def legacy_frame(table):
+    """
+    MySQL에서 읽은 것과 같은 형태의 데이터프레임 (딕셔너리 행 → DataFrame, userNum은 문자열)
+    """
+    df = load_snapshot(table)
+    rows = df.astype(object).to_dict("records")
+    for row in rows:
+        row["userNum"] = str(float(row["userNum"]))
+    return pd.DataFrame(rows)
+
+
+def legacy_filter(similarity_df, user_num):
+    similarity_df["userNum"] = pd.to_numeric(similarity_df["userNum"], errors="coerce")
+    return similarity_df[(similarity_df["userNum"] == user_num) & (similarity_df["exception"] != 1)]
+
+
+def compact_filter(similarity_df, user_num):
+    return similarity_df[(similarity_df["userNum"] == user_num) & (similarity_df["exception"] != 1)]
+
+
+def print_report(table, before, after):
+    print(f"\n[{table}] {before['rows']}행 : {before['bytes'] / 1e6:.2f} MB → {after['bytes'] / 1e6:.2f} MB "
+          f"({after['bytes'] / before['bytes']:.1%})")
+    for column, info in after["columns"].items():
+        old = before["columns"].get(column, {"dtype": "-", "bytes": 0})
+        print(f"  {column:<14} {old['dtype']:>8} {old['bytes'] / 1e3:>9.1f} KB → "
+              f"{info['dtype']:>8} {info['bytes'] / 1e3:>9.1f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    frames = {}
+    for table, dtypes in (("preference", PREFERENCE_DTYPES), ("similarity", SIMILARITY_DTYPES)):
+        before = legacy_frame(table)
+        after = compact_frame(before, dtypes)
+        print_report(table, frame_memory_report(before), frame_memory_report(after))
+        frames[table] = (before, after)
+
+    before, after = frames["similarity"]
+    users = after["userNum"].unique()
+    for name, df, run in (("legacy", before, legacy_filter), ("compact", after, compact_filter)):
+        started = time.perf_counter()
+        for i in range(args.repeat):
+            run(df.copy(deep=False), int(users[i % len(users)]))
+        elapsed = (time.perf_counter() - started) / args.repeat
+        print(f"\n유사도 필터링 ({name}): {elapsed * 1000:.2f} ms/회")
+
+    # 두 방식의 필터링 결과가 같은지 확인
+    legacy = legacy_filter(before.copy(deep=False), int(users[0]))
+    compact = compact_filter(after, int(users[0]))
+    assert legacy["id"].astype(int).tolist() == compact["id"].astype(int).tolist()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+update_preference_similarity.py 선호도 갱신 벤치마크.
+
+data/ 의 preference / recipe / user_logs CSV를 사용자 단위로 복제해 1× / 10× / 100× 규모를 만들고,
+기존 행 단위 루프(legacy)와 집합 연산 기반 갱신의 실행 시간을 비교한다.
+legacy는 규모가 커지면 매우 느리므로 --legacy-max 이하 규모에서만 실행하며, 이때 결과가 완전히 같은지도 확인한다.
+
+실행: python benchmarks/preference_update.py [--scales 1 10 100] [--legacy-max 1]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from update_preference_similarity import ATTRS, ALPHA, DECAY_FACTOR, update_preference
+
+DATA_DIR = os.path.join(ROOT, "data")
+
+
+def load_base():
+    preference_df = pd.read_csv(os.path.join(DATA_DIR, "preference.csv"), encoding="cp949")
+    recipe_df = pd.read_csv(os.path.join(DATA_DIR, "recipe.csv"), encoding="cp949")[["id"] + ATTRS]
+    log_df = pd.read_csv(os.path.join(DATA_DIR, "user_logs.csv"), encoding="cp949")
+
+    preference_df["userNum"] = pd.to_numeric(preference_df["userNum"]).astype(int)
+    # 하루치 로그 대신 전체 구매 로그를 사용 (최악의 경우)
+    log_df = log_df[log_df["logType"] == "cartPurchase"][["userNum", "parameter"]]
+    return preference_df, recipe_df, log_df
+
+
+def scale(preference_df, log_df, factor):
+    """
+    사용자를 factor배로 복제한 preference / 구매 로그를 만드는 함수.
+    """
+    span = int(preference_df["userNum"].max()) + 1
+    preferences, logs = [], []
+    for copy in range(factor):
+        pref = preference_df.copy()
+        pref["userNum"] += copy * span
+        preferences.append(pref)
+
+        log = log_df.copy()
+        log["userNum"] = log["userNum"].astype(int) + copy * span
+        logs.append(log)
+    return pd.concat(preferences, ignore_index=True), pd.concat(logs, ignore_index=True)
+
+
+def legacy_update(preference_df, recipe_df, log_df, decay_factor=DECAY_FACTOR, alpha=ALPHA):
+    """
+    기존 update_preference_similarity.py의 행 단위 갱신 루프. (비교 기준)
+    """
+    preference_df[ATTRS] *= decay_factor
+    for _, row in log_df.iterrows():
+        user = int(row["userNum"])
+        try:
+            purchased = json.loads(row["parameter"])["레시피"]
+        except:
+            continue
+        for recipe in purchased:
+            r_id = str(recipe["id"])
+            r_attr = recipe_df[recipe_df["id"] == int(r_id)]
+            if r_attr.empty:
+                continue
+            r_attr = r_attr.iloc[0]
+            for attr in ATTRS:
+                attr_value = r_attr[attr]
+                targets = recipe_df[recipe_df[attr] == attr_value]["id"].tolist()
+                for tid in targets:
+                    idx = (preference_df["userNum"] == user) & (preference_df["id"] == tid)
+                    if idx.any():
+                        before = preference_df.loc[idx, attr].values[0]
+                        updated = before * (1 - alpha) + 1.0 * alpha
+                        preference_df.loc[idx, attr] = updated
+    return preference_df
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--legacy-max", type=int, default=1)
+    args = parser.parse_args()
+
+    preference_df, recipe_df, log_df = load_base()
+    print(f"{'scale':>6} {'rows':>10} {'purchases':>10} {'set-based(s)':>13} {'legacy(s)':>10} {'exact':>6}")
+
+    for factor in args.scales:
+        pref, logs = scale(preference_df, log_df, factor)
+        result, seconds = timed(update_preference, pref.copy(), recipe_df, logs)
+
+        legacy_seconds, exact = "-", "-"
+        if factor <= args.legacy_max:
+            expected, legacy_seconds = timed(legacy_update, pref.copy(), recipe_df, logs)
+            exact = str(result.equals(expected))
+            legacy_seconds = f"{legacy_seconds:.2f}"
+
+        print(f"{factor:>5}× {len(pref):>10,} {len(logs):>10,} {seconds:>13.3f} {legacy_seconds:>10} {exact:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,4 +4,6 @@ from .cart import (
     recommend_recipes,
     get_remaining_cart,
     recipe_serving_price
-)
\ No newline at end of file
+)
+from .parsed import ParsedRecipeTable, get_parsed_recipes, parsed_recipe_column
+from .similarity import SimilarityIndex, get_similarity_index, get_recipe_positions, recipe_id_strings, cold_user_similarity
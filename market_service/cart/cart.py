@@ -1,6 +1,8 @@
 import re
 from collections import defaultdict
-import pandas as pd
+import numpy as np
+from .matching import get_ingredient_matrix
+from .similarity import get_similarity_index, get_recipe_positions, recipe_id_strings, cold_user_similarity
 
 def get_remaining_cart(cart_dict, parsed_recipe_df):
     """
@@ -141,7 +143,8 @@ def add_to_cart(cart: dict, domain: str, division: str, category: str,
             "image": image
         }
 
-def recommend_recipes(cart_dict, recipe_df, similarity_df, user_num, mode="basic", selected_recipe=None):
+def recommend_recipes(cart_dict, recipe_df, similarity_df, user_num, mode="basic", selected_recipe=None,
+                      preference_df=None, exception_df=None):
 
     """
     추천 모드(basic / remain / preference)에 따라 선호도가 반영된 레시피를 추천하는 함수
@@ -153,6 +156,8 @@ def recommend_recipes(cart_dict, recipe_df, similarity_df, user_num, mode="basic
         user_num (int, optional): 사용자 고유 번호
         mode (str): 추천 방식 ("basic", "remain", "preference")
         selected_recipe (list[str], optional): 중복 제거용 레시피 ID 리스트
+        preference_df (pd.DataFrame, optional): similarity 행이 없는 사용자의 유사도를 바로 계산할 선호도 데이터
+        exception_df (pd.DataFrame, optional): 제외 재료 비트맵 (cold 사용자 유사도에서 제외 레시피를 뺄 때 사용)
 
     Returns:
         list: 추천 레시피 딕셔너리 리스트
@@ -162,32 +167,30 @@ def recommend_recipes(cart_dict, recipe_df, similarity_df, user_num, mode="basic
     if mode not in ("basic", "remain", "preference"):
         raise ValueError(f"지원하지 않는 추천 모드입니다: {mode}")
     
-    # 1. 유사도 필터링
-    similarity_df["userNum"] = pd.to_numeric(similarity_df["userNum"], errors="coerce")
-    user_similarity_df = similarity_df[
-        (similarity_df["userNum"] == user_num) & 
-        (similarity_df["exception"] != 1)
-    ]
+    # 1. 사용자 유사도 후보 (사용자별 인덱스에서 유사도 내림차순으로 조회, 예외 레시피 제외)
+    user_ids, user_scores = get_similarity_index(similarity_df).top(user_num)
+    if len(user_ids) == 0 and preference_df is not None:
+        user_ids, user_scores = cold_user_similarity(recipe_df, preference_df, user_num, similarity_df, exception_df)
+    positions = get_recipe_positions(recipe_df)
 
-    user_similarity_df["id"] = user_similarity_df["id"].astype(str)
-    recipe_df["id"] = recipe_df["id"].astype(str)
+    # 문자열 레시피 id (공유 데이터프레임을 호출마다 형변환하지 않도록 테이블 버전별로 한 번만 변환)
+    recipe_ids = recipe_id_strings(recipe_df)
 
-    # 2. 유사도 기반 추천 후보 ID 추출
-    top_ids = user_similarity_df["id"].tolist()
-    top_recipes = recipe_df[recipe_df["id"].isin(top_ids)].copy()
-
-    # 3. similarity 점수 부여
-    similarity_map = user_similarity_df.set_index("id")["similarity"].to_dict()
-    top_recipes["similarity"] = top_recipes["id"].map(similarity_map)
-
-    # 4. preference 모드: 유사도 순 정렬만
+    # 2. preference 모드: 유사도 순서대로 레시피 행만 조회
     if mode == "preference":
-        top_recipes = top_recipes.sort_values(by="similarity", ascending=False) 
+        excluded = set(selected_recipe or [])
+        ranked = [
+            (pos, score)
+            for recipe_id, score in zip(user_ids.tolist(), user_scores.tolist())
+            if str(recipe_id) not in excluded
+            for pos in positions.get(recipe_id, ())
+        ]
+        rows = recipe_df.iloc[[pos for pos, _ in ranked]].to_dict("records")
         return [
             {
-                'id': row['id'],
+                'id': recipe_ids.iat[pos],
                 'name': row.get('name'),
-                'similarity': row['similarity'],
+                'similarity': score,
                 'imgUrl': row.get('imgUrl', ''),
                 'parsedRecipe': [
                     item['ingredient'] for item in row.get('parsedRecipe', [])
@@ -195,10 +198,21 @@ def recommend_recipes(cart_dict, recipe_df, similarity_df, user_num, mode="basic
                 ],
                 'portnum': row.get("portNum"),
             }
-            for _, row in top_recipes.iterrows()
-            if str(row['id']) not in selected_recipe
+            for (pos, score), row in zip(ranked, rows)
         ]
 
+    # 3. 유사도 후보 레시피 위치와 similarity 점수
+    top_mask = np.zeros(len(recipe_df), dtype=bool)
+    top_scores = np.full(len(recipe_df), np.nan)
+    for recipe_id, score in zip(user_ids.tolist(), user_scores.tolist()):
+        for pos in positions.get(recipe_id, ()):
+            top_mask[pos] = True
+            top_scores[pos] = score
+
+    # 4. 후보 레시피 행에 similarity 점수 부여
+    top_recipes = recipe_df[top_mask].copy()
+    top_recipes["similarity"] = top_scores[top_mask]
+
     # 5. 장바구니 기반 모드일 경우
     if not cart_dict:
         return []
@@ -225,47 +239,45 @@ def recommend_recipes(cart_dict, recipe_df, similarity_df, user_num, mode="basic
 
     recommended = []
 
-    # 7. top_recipes 순회하며 매칭 계산
-    for _, row in top_recipes.iterrows():
-        recipe_id = str(row.get("id"))
-        if recipe_id in selected_recipe:
-            continue
+    # 7. 레시피 × 재료 희소 행렬로 매칭 계산
+    matrix = get_ingredient_matrix(recipe_df)
+
+    # 7-1. 후보 레시피 (중복 제거 대상 / parsedRecipe 없는 레시피 제외)
+    top_positions = np.flatnonzero(top_mask)
+    keep = ~recipe_ids.iloc[top_positions].isin(selected_recipe or []).to_numpy() & matrix.valid[top_positions]
+    candidates = np.flatnonzero(keep)
 
+    # 7-2. 후보 레시피에 등장하는 재료만 장바구니와 비교 (재료 어휘 단위로 한 번씩)
+    terms = matrix.terms_in(top_positions[candidates])
+    if mode == "basic":
+        term_match, term_priority = matrix.basic_term_matches(
+            terms, categories, divisions, category_priority, division_priority
+        )
+    else:
+        term_match = matrix.remain_term_matches(terms, remaining_weights)
+
+    # 7-3. 레시피별 매칭 재료 수 (희소 행렬-벡터 곱) → 매칭된 레시피만 결과 생성
+    match_counts = matrix.match_counts(top_positions[candidates], term_match)
+
+    for i in candidates[match_counts > 0]:
+        row = top_recipes.iloc[i]
+        recipe_id = str(row.get("id"))
         parsed_recipe = row.get('parsedRecipe')
-        if not isinstance(parsed_recipe, list):
-            continue
 
-        matched_ingredients = []
+        occurrence_terms, occurrence_weights = matrix.occurrences(top_positions[i])
+        occurrence_match = term_match[occurrence_terms]
+
+        matched_ingredients = [matrix.vocab[t] for t in occurrence_terms[occurrence_match]]
         matched_priorities = []
         matched_weights = []
         total_matched_weight = 0.0
 
-        for item in parsed_recipe:
-            ing = item.get("ingredient")
-            quantity = item.get("quantity", "")
-
-            if mode == "basic":
-                cat_match = any(cat in ing or ing in cat for cat in categories)
-                if cat_match:
-                    matched_ingredients.append(ing)
-                    matched_priorities.append(
-                        min((category_priority.get(cat, 999) for cat in categories if cat in ing or ing in cat), default=999)
-                    )
-                    continue
-                div_match = any(div == ing for div in divisions)
-                if div_match:
-                    matched_ingredients.append(ing)
-                    matched_priorities.append(division_priority.get(ing, 999))
-
-            elif mode == "remain":
-                match = re.match(r"([\d.]+)([a-zA-Z]+)", quantity)
-                weight = float(match.group(1)) if match else 0.0
-                for key in remaining_weights:
-                    if ing in key or key in ing:
-                        matched_ingredients.append(ing)
-                        matched_weights.append(weight)
-                        total_matched_weight += weight
-                        break
+        if mode == "basic":
+            matched_priorities = term_priority[occurrence_terms[occurrence_match]].tolist()
+        elif mode == "remain":
+            matched_weights = occurrence_weights[occurrence_match].tolist()
+            for weight in matched_weights:
+                total_matched_weight += weight
 
         if matched_ingredients:
             recommended.append({
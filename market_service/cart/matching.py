@@ -0,0 +1,89 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from data import cached_derived
+from .parsed import get_parsed_recipes
+
+
+class IngredientMatrix:
+    """
+    레시피 × 재료 희소 행렬.
+    공유 파싱 결과(ParsedRecipeTable)의 재료 어휘와 레시피별 재료 등장 순서/중량을 그대로 사용한다.
+
+    Args:
+        recipe_df: inputRecipe 컬럼이 있는 레시피 데이터프레임
+    """
+
+    def __init__(self, recipe_df):
+        parsed = get_parsed_recipes(recipe_df)
+
+        self.vocab = parsed.ingredients
+        self.terms = parsed.ingredient_ids       # 레시피별 재료 등장 순서 (어휘 id)
+        self.weights = parsed.latin_weights()    # 재료 등장별 중량 (remain 모드용, 예: "300g" → 300.0)
+        self.offsets = parsed.offsets            # 레시피 i의 재료 = terms[offsets[i]:offsets[i+1]]
+        self.valid = parsed.valid                # inputRecipe가 문자열인 레시피
+
+        # 레시피 × 재료 등장 횟수 행렬 (sum_duplicates()가 배열을 직접 수정하므로 복사본 사용)
+        self.counts = csr_matrix(
+            (np.ones(len(self.terms), dtype=np.int32), self.terms.copy(), self.offsets.copy()),
+            shape=(len(self.offsets) - 1, len(self.vocab))
+        )
+        self.counts.sum_duplicates()
+
+    def occurrences(self, pos):
+        """
+        레시피 pos의 재료 어휘 id 배열과 중량 배열을 등장 순서대로 반환.
+        """
+        start, end = self.offsets[pos], self.offsets[pos + 1]
+        return self.terms[start:end], self.weights[start:end]
+
+    def terms_in(self, positions):
+        """
+        주어진 레시피들에 등장하는 어휘 id 목록을 반환.
+        """
+        return np.unique(self.counts[positions].indices)
+
+    def match_counts(self, positions, term_match):
+        """
+        레시피별로 매칭된 재료 등장 횟수를 희소 행렬-벡터 곱으로 계산.
+        """
+        return self.counts[positions] @ term_match.astype(np.int32)
+
+    def basic_term_matches(self, terms, categories, divisions, category_priority, division_priority):
+        """
+        basic 모드: 어휘별 category 포함 관계 / division 일치 여부와 우선순위를 계산.
+
+        Returns:
+            (어휘별 매칭 여부, 어휘별 우선순위) 배열 튜플
+        """
+        term_match = np.zeros(len(self.vocab), dtype=bool)
+        term_priority = np.full(len(self.vocab), 999, dtype=np.int64)
+
+        for t in terms:
+            ing = self.vocab[t]
+            cat_priorities = [category_priority.get(cat, 999) for cat in categories if cat in ing or ing in cat]
+            if cat_priorities:
+                term_match[t] = True
+                term_priority[t] = min(cat_priorities)
+            elif ing in divisions:
+                term_match[t] = True
+                term_priority[t] = division_priority.get(ing, 999)
+
+        return term_match, term_priority
+
+    def remain_term_matches(self, terms, remaining_keys):
+        """
+        remain 모드: 어휘별로 남은 재료명과 포함 관계가 있는지 계산.
+        """
+        term_match = np.zeros(len(self.vocab), dtype=bool)
+        for t in terms:
+            ing = self.vocab[t]
+            term_match[t] = any(ing in key or key in ing for key in remaining_keys)
+        return term_match
+
+
+def get_ingredient_matrix(recipe_df):
+    """
+    레시피 데이터프레임에 대한 IngredientMatrix를 반환하는 함수. (레시피 테이블 버전별로 한 번만 생성)
+    """
+    return cached_derived(recipe_df, "ingredient_matrix", IngredientMatrix)
@@ -0,0 +1,198 @@
+import hashlib
+import os
+import re
+import string
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data import cached_derived
+
+# 파싱 결과 저장 경로 (환경변수 PARSED_RECIPE_DIR로 변경 가능)
+PARSED_RECIPE_DIR = os.environ.get(
+    "PARSED_RECIPE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "parsed_recipes")
+)
+
+# parse_recipe() 규칙이 바뀌면 올려서 저장된 결과를 무효화
+PARSER_VERSION = 1
+
+# 수량 문자열 → (숫자, 단위) 예: "300g" → (300.0, "g"), "2큰술" → (2.0, "큰술")
+_QUANTITY_PATTERN = re.compile(r"([\d.]+)([a-zA-Z가-힣]+)")
+
+_build_lock = threading.Lock()
+
+
+class ParsedRecipeTable:
+    """
+    레시피 재료 파싱 결과를 컬럼 형태로 보관하는 테이블.
+    레시피 i의 재료는 offsets[i]:offsets[i+1] 구간에 등장 순서대로 저장된다.
+
+    Attributes:
+        ingredients: 재료명 어휘 (list[str])
+        quantity_texts: 원본 수량 문자열 어휘 (list[str])
+        units: 정규화(소문자)된 단위 어휘 (list[str], 0번은 단위 없음)
+        ingredient_ids: 재료 어휘 id (int32)
+        quantity_text_ids: 수량 문자열 어휘 id (int32)
+        amounts: 숫자 수량 (float64, 숫자가 없으면 NaN)
+        unit_ids: 단위 어휘 id (int16)
+        offsets: 레시피별 시작 위치 (int64)
+        valid: inputRecipe가 문자열인 레시피 (bool)
+    """
+
+    ARRAYS = ("ingredient_ids", "quantity_text_ids", "amounts", "unit_ids", "offsets", "valid")
+    VOCABS = ("ingredients", "quantity_texts", "units")
+
+    def __init__(self, **columns):
+        for name in self.ARRAYS + self.VOCABS:
+            setattr(self, name, columns[name])
+        self._column = None
+        self._column_lock = threading.Lock()
+
+    @classmethod
+    def build(cls, texts):
+        """
+        inputRecipe 문자열 목록을 parse_recipe()로 한 번 파싱해 테이블을 만드는 함수.
+        """
+        from .cart import parse_recipe  # cart.py → matching.py → parsed.py 순환 import 방지
+
+        vocabs = {"ingredients": {}, "quantity_texts": {}, "units": {"": 0}}
+        ingredient_ids, quantity_text_ids, amounts, unit_ids = [], [], [], []
+        offsets, valid = [0], []
+
+        def intern(vocab, value):
+            if value not in vocabs[vocab]:
+                vocabs[vocab][value] = len(vocabs[vocab])
+            return vocabs[vocab][value]
+
+        for text in texts:
+            valid.append(isinstance(text, str))
+            for item in parse_recipe(text) if isinstance(text, str) else []:
+                quantity = item["quantity"]
+                amount, unit = np.nan, ""
+                match = _QUANTITY_PATTERN.match(quantity)
+                if match:
+                    unit = match.group(2).lower()
+                    try:
+                        amount = float(match.group(1))
+                    except ValueError:
+                        pass
+
+                ingredient_ids.append(intern("ingredients", item["ingredient"]))
+                quantity_text_ids.append(intern("quantity_texts", quantity))
+                amounts.append(amount)
+                unit_ids.append(intern("units", unit))
+            offsets.append(len(ingredient_ids))
+
+        return cls(
+            ingredient_ids=np.array(ingredient_ids, dtype=np.int32),
+            quantity_text_ids=np.array(quantity_text_ids, dtype=np.int32),
+            amounts=np.array(amounts, dtype=np.float64),
+            unit_ids=np.array(unit_ids, dtype=np.int16),
+            offsets=np.array(offsets, dtype=np.int64),
+            valid=np.array(valid, dtype=bool),
+            **{name: list(vocab) for name, vocab in vocabs.items()}
+        )
+
+    def save(self, path):
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        arrays.update({name: np.array(getattr(self, name), dtype=str) for name in self.VOCABS})
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            columns = {name: data[name] for name in cls.ARRAYS}
+            columns.update({name: data[name].tolist() for name in cls.VOCABS})
+        return cls(**columns)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def items(self, pos):
+        """
+        레시피 pos의 파싱 결과를 parse_recipe()와 같은 형태로 반환.
+        예시: [{"ingredient": "감자", "quantity": "300g"}, ...]
+        """
+        start, end = self.offsets[pos], self.offsets[pos + 1]
+        return [
+            {"ingredient": self.ingredients[i], "quantity": self.quantity_texts[q]}
+            for i, q in zip(self.ingredient_ids[start:end], self.quantity_text_ids[start:end])
+        ]
+
+    def latin_weights(self):
+        """
+        단위가 영문(g, ml 등)으로 시작하는 재료의 수량, 그 외는 0인 배열. (재료 등장 순서)
+        기존 re.match(r"([\\d.]+)([a-zA-Z]+)", quantity) 기반 중량 계산과 같은 값.
+        """
+        latin_unit = np.array([bool(u) and u[0] in string.ascii_letters for u in self.units])
+        weights = np.where(latin_unit[self.unit_ids], self.amounts, 0.0)
+        return np.nan_to_num(weights, nan=0.0)
+
+    def column(self, index):
+        """
+        parsedRecipe 컬럼(레시피별 list[dict])을 반환하는 함수. 한 번 만든 Series를 재사용한다.
+        """
+        with self._column_lock:
+            if self._column is None or not self._column.index.equals(index):
+                self._column = pd.Series(
+                    [self.items(pos) if self.valid[pos] else None for pos in range(len(self))],
+                    index=index,
+                    dtype=object
+                )
+        return self._column
+
+
+def _fingerprint(texts):
+    digest = hashlib.sha1(f"parser-v{PARSER_VERSION}".encode("utf-8"))
+    for text in texts:
+        digest.update(b"\x00")
+        digest.update(text.encode("utf-8") if isinstance(text, str) else b"\x01")
+    return digest.hexdigest()
+
+
+def _load_or_build(recipe_df):
+    texts = recipe_df['inputRecipe'].tolist()
+    path = os.path.join(PARSED_RECIPE_DIR, f"{_fingerprint(texts)}.npz")
+
+    with _build_lock:
+        # 1. 같은 레시피 목록을 파싱한 결과가 있으면 그대로 사용
+        if os.path.exists(path):
+            try:
+                return ParsedRecipeTable.load(path)
+            except Exception:
+                pass
+
+        # 2. 레시피 테이블이 바뀐 경우에만 파싱 후 저장
+        table = ParsedRecipeTable.build(texts)
+        try:
+            os.makedirs(PARSED_RECIPE_DIR, exist_ok=True)
+            table.save(path)
+        except OSError:
+            pass
+    return table
+
+
+def get_parsed_recipes(recipe_df):
+    """
+    레시피 데이터프레임의 inputRecipe 파싱 결과(ParsedRecipeTable)를 반환하는 함수.
+    레시피 테이블 버전별로 한 번만 만들어 모든 세션이 공유하며, 디스크에도 저장해 재시작 시 다시 파싱하지 않는다.
+
+    Args:
+        recipe_df: 레시피 데이터프레임 (inputRecipe 컬럼 필수)
+
+    Returns:
+        ParsedRecipeTable
+    """
+    return cached_derived(recipe_df, "parsed_recipes", _load_or_build)
+
+
+def parsed_recipe_column(recipe_df):
+    """
+    recipe_df['parsedRecipe']에 넣을 Series를 반환하는 함수. (regex 파싱 없이 공유 결과 재사용)
+    """
+    return get_parsed_recipes(recipe_df).column(recipe_df.index)
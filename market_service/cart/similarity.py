@@ -0,0 +1,189 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from data import cached_derived, catalog_version, exception_flags, mask_exception_pairs
+
+# cold 사용자 유사도 LRU 크기 (사용자 × 예외 정보 × 테이블 버전별 결과 수)
+COLD_SIMILARITY_CACHE_SIZE = 1024
+
+_cold_cache = OrderedDict()
+_cold_cache_lock = threading.Lock()
+
+
+class SimilarityIndex:
+    """
+    사용자별 레시피 유사도 인덱스.
+    예외 레시피를 뺀 행을 (사용자, 유사도 내림차순, 레시피 id) 순으로 정렬해 두고,
+    사용자 u의 후보는 ids / scores의 연속 구간 [start, end)로 조회한다.
+
+    Args:
+        similarity_df: userNum, id, similarity, exception 컬럼을 가진 데이터프레임
+    """
+
+    def __init__(self, similarity_df):
+        df = similarity_df[~exception_flags(similarity_df["exception"])]
+
+        # 같은 (사용자, 레시피) 행이 여러 개면 마지막 행 사용
+        df = df.drop_duplicates(["userNum", "id"], keep="last")
+        users = pd.to_numeric(df["userNum"], errors="coerce").to_numpy(dtype=np.float64)
+        ids = pd.to_numeric(df["id"]).to_numpy(dtype=np.int64)
+        scores = df["similarity"].to_numpy(dtype=np.float64)
+
+        keep = ~np.isnan(users)
+        users, ids, scores = users[keep].astype(np.int64), ids[keep], scores[keep]
+
+        # 유사도가 NaN인 행은 사용자 구간의 맨 뒤로
+        order = np.lexsort((ids, np.nan_to_num(-scores, nan=np.inf), users))
+        self.ids = ids[order]
+        self.scores = scores[order]
+
+        user_values, starts = np.unique(users[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        self._ranges = {
+            int(user): (int(start), int(end))
+            for user, start, end in zip(user_values, starts, ends)
+        }
+
+    def __len__(self):
+        return len(self._ranges)
+
+    def top(self, user_num, k=None):
+        """
+        사용자의 유사도 상위 k개 레시피를 반환. (k=None이면 전체)
+
+        Returns:
+            (레시피 id 배열, 유사도 배열) 튜플, 유사도 내림차순
+        """
+        try:
+            start, end = self._ranges.get(int(user_num), (0, 0))
+        except (TypeError, ValueError):
+            start, end = 0, 0   # 비회원 등 숫자가 아닌 사용자 번호
+        if k is not None:
+            end = min(end, start + k)
+        return self.ids[start:end], self.scores[start:end]
+
+
+def get_similarity_index(similarity_df):
+    """
+    유사도 데이터프레임에 대한 SimilarityIndex를 반환하는 함수. (유사도 테이블 버전별로 한 번만 생성)
+    """
+    return cached_derived(similarity_df, "similarity_index", SimilarityIndex)
+
+
+def _build_recipe_positions(recipe_df):
+    ids = pd.to_numeric(recipe_df["id"], errors="coerce").to_numpy(dtype=np.float64)
+    positions = {}
+    for pos, recipe_id in enumerate(ids):
+        if not np.isnan(recipe_id):
+            positions.setdefault(int(recipe_id), []).append(pos)
+    return positions
+
+
+def get_recipe_positions(recipe_df):
+    """
+    레시피 id → 레시피 데이터프레임 행 위치 목록 딕셔너리를 반환하는 함수. (레시피 테이블 버전별로 한 번만 생성)
+    """
+    return cached_derived(recipe_df, "recipe_positions", _build_recipe_positions)
+
+
+def recipe_id_strings(recipe_df):
+    """
+    레시피 id를 문자열로 바꾼 Series를 반환하는 함수. (레시피 테이블 버전별로 한 번만 변환, 추천 결과 / 장바구니 id 비교용)
+    """
+    return cached_derived(recipe_df, "recipe_id_strings", lambda df: df["id"].astype(str))
+
+
+def _build_exception_ids(similarity_df):
+    df = similarity_df[exception_flags(similarity_df["exception"])]
+    users = pd.to_numeric(df["userNum"], errors="coerce")
+    ids = pd.to_numeric(df["id"], errors="coerce")
+    valid = (users.notna() & ids.notna()).to_numpy()
+    groups = pd.Series(ids[valid].astype(np.int64).to_numpy()).groupby(users[valid].astype(np.int64).to_numpy())
+    return {int(user): frozenset(group.tolist()) for user, group in groups}
+
+
+def _build_exception_masks(exception_df):
+    return dict(zip(
+        pd.to_numeric(exception_df["userNum"]).astype(np.int64).tolist(),
+        pd.to_numeric(exception_df["exceptionMask"]).astype(np.int64).tolist()
+    ))
+
+
+def user_exceptions(user_num, similarity_df=None, exception_df=None):
+    """
+    사용자의 예외 정보를 반환하는 함수. (테이블 버전별로 사용자 → 예외 딕셔너리를 한 번만 생성)
+
+    Args:
+        similarity_df: dense similarity 데이터프레임 (exception == 1인 행이 예외)
+        exception_df: 제외 재료 비트맵 데이터프레임 (userNum, exceptionMask, topk 저장 방식)
+
+    Returns:
+        (제외 재료 비트맵, dense 예외 레시피 id 집합) 튜플
+    """
+    mask, ids = 0, frozenset()
+    if exception_df is not None and not exception_df.empty:
+        mask = cached_derived(exception_df, "exception_masks", _build_exception_masks).get(user_num, 0)
+    if similarity_df is not None and not similarity_df.empty:
+        ids = cached_derived(similarity_df, "exception_ids", _build_exception_ids).get(user_num, frozenset())
+    return mask, ids
+
+
+def cold_user_similarity(recipe_df, preference_df, user_num, similarity_df=None, exception_df=None):
+    """
+    similarity 행이 없는 사용자(cold)의 유사도를 선호도 행으로 바로 계산하는 함수.
+    사용자의 제외 재료 비트맵 / dense 예외 행에 해당하는 레시피는 결과에서 뺀다.
+    (선호도 / 레시피 테이블 버전, 사용자, 예외 정보)마다 한 번만 계산해 크기가 제한된 LRU에 보관한다.
+
+    Args:
+        similarity_df: dense 예외 행을 찾을 similarity 데이터프레임 (선택)
+        exception_df: 제외 재료 비트맵 데이터프레임 (선택)
+
+    Returns:
+        (레시피 id 배열, 유사도 배열) 튜플, 유사도 내림차순
+    """
+    from preference.batch import preference_interactions, score_user  # 사용할 때만 sklearn 등 로드
+
+    try:
+        user_num = int(user_num)
+    except (TypeError, ValueError):
+        return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+
+    mask, exception_ids = user_exceptions(user_num, similarity_df, exception_df)
+
+    def build():
+        rows = preference_df[pd.to_numeric(preference_df["userNum"], errors="coerce") == user_num]
+        ids, scores = score_user(recipe_df, preference_interactions(rows))
+
+        excluded = set(exception_ids)
+        if mask:
+            masks = pd.DataFrame({"userNum": [user_num], "exceptionMask": [mask]})
+            excluded.update(mask_exception_pairs(masks, recipe_df)["id"].astype(np.int64).tolist())
+        if excluded:
+            keep = ~np.isin(ids, list(excluded))
+            ids, scores = ids[keep], scores[keep]
+        return ids, scores
+
+    # 카탈로그에서 오지 않은 데이터프레임이면 버전을 알 수 없으므로 캐시 없이 계산
+    preference_version, recipe_version = catalog_version(preference_df), catalog_version(recipe_df)
+    if preference_version is None or recipe_version is None:
+        return build()
+
+    # 테이블이 다시 로드되거나 예외 정보가 바뀌면 다른 키가 되도록 버전 / 비트맵 / 예외 id 목록을 키에 포함
+    digest = hashlib.sha1(",".join(map(str, sorted(exception_ids))).encode("utf-8")).hexdigest()[:16]
+    key = (preference_version, recipe_version, user_num, mask, digest)
+    with _cold_cache_lock:
+        if key in _cold_cache:
+            _cold_cache.move_to_end(key)
+            return _cold_cache[key]
+
+    result = build()
+    with _cold_cache_lock:
+        _cold_cache[key] = result
+        _cold_cache.move_to_end(key)
+        while len(_cold_cache) > COLD_SIMILARITY_CACHE_SIZE:
+            _cold_cache.popitem(last=False)
+    return result
@@ -1,4 +1,4 @@
-from chromadb import PersistentClient
+from vectordb import get_vector_store, encode_query
 
 
 def classify_user_intent(user_input, client):
@@ -109,17 +109,14 @@ def general_prompt(user_input: str) -> list[dict]:
     ]
 
 def choramadb_search(query, model):
-    # 기존 ChromaDB 폴더에 연결
-    client = PersistentClient(path="C:/Users/Admin/workspace/market_service/vectordb/chroma_db")
+    # 공유 벡터 검색 핸들 (VECTOR_BACKEND: ChromaDB 또는 로컬 ANN 인덱스, 프로세스당 한 번만 열림)
+    store = get_vector_store()
 
-    # 컬렉션 불러오기
-    collection = client.get_collection(name="recipes_kr_sbert")
-
-    # 사용자 쿼리 → 임베딩
-    query_embedding = model.encode([f'"{query}"']).tolist()
+    # 사용자 쿼리 → 임베딩 (캐시에 있으면 모델 forward 생략)
+    query_embedding = [encode_query(model, f'"{query}"').tolist()]
 
     # 유사 문서 검색
-    result = collection.query(query_embeddings=query_embedding, n_results=10)
+    result = store.query(query_embeddings=query_embedding, n_results=10)
 
     # 레시피 출력
     return result["metadatas"][0]
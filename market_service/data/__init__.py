@@ -1,8 +1,50 @@
 from .sql import (
     get_mysql_connection, 
+    load_user,
     load_recipes,
     load_product,
     load_preference,
     load_similarity,
-    load_total_revenues
-)
\ No newline at end of file
+    load_similarity_exceptions,
+    load_total_revenues,
+    apply_decay,
+    compact_frame,
+    configure_backend,
+    get_backend,
+    configure_similarity_storage,
+    get_similarity_storage,
+    exception_mask,
+    exception_flags,
+    mask_categories,
+    exception_masks,
+    mask_exception_pairs,
+    top_k_similarity,
+    ensure_top_k_tables,
+    write_user_top_k_similarity,
+    PREFERENCE_DECAY_FACTOR,
+    PREFERENCE_DTYPES,
+    SIMILARITY_DTYPES,
+    SIMILARITY_TOP_K,
+    EXCEPTION_CATEGORIES,
+    TOP_K_SIMILARITY_COLUMNS,
+    SIMILARITY_EXCEPTION_COLUMNS
+)
+from .catalog import (
+    get_catalog,
+    invalidate_catalog,
+    catalog_version,
+    cached_derived,
+    catalog_stats,
+    catalog_memory_report,
+    frame_memory_report
+)
+from .pool import (
+    configure_db,
+    get_pool,
+    pool_stats
+)
+from .snapshot import (
+    load_snapshot,
+    convert_snapshot,
+    convert_all_snapshots
+)
@@ -0,0 +1,315 @@
+import threading
+import time
+import weakref
+from datetime import date
+
+from .snapshot import snapshot_version
+from .sql import (
+    get_backend,
+    get_similarity_storage,
+    get_mysql_connection,
+    load_recipes,
+    load_product,
+    load_preference,
+    load_similarity,
+    load_similarity_exceptions,
+    load_total_revenues
+)
+
+# 캐시 유지 시간 (초) : 이 시간이 지나면 테이블 버전을 확인하고 필요할 때만 다시 로드
+CATALOG_TTL = 600
+
+# 카탈로그 이름 → (로더 함수, 원본 MySQL 테이블명)
+CATALOG_LOADERS = {
+    "recipe": (load_recipes, "recipe"),
+    "product": (load_product, "product"),
+    "preference": (load_preference, "preference"),
+    "similarity": (load_similarity, "similarity"),
+    "similarity_exception": (load_similarity_exceptions, "similarity_exception"),
+    "total_revenues": (load_total_revenues, "planning_total_revenues"),
+}
+
+# 읽을 때 오늘 날짜 기준 감쇠가 적용되는 카탈로그 (날짜가 바뀌면 테이블 변경이 없어도 다시 로드)
+DAILY_CATALOGS = {"preference", "similarity"}
+
+_lock = threading.Lock()
+_entries = {}
+
+
+class _CatalogEntry:
+    """
+    카탈로그 한 개(테이블 한 개)의 공유 캐시 상태.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.frame = None
+        self.version = 0
+        self.table_version = None
+        self.loaded_at = 0.0
+        self.loaded_on = None
+        self.checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.load_seconds = 0.0
+
+        # 테이블 버전별 파생 객체 (검색 색인 등), 다시 로드되면 비워짐
+        self.derived = {}
+        self.derived_lock = threading.Lock()
+
+
+def _get_entry(name):
+    if name not in CATALOG_LOADERS:
+        raise KeyError(f"등록되지 않은 카탈로그입니다: {name}")
+    with _lock:
+        if name not in _entries:
+            _entries[name] = _CatalogEntry(name)
+        return _entries[name]
+
+
+def _table_version(table):
+    """
+    information_schema 기준 테이블의 변경 시각과 행 수를 조회하는 함수.
+    조회에 실패하면 None을 반환하며, 이 경우 TTL 만료 시 무조건 다시 로드한다.
+    (스냅샷 백엔드는 CSV 파일의 수정 시각과 크기를 사용)
+    """
+    if get_backend() == "snapshot":
+        return snapshot_version(table)
+
+    try:
+        with get_mysql_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT UPDATE_TIME, TABLE_ROWS
+                FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                """,
+                (table,)
+            )
+            row = cursor.fetchone()
+            cursor.close()
+    except Exception:
+        return None
+
+    # UPDATE_TIME은 서버 재시작 후 NULL일 수 있으므로 이 경우 버전 비교를 하지 않는다
+    if not row or row[0] is None:
+        return None
+    return tuple(row)
+
+
+def _source_table(name):
+    """
+    카탈로그의 버전을 확인할 원본 테이블 이름.
+    topk 저장 방식의 similarity는 similarity_topk, 스냅샷의 제외 재료 비트맵은 similarity 스냅샷에서 계산된다.
+    """
+    _, table = CATALOG_LOADERS[name]
+    if get_backend() == "snapshot":
+        return "similarity" if name == "similarity_exception" else table
+    if name == "similarity" and get_similarity_storage() == "topk":
+        return "similarity_topk"
+    return table
+
+
+def _load(entry):
+    loader, _ = CATALOG_LOADERS[entry.name]
+    table = _source_table(entry.name)
+
+    # 테이블 버전은 로드 전에 읽는다 (로드 중에 들어온 변경은 다음 확인 때 새 버전으로 감지되도록)
+    table_version = _table_version(table)
+
+    started = time.perf_counter()
+    frame = loader()
+    entry.load_seconds = time.perf_counter() - started
+
+    entry.version += 1
+    entry.loads += 1
+    entry.table_version = table_version
+    entry.loaded_at = entry.checked_at = time.time()
+    entry.loaded_on = date.today()
+
+    # 파생 인덱스(검색/추천 캐시)가 테이블 변경 여부를 알 수 있도록 버전을 기록
+    frame.attrs["catalog"] = entry.name
+    frame.attrs["catalog_version"] = entry.version
+    entry.frame = frame
+    entry.derived = {}
+
+
+def get_catalog(name):
+    """
+    프로세스 전체에서 공유하는 카탈로그 데이터프레임을 반환하는 함수.
+    테이블은 프로세스당 한 번만 로드되며, TTL이 지나면 테이블 버전을 확인해 변경된 경우에만 다시 로드한다.
+
+    Args:
+        name: 카탈로그 이름 ("recipe", "product", "preference", "similarity", "similarity_exception", "total_revenues")
+
+    Returns:
+        공유 원본의 얕은 복사본 (DataFrame)
+        (세션에서 컬럼을 추가하거나 형변환해도 다른 세션의 원본은 바뀌지 않음)
+    """
+    entry = _get_entry(name)
+
+    with entry.lock:
+        now = time.time()
+
+        # 1. 최초 로드
+        if entry.frame is None:
+            entry.misses += 1
+            _load(entry)
+
+        # 2. TTL 만료 → 테이블 버전(또는 감쇠 기준 날짜)이 바뀐 경우에만 다시 로드
+        elif now - entry.checked_at > CATALOG_TTL:
+            current = _table_version(_source_table(name))
+            new_day = name in DAILY_CATALOGS and entry.loaded_on != date.today()
+            if current is None or current != entry.table_version or new_day:
+                entry.misses += 1
+                _load(entry)
+            else:
+                entry.hits += 1
+                entry.checked_at = now
+
+        # 3. 캐시 적중
+        else:
+            entry.hits += 1
+
+        frame = entry.frame
+
+    return frame.copy(deep=False)
+
+
+def invalidate_catalog(name=None):
+    """
+    카탈로그 캐시를 비워 다음 조회 시 다시 로드되도록 하는 함수.
+
+    Args:
+        name: 비울 카탈로그 이름 (None이면 전체)
+    """
+    names = [name] if name else list(CATALOG_LOADERS)
+    for n in names:
+        entry = _get_entry(n)
+        with entry.lock:
+            entry.frame = None
+
+
+def catalog_version(df):
+    """
+    get_catalog()로 받은 데이터프레임의 (카탈로그 이름, 버전)을 반환하는 함수.
+    카탈로그에서 오지 않았거나, 필터링/정렬 등으로 행 구성이 달라진 데이터프레임이면 None을 반환.
+    """
+    entry = _entries.get(df.attrs.get("catalog"))
+    if entry is None:
+        return None
+
+    # attrs는 df[mask], sort_values() 결과에도 복사되므로 원본과 같은 index 객체인지 함께 확인
+    frame = entry.frame
+    if frame is None or df.attrs.get("catalog_version") != entry.version or df.index is not frame.index:
+        return None
+    return entry.name, entry.version
+
+
+_frame_derived = {}
+_frame_derived_lock = threading.Lock()
+
+
+def cached_derived(df, key, build):
+    """
+    데이터프레임에서 파생된 객체(검색 색인 등)를 한 번만 만들어 재사용하는 함수.
+    카탈로그 데이터프레임이면 테이블 버전별로 모든 세션이 공유하고, 테이블이 다시 로드되면 새로 만든다.
+    그 외 데이터프레임은 같은 객체가 살아있는 동안만 재사용한다.
+
+    Args:
+        df: 원본 데이터프레임
+        key: 파생 객체 이름 (str)
+        build: df를 받아 파생 객체를 만드는 함수
+
+    Returns:
+        build(df)의 결과 (캐시된 값일 수 있음)
+    """
+    version = catalog_version(df)
+
+    # 1. 카탈로그 데이터프레임 → 테이블 버전별 공유
+    if version is not None:
+        entry = _entries[version[0]]
+        derived = entry.derived
+        if key not in derived:
+            with entry.derived_lock:
+                if key not in derived:
+                    derived[key] = build(df)
+        return derived[key]
+
+    # 2. 일반 데이터프레임 → 객체가 GC되면 캐시도 함께 제거
+    cache_key = (id(df), key)
+    with _frame_derived_lock:
+        cached = _frame_derived.get(cache_key)
+        if cached is not None and cached[0]() is df:
+            return cached[1]
+
+    value = build(df)
+    ref = weakref.ref(df, lambda _, k=cache_key: _frame_derived.pop(k, None))
+    with _frame_derived_lock:
+        _frame_derived[cache_key] = (ref, value)
+    return value
+
+
+def catalog_stats():
+    """
+    카탈로그별 캐시 적중률과 메모리 사용량을 반환하는 함수.
+
+    Returns:
+        {카탈로그 이름: {"rows", "bytes", "version", "hits", "misses", "hit_rate", "loads", "load_seconds", "age_seconds"}}
+    """
+    stats = {}
+    with _lock:
+        entries = list(_entries.values())
+
+    for entry in entries:
+        frame = entry.frame
+        requests = entry.hits + entry.misses
+        stats[entry.name] = {
+            "rows": len(frame) if frame is not None else 0,
+            "bytes": int(frame.memory_usage(deep=True).sum()) if frame is not None else 0,
+            "version": entry.version,
+            "hits": entry.hits,
+            "misses": entry.misses,
+            "hit_rate": entry.hits / requests if requests else 0.0,
+            "loads": entry.loads,
+            "load_seconds": entry.load_seconds,
+            "age_seconds": time.time() - entry.loaded_at if frame is not None else None,
+        }
+    return stats
+
+
+def frame_memory_report(df):
+    """
+    데이터프레임의 컬럼별 타입과 메모리 사용량(문자열 포함)을 반환하는 함수.
+
+    Returns:
+        {"rows", "bytes", "columns": {컬럼명: {"dtype", "bytes"}}}
+    """
+    usage = df.memory_usage(deep=True, index=False)
+    return {
+        "rows": len(df),
+        "bytes": int(usage.sum()),
+        "columns": {
+            column: {"dtype": str(df[column].dtype), "bytes": int(usage[column])}
+            for column in df.columns
+        },
+    }
+
+
+def catalog_memory_report():
+    """
+    로드된 카탈로그별 컬럼 타입과 메모리 사용량을 반환하는 함수.
+
+    Returns:
+        {카탈로그 이름: frame_memory_report 결과}
+    """
+    with _lock:
+        entries = list(_entries.values())
+    return {
+        entry.name: frame_memory_report(entry.frame)
+        for entry in entries
+        if entry.frame is not None
+    }
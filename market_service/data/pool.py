@@ -0,0 +1,289 @@
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+
+# MySQL 접속 설정 (configure_db()로 교체 가능)
+DB_CONFIG = {
+    "host": "192.168.14.47",
+    "user": "dongdong",
+    "password": "20250517",
+    "database": "ai_re",
+    "connection_timeout": 3600,
+}
+
+# 풀 크기 / 대여 대기 시간(초) / 유휴 연결 상태 확인 주기(초)
+POOL_SIZE = 8
+POOL_TIMEOUT = 10
+HEALTH_CHECK_INTERVAL = 30
+
+
+class PooledConnection:
+    """
+    풀에서 대여한 DB 연결을 감싸는 객체.
+    기존 코드처럼 close()를 호출하면 실제로 연결을 끊지 않고 풀에 반납한다.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self._conn is None:
+            raise RuntimeError("이미 풀에 반납된 연결입니다.")
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # close() 없이 버려진 연결도 풀 슬롯이 새지 않도록 반납
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    최대 size개의 연결을 재사용하는 스레드 안전한 커넥션 풀.
+
+    Args:
+        connect: 새 DB 연결을 만드는 함수 (인자 없음, mysql.connector 호환 연결)
+        size: 최대 연결 수
+        timeout: 모든 연결이 사용 중일 때 대기할 최대 시간(초)
+        health_check_interval: 이 시간 이상 유휴 상태였던 연결은 대여 전에 상태를 확인
+    """
+
+    def __init__(self, connect, size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 health_check_interval=HEALTH_CHECK_INTERVAL):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._cond = threading.Condition()
+        self._closed = False
+        self._idle = deque()          # (연결, 반납 시각)
+        self._total = 0               # 생성되어 살아있는 연결 수 (유휴 + 대여 중)
+
+        # 풀 포화도 지표
+        self._borrowed = 0
+        self._peak_borrowed = 0
+        self._acquires = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+
+    def acquire(self):
+        """
+        풀에서 연결을 대여하는 함수. 사용 후 반드시 close()로 반납해야 한다.
+
+        Returns:
+            PooledConnection
+
+        Raises:
+            TimeoutError: timeout 동안 반납되는 연결이 없는 경우
+        """
+        deadline = None
+        started = time.perf_counter()
+
+        with self._cond:
+            self._acquires += 1
+            while True:
+                # 1. 유휴 연결이 있으면 가장 최근에 반납된 것부터 사용
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+
+                # 2. 여유 슬롯이 있으면 새 연결 생성
+                if self._total < self.size:
+                    self._total += 1
+                    conn, returned_at = None, None
+                    break
+
+                # 3. 풀이 가득 찬 경우 반납을 기다림
+                if deadline is None:
+                    self._waits += 1
+                    deadline = started + self.timeout
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise TimeoutError(f"DB 커넥션 풀이 가득 찼습니다. (size={self.size})")
+                self._cond.wait(remaining)
+
+            self._borrowed += 1
+            self._peak_borrowed = max(self._peak_borrowed, self._borrowed)
+            if deadline is not None:
+                self._wait_seconds += time.perf_counter() - started
+
+        # 연결 생성과 상태 확인은 락 밖에서 수행
+        try:
+            if conn is not None and time.time() - returned_at > self.health_check_interval:
+                if not self._is_healthy(conn):
+                    self._close_quietly(conn)
+                    with self._cond:
+                        self._discarded += 1
+                    conn = None
+            if conn is None:
+                conn = self._connect()
+                with self._cond:
+                    self._created += 1
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._borrowed -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        """
+        대여한 연결을 풀에 반납하는 함수. (PooledConnection.close()에서 호출)
+        """
+        healthy = True
+        try:
+            # 커밋되지 않은 트랜잭션을 정리해 다음 사용자가 오래된 스냅샷을 읽지 않도록 함
+            conn.rollback()
+        except Exception:
+            healthy = False
+
+        with self._cond:
+            self._borrowed -= 1
+            healthy = healthy and not self._closed
+            if healthy:
+                self._idle.append((conn, time.time()))
+            else:
+                self._total -= 1
+                self._discarded += 1
+            self._cond.notify()
+
+        if not healthy:
+            self._close_quietly(conn)
+
+    def close_all(self):
+        """
+        풀을 닫고 유휴 연결을 모두 끊는 함수. (대여 중인 연결은 반납 시점에 끊김)
+        """
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._total -= len(idle)
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """
+        풀 포화도 지표를 반환하는 함수.
+        """
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._total,
+                "idle": len(self._idle),
+                "borrowed": self._borrowed,
+                "peak_borrowed": self._peak_borrowed,
+                "saturation": self._borrowed / self.size if self.size else 0.0,
+                "acquires": self._acquires,
+                "waits": self._waits,
+                "wait_seconds": self._wait_seconds,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "discarded": self._discarded,
+            }
+
+    @staticmethod
+    def _is_healthy(conn):
+        try:
+            # mysql.connector / PyMySQL
+            if hasattr(conn, "ping"):
+                conn.ping()
+            # ping이 없는 DB-API 연결
+            else:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _mysql_connect():
+    return mysql.connector.connect(**DB_CONFIG)
+
+
+def configure_db(connect=None, pool_size=POOL_SIZE, timeout=POOL_TIMEOUT, **settings):
+    """
+    DB 접속 설정을 교체하고 커넥션 풀을 새로 만드는 함수.
+    테스트에서는 로컬 MySQL(또는 MariaDB 등 MySQL 호환 DB)의 접속 정보를 넘겨 사용한다.
+
+    풀은 MySQL 전용이다. 풀에서 빌린 연결을 쓰는 코드(data/sql.py, login, log 등)가
+    cursor(dictionary=True)와 %s 파라미터 형식을 사용하므로, sqlite3 등 다른 DB 연결은 지원하지 않는다.
+    MySQL 없이 실행할 때는 스냅샷 백엔드(DATA_BACKEND=snapshot)를 사용한다.
+
+    Args:
+        connect: 새 연결을 만드는 함수 (인자 없음, mysql.connector 호환 연결을 반환해야 함, 기본값: DB_CONFIG로 접속)
+        pool_size: 최대 연결 수
+        timeout: 연결 대여 대기 시간(초)
+        **settings: DB_CONFIG에 덮어쓸 mysql.connector 접속 설정 (host, user, password, database 등)
+
+    Returns:
+        새로 생성된 ConnectionPool
+    """
+    global _pool
+
+    DB_CONFIG.update(settings)
+
+    with _pool_lock:
+        old = _pool
+        _pool = ConnectionPool(connect or _mysql_connect, size=pool_size, timeout=timeout)
+
+    if old is not None:
+        old.close_all()
+    return _pool
+
+
+def get_pool():
+    """
+    프로세스 전체에서 공유하는 커넥션 풀을 반환하는 함수. (최초 호출 시 생성)
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(_mysql_connect)
+    return _pool
+
+
+def pool_stats():
+    """
+    공유 커넥션 풀의 포화도 지표를 반환하는 함수.
+    """
+    return get_pool().stats()
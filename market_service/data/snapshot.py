@@ -0,0 +1,142 @@
+import os
+import threading
+
+import pandas as pd
+
+# CSV 스냅샷 경로 (환경변수 DATA_SNAPSHOT_DIR로 변경 가능) / 변환된 Parquet 저장 경로
+SNAPSHOT_DIR = os.environ.get(
+    "DATA_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
+)
+SNAPSHOT_PARQUET_DIR = os.environ.get("DATA_SNAPSHOT_PARQUET_DIR", os.path.join(SNAPSHOT_DIR, "parquet"))
+
+# CSV 파일 인코딩
+SNAPSHOT_ENCODING = "cp949"
+
+# 테이블별 컬럼 타입 (문자열 컬럼은 object, 목록에 없는 테이블/컬럼은 pandas 추론)
+SNAPSHOT_SCHEMAS = {
+    "recipe": {
+        "id": "int64", "name": "object", "instruction": "object", "role": "object",
+        "ingredient": "object", "category": "object", "inputRecipe": "object", "portion": "object",
+        "portNum": "int64", "level": "object", "time": "object", "timeNum": "int64",
+        "imgUrl": "object", "style": "object", "recipe": "object",
+    },
+    "product": {
+        "domain": "object", "division": "object", "category": "object", "brand": "object",
+        "name": "object", "price": "int64", "score": "float64", "reviewCnt": "int64",
+        "image": "object", "link": "object", "weight": "int64", "unit": "object",
+    },
+    "preference": {
+        "userNum": "float64", "id": "int64",
+        "instruction": "float64", "ingredient": "float64", "style": "float64",
+    },
+    "similarity": {
+        "userNum": "int64", "id": "int64", "name": "object",
+        "similarity": "float64", "exception": "float64", "partitionDate": "object",
+    },
+    "planning_total_revenues": {
+        "month": "int64", "day": "int64", "count": "int64", "total": "int64", "ARPU": "int64",
+    },
+    "userinfo": {
+        "userNum": "int64", "name": "object", "id": "object", "password": "object",
+        "contact": "object", "passwordHash": "object",
+    },
+    "user_logs": {
+        "userNum": "object", "logType": "object", "timestamp": "object",
+        "parameter": "object", "osType": "object", "partitionDate": "object",
+    },
+}
+
+_lock = threading.Lock()
+
+
+def snapshot_paths(table):
+    """
+    테이블의 (CSV 경로, Parquet 경로)를 반환하는 함수.
+    """
+    return (
+        os.path.join(SNAPSHOT_DIR, f"{table}.csv"),
+        os.path.join(SNAPSHOT_PARQUET_DIR, f"{table}.parquet"),
+    )
+
+
+def snapshot_version(table):
+    """
+    스냅샷 CSV의 (수정 시각, 크기)를 반환하는 함수. (카탈로그 버전 비교용, 파일이 없으면 None)
+    """
+    csv_path, _ = snapshot_paths(table)
+    try:
+        stat = os.stat(csv_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _read_csv(csv_path, table):
+    schema = SNAPSHOT_SCHEMAS.get(table, {})
+    df = pd.read_csv(csv_path, encoding=SNAPSHOT_ENCODING, low_memory=False)
+    for column, dtype in schema.items():
+        if column in df:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def convert_snapshot(table):
+    """
+    CSV 스냅샷을 스키마에 맞게 읽어 Parquet으로 저장하는 함수.
+
+    Returns:
+        변환된 데이터프레임
+    """
+    csv_path, parquet_path = snapshot_paths(table)
+    df = _read_csv(csv_path, table)
+
+    os.makedirs(SNAPSHOT_PARQUET_DIR, exist_ok=True)
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, parquet_path)
+    return df
+
+
+def load_snapshot(table):
+    """
+    스냅샷 테이블을 데이터프레임으로 반환하는 함수.
+    CSV보다 최신인 Parquet이 있으면 Parquet을 읽고, 없거나 CSV가 바뀌었으면 한 번 변환해 저장한다.
+
+    Args:
+        table: 테이블 이름 (예: "recipe", "preference")
+
+    Returns:
+        pd.DataFrame
+    """
+    csv_path, parquet_path = snapshot_paths(table)
+    if not os.path.exists(csv_path) and not os.path.exists(parquet_path):
+        raise FileNotFoundError(f"스냅샷 파일이 없습니다: {csv_path}")
+
+    with _lock:
+        fresh = os.path.exists(parquet_path) and (
+            not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+        )
+        if fresh:
+            return pd.read_parquet(parquet_path)
+        return convert_snapshot(table)
+
+
+def convert_all_snapshots():
+    """
+    SNAPSHOT_DIR의 모든 CSV를 Parquet으로 변환하는 함수.
+
+    Returns:
+        {테이블 이름: 행 수}
+    """
+    converted = {}
+    for name in sorted(os.listdir(SNAPSHOT_DIR)):
+        if name.endswith(".csv"):
+            table = name[:-len(".csv")]
+            converted[table] = len(convert_snapshot(table))
+    return converted
+
+
+if __name__ == "__main__":
+    for table, rows in convert_all_snapshots().items():
+        print(f"{table}: {rows}행")
@@ -1,97 +1,425 @@
-import mysql.connector
+import os
+from datetime import date
+
+import numpy as np
 import pandas as pd
+from .pool import get_pool
+from .snapshot import load_snapshot
 
-# SQL 연결
-def get_mysql_connection():
-    return mysql.connector.connect(
-        host='192.168.14.47',
-        user='dongdong',
-        password='20250517',
-        database='ai_re',
-        connection_timeout=3600
+# 데이터 백엔드 : "mysql" (기본) 또는 "snapshot" (data/ 폴더의 CSV/Parquet 스냅샷, MySQL 없이 실행)
+# 환경변수 DATA_BACKEND 또는 configure_backend()로 변경
+# snapshot 백엔드는 읽기 경로만 대신한다 : 카탈로그(load_*), 로그인 사용자 조회(load_user), 사용자 번호 생성,
+# 로그 아카이브 내보내기는 스냅샷에서 읽고, 이벤트 로그는 DB 대신 spool 파일에만 기록한다.
+# 온보딩 결과 저장(스냅샷 모드에서는 건너뜀), preference/batch.py, update_preference_similarity.py 같은
+# 쓰기 작업은 여전히 MySQL이 필요하다.
+DATA_BACKENDS = ("mysql", "snapshot")
+_backend = os.environ.get("DATA_BACKEND", "mysql")
+
+# similarity 저장 방식 : "dense" (사용자 × 레시피 전체 행, 기본) 또는 "topk" (사용자별 상위 K개 + 제외 재료 비트맵)
+# 환경변수 SIMILARITY_STORAGE 또는 configure_similarity_storage()로 변경
+SIMILARITY_STORAGES = ("dense", "topk")
+_similarity_storage = os.environ.get("SIMILARITY_STORAGE", "dense")
+SIMILARITY_TOP_K = int(os.environ.get("SIMILARITY_TOP_K", 50))
+
+# 제외 재료 분류 (온보딩 선택지, 목록 순서가 비트맵의 비트 순서이므로 뒤에만 추가)
+EXCEPTION_CATEGORIES = ["곡류", "밀가루", "과일류", "닭고기", "돼지고기", "소고기", "채소류", "해물류"]
+
+# topk 저장 방식의 테이블 컬럼
+TOP_K_SIMILARITY_COLUMNS = ["userNum", "id", "name", "similarity", "partitionDate"]
+SIMILARITY_EXCEPTION_COLUMNS = ["userNum", "exceptionMask", "partitionDate"]
+
+TOP_K_TABLES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS similarity_topk (
+        userNum INT NOT NULL,
+        id INT NOT NULL,
+        name VARCHAR(255),
+        similarity DOUBLE,
+        partitionDate DATE,
+        PRIMARY KEY (userNum, id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS similarity_exception (
+        userNum INT NOT NULL PRIMARY KEY,
+        exceptionMask INT NOT NULL DEFAULT 0,
+        partitionDate DATE
     )
+    """,
+]
+
+# 선호도 감쇠 계수 (하루 5%씩 점수 감소)
+PREFERENCE_DECAY_FACTOR = 0.95
+PREFERENCE_COLUMNS = ["instruction", "ingredient", "style"]
+
+# 로드 시 변환할 컬럼 타입 (id는 int32, 점수는 float32, 예외 여부는 bool, 반복되는 문자열은 category)
+PREFERENCE_DTYPES = {
+    "userNum": "int32", "id": "int32",
+    "instruction": "float32", "ingredient": "float32", "style": "float32",
+}
+SIMILARITY_DTYPES = {
+    "userNum": "int32", "id": "int32", "name": "category",
+    "similarity": "float32", "exception": "bool", "partitionDate": "category",
+}
+
+# SQL 연결 (커넥션 풀에서 대여, close() 호출 시 풀에 반납)
+def get_mysql_connection():
+    return get_pool().acquire()
+
+def configure_backend(name):
+    """
+    load_* 함수가 읽을 데이터 백엔드를 바꾸는 함수.
+    이미 로드된 카탈로그는 invalidate_catalog()로 비워야 새 백엔드에서 다시 읽는다.
+
+    Args:
+        name: "mysql" 또는 "snapshot"
+    """
+    global _backend
+    if name not in DATA_BACKENDS:
+        raise ValueError(f"지원하지 않는 데이터 백엔드입니다: {name}")
+    _backend = name
+
+def get_backend():
+    return _backend
+
+def configure_similarity_storage(name):
+    """
+    similarity를 읽고 쓰는 저장 방식을 바꾸는 함수.
+    이미 로드된 카탈로그는 invalidate_catalog()로 비워야 새 방식으로 다시 읽는다.
+
+    Args:
+        name: "dense" 또는 "topk"
+    """
+    global _similarity_storage
+    if name not in SIMILARITY_STORAGES:
+        raise ValueError(f"지원하지 않는 similarity 저장 방식입니다: {name}")
+    _similarity_storage = name
+
+def get_similarity_storage():
+    return _similarity_storage
+
+# 테이블 전체 조회
+def _select_all(table):
+    # 스냅샷 백엔드 : Parquet(최초 1회 CSV에서 변환)에서 읽기
+    if _backend == "snapshot":
+        return load_snapshot(table)
 
-# 레시피 테이블 로드
-def load_recipes():
     conn = get_mysql_connection()
-    cursor = conn.cursor(dictionary=True)
-    query = '''
-        SELECT *
-        FROM recipe
-    '''
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f'''
+            SELECT *
+            FROM {table}
+        ''')
+        rows = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
     return pd.DataFrame(rows)
 
+# 로그인 ID로 사용자 정보 조회 (없으면 None)
+def load_user(login_id):
+    """
+    로그인 ID에 해당하는 사용자의 userNum / name / id / passwordhash를 반환하는 함수.
+
+    Args:
+        login_id: 로그인 ID (str)
+
+    Returns:
+        dict 또는 None
+    """
+    # 스냅샷 백엔드 : userinfo 스냅샷에서 조회
+    if _backend == "snapshot":
+        users = load_snapshot("userinfo")
+        matched = users[users["id"] == login_id]
+        if matched.empty:
+            return None
+        row = matched.iloc[0]
+        return {
+            "userNum": int(row["userNum"]),
+            "name": row["name"],
+            "id": row["id"],
+            "passwordhash": row["passwordHash"],
+        }
+
+    conn = get_mysql_connection()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT userNum, name, id, passwordhash FROM userinfo WHERE id = %s",
+            (login_id,)
+        )
+        user = cursor.fetchone()
+        cursor.close()
+    finally:
+        conn.close()
+    return user
+
+
+# 레시피 테이블 로드
+def load_recipes():
+    return _select_all("recipe")
+
 
 # 상품 테이블 로드
 def load_product():
-    conn = get_mysql_connection()
-    cursor = conn.cursor(dictionary=True)
-    query = '''
-        SELECT *
-        FROM product
-    '''
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return pd.DataFrame(rows)
+    return _select_all("product")
 
 
-# 선호도 테이블 로드
-def load_preference():
-    conn = get_mysql_connection()
-    cursor = conn.cursor(dictionary=True)
-    query = '''
-        SELECT *
-        FROM preference
-    '''
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return pd.DataFrame(rows)
+# 마지막 갱신일 이후 지난 일수만큼 감쇠 적용 (score * 0.95 ** days)
+def apply_decay(df, columns, date_column, as_of=None, decay_factor=PREFERENCE_DECAY_FACTOR):
+    """
+    점수 컬럼에 마지막 갱신일 기준 시간 감쇠를 적용하는 함수.
+    nightly 작업은 활동한 사용자의 행만 다시 쓰므로, 나머지 행은 읽을 때 감쇠를 계산한다.
 
-# 유사도 테이블 로드
-def load_similarity():
-    conn = get_mysql_connection()
-    cursor = conn.cursor(dictionary=True)
-    query = '''
-        SELECT *
-        FROM similarity
-    '''
-    cursor.execute(query)
-    rows = cursor.fetchall()
+    Args:
+        df: 점수 데이터프레임 (직접 수정)
+        columns: 감쇠를 적용할 점수 컬럼 목록
+        date_column: 마지막 갱신일 컬럼 (없으면 감쇠하지 않음, 값이 없는 행은 0일로 간주)
+        as_of: 기준 날짜 (기본값: 오늘)
+        decay_factor: 하루당 감쇠 계수
+
+    Returns:
+        df
+    """
+    if df.empty or date_column not in df:
+        return df
+
+    updated = pd.to_datetime(df[date_column], errors="coerce")
+    # 스냅샷은 가장 최근 날짜에 찍힌 것으로 보고 그 시점 기준으로 감쇠
+    if as_of is None and _backend == "snapshot":
+        as_of = updated.max()
+    as_of = pd.Timestamp(as_of if as_of is not None and not pd.isna(as_of) else date.today())
+    days = (as_of - updated).dt.days.fillna(0).clip(lower=0).to_numpy()
+
+    scale = np.power(decay_factor, days)
+    for column in columns:
+        df[column] = pd.to_numeric(df[column]) * scale
+    return df
+
+def compact_frame(df, dtypes):
+    """
+    컬럼을 작은 타입으로 변환하는 함수. (로드 시 한 번만 변환해 추천 시 형변환이 없도록)
+    MySQL에서 온 userNum은 "1.0" 같은 문자열일 수 있어 숫자로 변환하며,
+    정수 컬럼이 숫자가 아닌 행(비회원 등)은 어떤 사용자와도 일치하지 않으므로 제외한다.
+
+    Args:
+        df: 원본 데이터프레임
+        dtypes: {컬럼명: "int32" | "float32" | "bool" | "category"} (없는 컬럼은 건너뜀)
+
+    Returns:
+        변환된 데이터프레임
+    """
+    columns = {}
+    valid = np.ones(len(df), dtype=bool)
+    for column, dtype in dtypes.items():
+        if column not in df:
+            continue
+        if dtype == "category":
+            columns[column] = df[column].astype("category")
+            continue
+
+        if dtype == "bool":
+            # 예외 여부 : 1 또는 "예외"이면 True (NULL / 0 / 그 외 값은 False)
+            columns[column] = exception_flags(df[column])
+            continue
+
+        values = pd.to_numeric(df[column], errors="coerce")
+        if dtype.startswith("int"):
+            valid &= values.notna().to_numpy()
+            columns[column] = values
+        else:
+            columns[column] = values.astype(dtype)
+
+    df = df.assign(**columns)
+    if not valid.all():
+        df = df[valid].reset_index(drop=True)
+    for column, dtype in dtypes.items():
+        if column in df and dtype.startswith("int"):
+            df[column] = df[column].astype(dtype)
+    return df
+
+# 선호도 테이블 로드 (lastUpdated 기준 감쇠 적용)
+def load_preference(as_of=None):
+    df = apply_decay(_select_all("preference"), PREFERENCE_COLUMNS, "lastUpdated", as_of)
+    return compact_frame(df, PREFERENCE_DTYPES)
+
+# 제외 재료 분류 목록 → 비트맵 (예: ["곡류", "닭고기"] → 0b1001)
+def exception_mask(categories):
+    mask = 0
+    for category in categories:
+        if category in EXCEPTION_CATEGORIES:
+            mask |= 1 << EXCEPTION_CATEGORIES.index(category)
+    return mask
+
+# 비트맵 → 제외 재료 분류 목록
+def mask_categories(mask):
+    return [category for bit, category in enumerate(EXCEPTION_CATEGORIES) if int(mask) >> bit & 1]
+
+def exception_flags(values):
+    """
+    similarity exception 컬럼 값을 예외 여부(bool 배열)로 바꾸는 함수.
+    1 / "1" / True 또는 "예외"(온보딩 결과)이면 True, NULL / 0 / 그 외 값은 False.
+    (로드 시 변환 / top-K 변환 / 추천 인덱스가 모두 이 함수를 사용해 같은 기준으로 판단)
+    """
+    values = pd.Series(values)
+    return (pd.to_numeric(values, errors="coerce").eq(1) | values.eq("예외")).to_numpy()
+
+def exception_masks(exceptions, recipe_df):
+    """
+    예외 (사용자, 레시피) 쌍을 사용자별 제외 재료 비트맵으로 바꾸는 함수.
+    레시피의 ingredient(재료 분류)가 예외로 표시된 분류를 모아 비트맵을 만든다.
+
+    Args:
+        exceptions: 예외인 userNum, id 쌍 데이터프레임
+        recipe_df: id, ingredient 컬럼을 가진 레시피 데이터프레임
+
+    Returns:
+        pd.DataFrame (userNum, exceptionMask)
+    """
+    bits = {category: 1 << i for i, category in enumerate(EXCEPTION_CATEGORIES)}
+    recipe_bits = pd.Series(
+        recipe_df["ingredient"].map(bits).fillna(0).astype(np.int64).to_numpy(),
+        index=pd.to_numeric(recipe_df["id"], errors="coerce")
+    )
+    recipe_bits = recipe_bits[~recipe_bits.index.duplicated()]
+
+    pairs = pd.DataFrame({
+        "userNum": pd.to_numeric(exceptions["userNum"], errors="coerce"),
+        "bit": recipe_bits.reindex(pd.to_numeric(exceptions["id"], errors="coerce")).fillna(0).astype(np.int64).to_numpy(),
+    }).dropna(subset=["userNum"])
+    masks = pairs.groupby("userNum")["bit"].agg(np.bitwise_or.reduce)
+    return pd.DataFrame({"userNum": masks.index.astype(np.int64), "exceptionMask": masks.to_numpy()})
+
+def mask_exception_pairs(masks, recipe_df):
+    """
+    사용자별 제외 재료 비트맵을 예외 (사용자, 레시피) 쌍으로 펼치는 함수. (exception_masks의 역변환)
+    """
+    bits = {category: 1 << i for i, category in enumerate(EXCEPTION_CATEGORIES)}
+    recipes = pd.DataFrame({
+        "id": pd.to_numeric(recipe_df["id"], errors="coerce"),
+        "bit": recipe_df["ingredient"].map(bits).fillna(0).astype(np.int64),
+    })
+    recipes = recipes[recipes["bit"] > 0]
+    masks = masks[masks["exceptionMask"] > 0]
+
+    pairs = masks.merge(recipes, how="cross")
+    pairs = pairs[(pairs["exceptionMask"].astype(np.int64) & pairs["bit"]) > 0]
+    return pairs[["userNum", "id"]].reset_index(drop=True)
+
+def top_k_similarity(similarity_df, recipe_df, k=None):
+    """
+    사용자 × 레시피 similarity를 사용자별 상위 k개 행과 제외 재료 비트맵으로 줄이는 함수.
+    예외 레시피는 상위 k개에서 빠지고 비트맵으로만 남는다.
+
+    Args:
+        similarity_df: userNum, id, name, similarity, exception, partitionDate 컬럼의 데이터프레임
+        recipe_df: id, ingredient 컬럼을 가진 레시피 데이터프레임
+        k: 사용자당 보관할 레시피 수 (기본값: SIMILARITY_TOP_K)
+
+    Returns:
+        (상위 k개 데이터프레임(TOP_K_SIMILARITY_COLUMNS), 비트맵 데이터프레임(SIMILARITY_EXCEPTION_COLUMNS)) 튜플
+    """
+    k = k or SIMILARITY_TOP_K
+    # 온보딩 결과처럼 name 컬럼이 없으면 레시피 이름으로 채움
+    if "name" not in similarity_df:
+        names = recipe_df.drop_duplicates("id").set_index("id")["name"]
+        similarity_df = similarity_df.assign(name=similarity_df["id"].map(names))
+    flags = exception_flags(similarity_df["exception"])
+
+    kept = similarity_df[~flags].assign(similarity=lambda df: pd.to_numeric(df["similarity"]))
+    # 사용자마다 유사도 내림차순 (같으면 레시피 id 순, 추천 인덱스와 같은 순서)
+    kept = kept.sort_values(["userNum", "similarity", "id"], ascending=[True, False, True], kind="stable")
+    top = kept.groupby("userNum", sort=False).head(k)[TOP_K_SIMILARITY_COLUMNS].reset_index(drop=True)
+
+    masks = exception_masks(similarity_df[flags], recipe_df)
+    dates = similarity_df.groupby("userNum")["partitionDate"].max()
+    masks["partitionDate"] = masks["userNum"].map(dates).to_numpy()
+    return top, masks[SIMILARITY_EXCEPTION_COLUMNS]
+
+def _load_top_k_tables():
+    # 스냅샷 백엔드 : 사용자 × 레시피 스냅샷에서 상위 K개를 계산
+    if _backend == "snapshot":
+        return top_k_similarity(load_snapshot("similarity"), load_snapshot("recipe"))
+    top = _select_all("similarity_topk")
+    masks = _select_all("similarity_exception")
+    # 빈 테이블은 컬럼 없는 데이터프레임으로 오므로 컬럼을 맞춤
+    return top.reindex(columns=TOP_K_SIMILARITY_COLUMNS), masks.reindex(columns=SIMILARITY_EXCEPTION_COLUMNS)
+
+# 유사도 테이블 로드 (partitionDate 기준 감쇠 적용)
+# topk 저장 방식이면 사용자별 상위 K개 행만 읽으며, 예외 레시피는 저장되지 않으므로 exception은 모두 False
+def load_similarity(as_of=None):
+    if _similarity_storage == "topk":
+        df, _ = _load_top_k_tables()
+        df = df.assign(exception=False)
+    else:
+        df = _select_all("similarity")
+    df = apply_decay(df, ["similarity"], "partitionDate", as_of)
+    return compact_frame(df, SIMILARITY_DTYPES)
+
+# 사용자별 제외 재료 비트맵 로드 (dense 저장 방식은 예외가 similarity 행에 있으므로 빈 데이터프레임)
+def load_similarity_exceptions():
+    if _similarity_storage == "topk":
+        _, df = _load_top_k_tables()
+        if not df.empty:
+            return compact_frame(df, {"userNum": "int32", "exceptionMask": "int32"})
+    return pd.DataFrame({
+        "userNum": pd.Series(dtype="int32"), "exceptionMask": pd.Series(dtype="int32")
+    })
+
+def ensure_top_k_tables(conn):
+    """
+    topk 저장 방식의 테이블(similarity_topk, similarity_exception)이 없으면 만드는 함수.
+    """
+    cursor = conn.cursor()
+    for ddl in TOP_K_TABLES_DDL:
+        cursor.execute(ddl)
+    conn.commit()
     cursor.close()
-    conn.close()
-    return pd.DataFrame(rows)
 
-# 유사도 테이블 로드
-def load_similarity():
+def write_user_top_k_similarity(similarity_df, recipe_df, k=None):
+    """
+    사용자들의 similarity 결과(온보딩 등)를 상위 k개 / 제외 재료 비트맵으로 줄여 저장하는 함수.
+    해당 사용자의 기존 행을 지우고 새 행을 넣는 작업을 한 트랜잭션으로 실행한다.
+
+    Args:
+        similarity_df: userNum 컬럼이 채워진 사용자 × 레시피 similarity 데이터프레임
+        recipe_df: id, ingredient 컬럼을 가진 레시피 데이터프레임
+        k: 사용자당 보관할 레시피 수 (기본값: SIMILARITY_TOP_K)
+
+    Returns:
+        (상위 k개 행 수, 비트맵 행 수) 튜플
+    """
+    top, masks = top_k_similarity(similarity_df, recipe_df, k)
+    users = [int(user) for user in pd.to_numeric(similarity_df["userNum"]).unique()]
+    if not users:
+        return 0, 0
+
     conn = get_mysql_connection()
-    cursor = conn.cursor(dictionary=True)
-    query = '''
-        SELECT *
-        FROM similarity
-    '''
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return pd.DataFrame(rows)
+    try:
+        ensure_top_k_tables(conn)
+        cursor = conn.cursor()
+        placeholders = ", ".join(["%s"] * len(users))
+        try:
+            for table, columns, frame in (
+                ("similarity_topk", TOP_K_SIMILARITY_COLUMNS, top),
+                ("similarity_exception", SIMILARITY_EXCEPTION_COLUMNS, masks),
+            ):
+                cursor.execute(f"DELETE FROM {table} WHERE userNum IN ({placeholders})", users)
+                if not frame.empty:
+                    cursor.executemany(
+                        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+                        frame[columns].astype(object).where(frame[columns].notna(), None).values.tolist()
+                    )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+    return len(top), len(masks)
 
 def load_total_revenues():
-    conn = get_mysql_connection()
-    cursor = conn.cursor(dictionary=True)
-    query = '''
-        SELECT *
-        FROM planning_total_revenues
-    '''
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return pd.DataFrame(rows)
\ No newline at end of file
+    return _select_all("planning_total_revenues")
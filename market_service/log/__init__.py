@@ -1 +1,3 @@
-from .log import log_event
\ No newline at end of file
+from .log import log_event
+from .buffer import EventBuffer, get_event_buffer, flush_events, event_log_stats
+from .archive import export_frame, export_user_logs, list_partitions, read_user_logs
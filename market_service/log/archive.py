@@ -0,0 +1,284 @@
+import json
+import os
+import shutil
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data import get_mysql_connection, get_backend, load_snapshot
+
+# user_logs 아카이브 경로 (환경변수 LOG_ARCHIVE_DIR로 변경 가능)
+# 구조: {ARCHIVE_DIR}/partitionDate=YYYY-MM-DD/logType={logType}/part-0.parquet
+LOG_ARCHIVE_DIR = os.environ.get(
+    "LOG_ARCHIVE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive")
+)
+
+# parameter JSON을 펼친 컬럼의 이름 접두사 (예: "레시피" → "param_레시피")
+PARAM_PREFIX = "param_"
+
+# logType별 parameter 스키마 (값을 이 타입으로 변환, 변환할 수 없는 값은 null)
+# 스키마에 없는 키는 날짜마다 타입이 달라져도 파티션을 함께 읽을 수 있도록 JSON 문자열로 저장
+PARAMETER_SCHEMAS = {
+    "cartPurchase": {
+        "재료": pa.list_(pa.struct([
+            ("qty", pa.int64()),
+            ("unit", pa.string()),
+            ("price", pa.int64()),
+            ("weight", pa.float64()),
+            ("display_name", pa.string()),
+        ])),
+        "레시피": pa.list_(pa.struct([("id", pa.int64()), ("name", pa.string())])),
+        "주문번호": pa.string(),
+        "총구매금액": pa.int64(),
+    },
+    "websiteOpen": {
+        "이름": pa.list_(pa.string()),
+        "노출순서": pa.list_(pa.int64()),
+    },
+    "login": {
+        "id": pa.string(),
+    },
+}
+
+_BASE_SCHEMA = pa.schema([
+    ("userNum", pa.string()),
+    ("timestamp", pa.timestamp("s")),
+    ("osType", pa.string()),
+    ("parameter", pa.string()),
+])
+
+
+def _partition_dir(archive_dir, partition_date, log_type):
+    return os.path.join(archive_dir, f"partitionDate={partition_date}", f"logType={log_type}")
+
+
+def _to_date_str(value):
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m-%d")
+    return str(value)[:10]
+
+
+def _typed_array(values, type):
+    # 스키마 타입으로 변환, 전체 변환이 실패하면 값마다 변환해 실패한 값만 null
+    try:
+        return pa.array(values, type=type)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+        pass
+    cast = []
+    for value in values:
+        try:
+            pa.array([value], type=type)
+            cast.append(value)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+            cast.append(None)
+    return pa.array(cast, type=type)
+
+
+def _json_array(values):
+    return pa.array(
+        [None if value is None else json.dumps(value, ensure_ascii=False) for value in values],
+        type=pa.string()
+    )
+
+
+def _parameter_columns(log_type, parameters):
+    """
+    parameter JSON 문자열 목록을 펼쳐 {컬럼명: pyarrow 배열}로 만드는 함수.
+    JSON이 아니거나 dict가 아닌 값은 null로 처리한다. (원본은 parameter 컬럼에 보존)
+    PARAMETER_SCHEMAS에 있는 키는 항상 스키마 타입, 없는 키는 항상 JSON 문자열이므로
+    파티션마다 컬럼 타입이 달라지지 않는다.
+    """
+    parsed = []
+    for parameter in parameters:
+        try:
+            value = json.loads(parameter) if isinstance(parameter, str) else None
+        except ValueError:
+            value = None
+        parsed.append(value if isinstance(value, dict) else {})
+
+    keys = []
+    for value in parsed:
+        keys.extend(key for key in value if key not in keys)
+
+    schema = PARAMETER_SCHEMAS.get(log_type, {})
+    columns = {}
+    for key in keys:
+        values = [value.get(key) for value in parsed]
+        columns[PARAM_PREFIX + key] = _typed_array(values, schema[key]) if key in schema else _json_array(values)
+    return columns
+
+
+def _to_table(log_type, frame):
+    base = pa.Table.from_pandas(
+        pd.DataFrame({
+            "userNum": frame["userNum"].astype(str),
+            "timestamp": pd.to_datetime(frame["timestamp"]).astype("datetime64[s]"),
+            "osType": frame["osType"].astype(str),
+            "parameter": frame["parameter"],
+        }),
+        schema=_BASE_SCHEMA,
+        preserve_index=False
+    )
+    for name, array in _parameter_columns(log_type, frame["parameter"].tolist()).items():
+        base = base.append_column(name, array)
+    return base
+
+
+def export_frame(df, archive_dir=None):
+    """
+    user_logs 데이터프레임을 (partitionDate, logType) 파티션별 Parquet 파일로 저장하는 함수.
+    같은 파티션이 이미 있으면 통째로 교체한다. (같은 날짜를 다시 내보내도 중복되지 않음)
+
+    Args:
+        df: userNum, logType, timestamp, parameter, osType, partitionDate 컬럼을 가진 데이터프레임
+        archive_dir: 아카이브 경로 (기본값: LOG_ARCHIVE_DIR)
+
+    Returns:
+        {(partitionDate, logType): 행 수}
+    """
+    archive_dir = archive_dir or LOG_ARCHIVE_DIR
+    if df.empty:
+        return {}
+
+    df = df.assign(partitionDate=df["partitionDate"].map(_to_date_str))
+    written = {}
+    for (partition_date, log_type), frame in df.groupby(["partitionDate", "logType"], sort=True):
+        table = _to_table(log_type, frame.sort_values("timestamp", kind="stable"))
+
+        # 임시 디렉터리에 쓴 뒤 교체 (읽는 쪽에서 반쯤 쓰인 파티션을 보지 않도록)
+        target = _partition_dir(archive_dir, partition_date, log_type)
+        tmp_dir = f"{target}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        pq.write_table(table, os.path.join(tmp_dir, "part-0.parquet"), compression="zstd")
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp_dir, target)
+
+        written[(partition_date, log_type)] = table.num_rows
+    return written
+
+
+def export_user_logs(start_date, end_date=None, archive_dir=None):
+    """
+    MySQL user_logs를 날짜별로 조회해 아카이브에 저장하는 함수. (snapshot 백엔드면 user_logs 스냅샷에서 읽음)
+
+    Args:
+        start_date: 시작 날짜 ("YYYY-MM-DD" 또는 date)
+        end_date: 종료 날짜 (포함, 기본값: start_date)
+        archive_dir: 아카이브 경로
+
+    Returns:
+        {(partitionDate, logType): 행 수}
+    """
+    start = pd.Timestamp(start_date).date()
+    end = pd.Timestamp(end_date).date() if end_date else start
+
+    written = {}
+    day = start
+    # 스냅샷 백엔드 : user_logs 스냅샷에서 날짜별로 읽기
+    snapshot = load_snapshot("user_logs") if get_backend() == "snapshot" else None
+
+    while day <= end:
+        if snapshot is not None:
+            frame = snapshot[snapshot["partitionDate"] == day.strftime("%Y-%m-%d")]
+            written.update(export_frame(frame.reset_index(drop=True), archive_dir))
+            day += timedelta(days=1)
+            continue
+
+        conn = get_mysql_connection()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                """
+                SELECT userNum, logType, timestamp, parameter, osType, partitionDate
+                FROM user_logs
+                WHERE partitionDate = %s
+                """,
+                (day.strftime("%Y-%m-%d"),)
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+
+        written.update(export_frame(pd.DataFrame(rows), archive_dir))
+        day += timedelta(days=1)
+    return written
+
+
+def list_partitions(archive_dir=None, start_date=None, end_date=None, log_types=None):
+    """
+    조건에 맞는 파티션 (partitionDate, logType, 경로) 목록을 반환하는 함수.
+    디렉터리 이름만 보고 걸러내므로 조건에 맞지 않는 파일은 열지 않는다.
+    """
+    archive_dir = archive_dir or LOG_ARCHIVE_DIR
+    if not os.path.isdir(archive_dir):
+        return []
+
+    start = _to_date_str(start_date) if start_date else None
+    end = _to_date_str(end_date) if end_date else None
+    log_types = {log_types} if isinstance(log_types, str) else set(log_types or [])
+
+    partitions = []
+    for date_dir in sorted(os.listdir(archive_dir)):
+        if not date_dir.startswith("partitionDate=") or date_dir.endswith(".tmp"):
+            continue
+        partition_date = date_dir.split("=", 1)[1]
+        if (start and partition_date < start) or (end and partition_date > end):
+            continue
+
+        for type_dir in sorted(os.listdir(os.path.join(archive_dir, date_dir))):
+            if not type_dir.startswith("logType=") or type_dir.endswith(".tmp"):
+                continue
+            log_type = type_dir.split("=", 1)[1]
+            if log_types and log_type not in log_types:
+                continue
+            partitions.append((partition_date, log_type, os.path.join(archive_dir, date_dir, type_dir)))
+    return partitions
+
+
+def read_user_logs(start_date=None, end_date=None, log_types=None, columns=None, archive_dir=None):
+    """
+    아카이브에서 기간 / logType 조건에 맞는 로그를 읽는 함수. (MySQL 조회, JSON 파싱 없음)
+
+    Args:
+        start_date: 시작 날짜 (포함, None이면 처음부터)
+        end_date: 종료 날짜 (포함, None이면 끝까지)
+        log_types: logType 또는 logType 목록 (None이면 전체)
+        columns: 읽을 컬럼 목록 (None이면 전체, 예: ["userNum", "param_레시피"])
+        archive_dir: 아카이브 경로
+
+    Returns:
+        pd.DataFrame (partitionDate, logType 컬럼 포함, 펼친 parameter는 param_ 접두사 컬럼)
+    """
+    tables = []
+    for partition_date, log_type, path in list_partitions(archive_dir, start_date, end_date, log_types):
+        for name in sorted(os.listdir(path)):
+            if not name.endswith(".parquet"):
+                continue
+            file = pq.ParquetFile(os.path.join(path, name))
+            available = [c for c in columns if c in file.schema_arrow.names] if columns else None
+            table = file.read(columns=available)
+            table = table.append_column("partitionDate", pa.array([partition_date] * table.num_rows, pa.string()))
+            table = table.append_column("logType", pa.array([log_type] * table.num_rows, pa.string()))
+            tables.append(table)
+
+    if not tables:
+        return pd.DataFrame(columns=(columns or list(_BASE_SCHEMA.names)) + ["partitionDate", "logType"])
+    return pa.concat_tables(tables, promote_options="default").to_pandas()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="user_logs를 날짜별 Parquet 아카이브로 내보내기")
+    parser.add_argument("--start", default=(date.today() - timedelta(days=1)).strftime("%Y-%m-%d"))
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--archive-dir", default=None)
+    args = parser.parse_args()
+
+    for (partition_date, log_type), rows in export_user_logs(args.start, args.end, args.archive_dir).items():
+        print(f"{partition_date} {log_type}: {rows}행")
@@ -0,0 +1,279 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+from data import get_mysql_connection, get_backend
+
+# 이벤트 버퍼 설정 (flush 조건: EVENT_FLUSH_SIZE개가 모이거나 EVENT_FLUSH_INTERVAL_MS가 지나면)
+EVENT_FLUSH_SIZE = 200
+EVENT_FLUSH_INTERVAL_MS = 500
+EVENT_QUEUE_SIZE = 10000
+
+# 대기열이 가득 찼을 때 기다리는 최대 시간 (초), 이후에는 spool 파일에 기록
+EVENT_PUT_TIMEOUT = 0.05
+
+# DB에 쓰지 못한 이벤트를 보관하는 파일 (JSON Lines, 환경변수 EVENT_SPOOL_PATH로 변경 가능)
+EVENT_SPOOL_PATH = os.environ.get(
+    "EVENT_SPOOL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "spool", "user_logs.jsonl")
+)
+
+INSERT_USER_LOG = """
+    INSERT INTO user_logs
+      (userNum, logType, timestamp, parameter, osType, partitionDate)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+_STOP = object()
+
+
+class EventBuffer:
+    """
+    user_logs 이벤트를 모아서 백그라운드 스레드가 한 번에 INSERT하는 버퍼.
+    DB에 쓰지 못한 이벤트는 spool 파일에 추가 기록했다가, 다음 flush가 성공하면 다시 적재한다.
+    snapshot 데이터 백엔드(MySQL 없이 실행)에서는 DB에 접속하지 않고 spool 파일에만 기록한다.
+
+    Args:
+        flush_size: 한 번에 INSERT할 최대 이벤트 수
+        flush_interval_ms: 이벤트가 적어도 이 시간이 지나면 flush
+        maxsize: 대기열 최대 크기 (가득 차면 put_timeout만큼 기다린 뒤 spool 파일에 기록)
+        spool_path: spool 파일 경로
+        put_timeout: 대기열이 가득 찼을 때 기다리는 최대 시간 (초)
+        connect: DB 커넥션을 반환하는 함수
+    """
+
+    def __init__(self, flush_size=EVENT_FLUSH_SIZE, flush_interval_ms=EVENT_FLUSH_INTERVAL_MS,
+                 maxsize=EVENT_QUEUE_SIZE, spool_path=EVENT_SPOOL_PATH, put_timeout=EVENT_PUT_TIMEOUT,
+                 connect=get_mysql_connection):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.spool_path = spool_path
+        self.put_timeout = put_timeout
+        self.connect = connect
+
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._spool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._flush_requests = []
+        self._closed = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.spooled = 0
+        self.replayed = 0
+        self.overflows = 0
+        self.failures = 0
+        self.flushes = 0
+        self.flush_seconds = 0.0
+        self.last_error = None
+
+        self._thread = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, row):
+        """
+        이벤트 한 건을 대기열에 넣는 함수. (DB 왕복 없이 바로 반환)
+        대기열이 가득 차 있으면 put_timeout까지 기다리고, 그래도 가득 차 있으면 spool 파일에 기록한다.
+
+        Args:
+            row: (userNum, logType, timestamp, parameter, osType, partitionDate) 튜플
+        """
+        if self._closed:
+            self._spool([row])
+            return
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            with self._stats_lock:
+                self.overflows += 1
+            self._spool([row])
+            return
+        with self._stats_lock:
+            self.enqueued += 1
+
+    def flush(self, timeout=5.0):
+        """
+        지금까지 넣은 이벤트가 DB(또는 spool 파일)에 기록될 때까지 기다리는 함수.
+
+        Returns:
+            제한 시간 안에 끝났으면 True
+        """
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """
+        남은 이벤트를 모두 기록하고 백그라운드 스레드를 종료하는 함수. (프로세스 종료 시 자동 호출)
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def stats(self):
+        """
+        버퍼 상태와 적재 통계를 반환하는 함수.
+        """
+        with self._stats_lock:
+            return {
+                "queued": self._queue.qsize(),
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "spooled": self.spooled,
+                "replayed": self.replayed,
+                "overflows": self.overflows,
+                "failures": self.failures,
+                "flushes": self.flushes,
+                "avg_flush_ms": self.flush_seconds / self.flushes * 1000 if self.flushes else None,
+                "spool_bytes": self._spool_size(),
+                "last_error": self.last_error,
+            }
+
+    def _run(self):
+        batch, waiters = [], []
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            stop = item is _STOP
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None and not stop:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            # flush 조건: 개수 / 시간 / flush() 요청 / 종료
+            expired = deadline is not None and time.monotonic() >= deadline
+            if batch and (len(batch) >= self.flush_size or expired or waiters or stop):
+                self._write(batch)
+                batch, deadline = [], None
+            elif not batch:
+                deadline = None
+
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+
+            if stop:
+                return
+
+    def _write(self, batch):
+        # 스냅샷 백엔드 : MySQL이 없으므로 spool 파일에만 기록 (MySQL 백엔드로 실행하면 다시 적재됨)
+        if get_backend() == "snapshot":
+            self._spool(batch)
+            return
+
+        started = time.perf_counter()
+        try:
+            self._insert(batch)
+        except Exception as e:
+            with self._stats_lock:
+                self.failures += 1
+                self.last_error = repr(e)
+            self._spool(batch)
+            return
+
+        with self._stats_lock:
+            self.written += len(batch)
+            self.flushes += 1
+            self.flush_seconds += time.perf_counter() - started
+
+        # DB가 살아있으면 spool 파일에 남은 이벤트도 적재
+        self._replay()
+
+    def _insert(self, rows):
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            for start in range(0, len(rows), self.flush_size):
+                cursor.executemany(INSERT_USER_LOG, rows[start:start + self.flush_size])
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+    def _spool(self, rows):
+        with self._spool_lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.spool_path)), exist_ok=True)
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(list(row), ensure_ascii=False) + "\n")
+        with self._stats_lock:
+            self.spooled += len(rows)
+
+    def _spool_size(self):
+        try:
+            return os.path.getsize(self.spool_path)
+        except OSError:
+            return 0
+
+    def _replay(self):
+        # spool 파일을 옮겨 놓고 적재 (적재 중 새로 spool되는 이벤트와 섞이지 않도록)
+        replay_path = f"{self.spool_path}.replay"
+        with self._spool_lock:
+            if not os.path.exists(replay_path):
+                if not self._spool_size():
+                    return
+                os.replace(self.spool_path, replay_path)
+
+        with open(replay_path, encoding="utf-8") as f:
+            rows = [tuple(json.loads(line)) for line in f if line.strip()]
+        try:
+            self._insert(rows)
+        except Exception as e:
+            with self._stats_lock:
+                self.failures += 1
+                self.last_error = repr(e)
+            return
+
+        os.remove(replay_path)
+        with self._stats_lock:
+            self.replayed += len(rows)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_event_buffer():
+    """
+    프로세스 전체에서 공유하는 이벤트 버퍼를 반환하는 함수. (처음 호출 시 생성, 종료 시 자동 flush)
+    """
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = EventBuffer()
+                atexit.register(_buffer.close)
+    return _buffer
+
+
+def flush_events(timeout=5.0):
+    """
+    버퍼에 쌓인 이벤트를 바로 기록하는 함수.
+    """
+    return get_event_buffer().flush(timeout)
+
+
+def event_log_stats():
+    """
+    이벤트 버퍼의 적재 통계를 반환하는 함수.
+    """
+    return get_event_buffer().stats()
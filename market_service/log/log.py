@@ -1,11 +1,14 @@
-from data import get_mysql_connection
 from datetime import datetime, date
 import json
 
+from .buffer import get_event_buffer
+
 def log_event(user_num: str, os_type: str, log_type: str, parameter: dict):
 
     """
     사용자 활동을 user_logs 테이블에 기록하는 함수.
+    이벤트는 공유 버퍼에 넣고 바로 반환하며, 백그라운드 스레드가 모아서 한 번에 INSERT한다.
+    (DB에 쓰지 못하면 spool 파일에 보관했다가 다시 적재)
 
     Args:
         user_num: 사용자 번호 (str)
@@ -17,32 +20,16 @@ def log_event(user_num: str, os_type: str, log_type: str, parameter: dict):
         None
     """
     
-    # MySQL 연결
-    conn = get_mysql_connection()
-    cursor = conn.cursor()
-
-    # 현재 시간 및 날짜 생성
+    # 현재 시간 및 날짜 생성 (이벤트 발생 시점 기준)
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     part_date = date.today().strftime("%Y-%m-%d")
 
-    # user_logs 테이블에 이벤트 기록
-    cursor.execute(
-        """
-        INSERT INTO user_logs
-          (userNum, logType, timestamp, parameter, osType, partitionDate)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        """,
-        (
-            user_num,
-            log_type,
-            now,
-            json.dumps(parameter, ensure_ascii=False),
-            os_type,
-            part_date
-        )
-    )
-
-    # 변경사항 커밋 및 연결 종료
-    conn.commit()
-    cursor.close()
-    conn.close()
+    # user_logs 테이블에 기록할 이벤트를 버퍼에 추가
+    get_event_buffer().put((
+        user_num,
+        log_type,
+        now,
+        json.dumps(parameter, ensure_ascii=False),
+        os_type,
+        part_date
+    ))
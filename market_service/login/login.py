@@ -1,4 +1,4 @@
-from data import get_mysql_connection
+from data import load_user
 import bcrypt
 
 def authenticate(login_id: str, password: str):
@@ -19,20 +19,8 @@ def authenticate(login_id: str, password: str):
     if login_id == "admin" and password == "admin1234":
         return {"id": "admin", "name": "관리자", "role": "admin"}
 
-    # MySQL 연결
-    conn = get_mysql_connection()
-    cur = conn.cursor(dictionary=True)
-
-    # 입력된 login_id에 해당하는 사용자 정보 조회
-    cur.execute(
-        "SELECT userNum, name, id, passwordhash FROM userinfo WHERE id = %s",
-        (login_id,)
-    )
-    user = cur.fetchone()
-
-    # 커서 및 연결 종료
-    cur.close()
-    conn.close()
+    # 입력된 login_id에 해당하는 사용자 정보 조회 (MySQL 또는 스냅샷 백엔드)
+    user = load_user(login_id)
 
     # 사용자 정보가 존재하고, 비밀번호가 일치하는지 확인
     if user and bcrypt.checkpw(password.encode('utf-8'), user['passwordhash'].encode('utf-8')):
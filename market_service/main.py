@@ -15,6 +15,8 @@ st.set_page_config(layout="wide")
 from cart import (
     add_to_cart,
     parse_recipe,
+    parsed_recipe_column,
+    recipe_id_strings,
     recommend_recipes,
     get_remaining_cart,
     recipe_serving_price
@@ -22,20 +24,23 @@ from cart import (
 
 from data import (
     get_mysql_connection,
-    load_recipes,
-    load_product,
-    load_preference,
-    load_similarity,
-    load_total_revenues
+    get_catalog,
+    catalog_stats,
+    pool_stats,
+    get_backend,
+    get_similarity_storage,
+    write_user_top_k_similarity,
+    EXCEPTION_CATEGORIES
 )
-from log import log_event
+from log import log_event, event_log_stats
 from login import authenticate
-from market import search_products, search_similar_recipes_with_vectordb
+from market import search_products, search_products_batch, search_recipes_hybrid, get_recipe_lexical_index, search_cache_stats
 from preference import ( 
     generate_similarity_table, 
     generate_preference_table,
 )
 from chatbot import classify_user_intent, chatbot_recommendation, choramadb_search, gpt_select_recipe
+from vectordb import MODEL_NAME, warm_up_vector_store, vector_store_stats, embedding_cache_stats
 
 # streamlit 함수
 def render_product_cards(title: str, products_df: pd.DataFrame, recipe_key: str):
@@ -155,7 +160,7 @@ def render_missing_ingredient_batch_add(selected_recipe, df_product):
         return
 
     # 1. 레시피 파싱
-    parsed = selected_recipe.get('parsedRecipe') or parse_recipe(selected_recipe.get('inputRecipe', ''))
+    parsed = selected_recipe.get('parsedRecipe', [])
 
     # 2. 이미 장바구니와 매칭된 재료
     matched = selected_recipe.get('matched', [])
@@ -164,14 +169,17 @@ def render_missing_ingredient_batch_add(selected_recipe, df_product):
     result = [item for item in parsed if item not in matched]
     newly_added = []
 
-    # 4. 부족한 재료별 상품 검색 및 자동 추가
-    for item in result:
-        ingredient = item['ingredient'] if isinstance(item, dict) else item
-        results = search_products(ingredient, df_product)
-        if results.empty:
+    # 4. 부족한 재료 전체를 한 번에 검색 (재료별 첫 번째 상품만)
+    ingredients = [item['ingredient'] if isinstance(item, dict) else item for item in result]
+    matches = search_products_batch(ingredients, df_product, limit=1)
+
+    # 5. 부족한 재료별 상품 자동 추가
+    for ingredient in ingredients:
+        product_ids = matches[ingredient]
+        if not product_ids:
             continue
 
-        first = results.iloc[0]
+        first = df_product.loc[product_ids[0]]
 
         # 안전한 키 생성
         key = safe_key(first["name"], first.get("brand", ""), first.get("weight", 0))
@@ -196,7 +204,7 @@ def render_missing_ingredient_batch_add(selected_recipe, df_product):
 
         newly_added.append(first["name"])
 
-    # 5. 레시피 정보 상태에 저장 및 rerun
+    # 6. 레시피 정보 상태에 저장 및 rerun
     if newly_added:
         rname = selected_recipe["name"]
         st.session_state.selected_recipes.append(rname)
@@ -296,14 +304,17 @@ def render_recipe_recommendation(recipes, title, key_prefix, df_product):
                     ingredient_list.append(ing)
                     seen.add(ing)
 
+            # 부족한 재료 전체를 한 번에 검색 (재료별 상위 4개 상품)
+            matches = search_products_batch(ingredient_list, df_product, limit=4)
+
             # 부족한 재료별 상품 추천 및 선택 체크박스
             for ingredient in ingredient_list:
                 st.markdown(f"#### ▪︎ '{ingredient}' 관련 추천 상품")
-                results = search_products(ingredient, df_product)
-                if results.empty:
+                product_ids = matches[ingredient]
+                if not product_ids:
                     st.warning(f"'{ingredient}' 관련 검색 결과가 없습니다.")
                 else:
-                    limited_results = results.iloc[:4]
+                    limited_results = df_product.loc[product_ids]
                     cols = st.columns(4, gap="small")
                     for i, (_, r) in enumerate(limited_results.iterrows()):
                         with cols[i % 4]:
@@ -362,26 +373,29 @@ def render_recipe_recommendation(recipes, title, key_prefix, df_product):
 # 모델 선언
 @st.cache_resource
 def load_model():
-    return SentenceTransformer('snunlp/KR-SBERT-V40K-klueNLI-augSTS', device='cpu')
+    return SentenceTransformer(MODEL_NAME, device='cpu')
 
 model = load_model()
 
-# 세션 초기화
-if "df_product" not in st.session_state:
-    st.session_state["df_product"] = load_product()
-
-if "df_recipe" not in st.session_state:
-    st.session_state["df_recipe"] = load_recipes()
+# 벡터DB 핸들 (앱 시작 시 한 번 열고 워밍업, 실패해도 첫 검색 때 다시 연결)
+@st.cache_resource
+def load_vector_store():
+    return warm_up_vector_store()
 
-if "df_preference" not in st.session_state:
-    st.session_state["df_preference"] = load_preference()
+load_vector_store()
 
-if "df_similarity" not in st.session_state:
-    st.session_state["df_similarity"] = load_similarity()
+# 공유 카탈로그 연결 (테이블은 프로세스당 한 번만 로드되고 모든 세션이 같은 데이터를 사용)
+st.session_state["df_product"] = get_catalog("product")
+st.session_state["df_recipe"] = get_catalog("recipe")
+st.session_state["df_preference"] = get_catalog("preference")
+st.session_state["df_similarity"] = get_catalog("similarity")
+st.session_state["df_similarity_exception"] = get_catalog("similarity_exception")
+st.session_state["df_total"] = get_catalog("total_revenues")
 
-if "df_total" not in st.session_state:
-    st.session_state["df_total"] = load_total_revenues()
+# 레시피 어휘 검색 색인 (레시피 테이블 버전별로 한 번만 생성)
+get_recipe_lexical_index(st.session_state["df_recipe"])
 
+# 세션 초기화
 if "user" not in st.session_state:
     st.session_state["user"] = None
 
@@ -415,16 +429,6 @@ if "recipe_cart" not in st.session_state:
 if "recipe_price" not in st.session_state:
     st.session_state.recipe_price = []
 
-# 검색 결과 캐싱 관련 세션 초기화
-if "cached_recipe_query" not in st.session_state:
-    st.session_state["cached_recipe_query"] = None
-if "cached_recipe_results" not in st.session_state:
-    st.session_state["cached_recipe_results"] = pd.DataFrame()
-if "cached_product_query" not in st.session_state:
-    st.session_state["cached_product_query"] = None
-if "cached_product_results" not in st.session_state:
-    st.session_state["cached_product_results"] = pd.DataFrame()
-
 # 선택 상태 저장용 세션 초기화
 if "selected_products_batch" not in st.session_state:
     st.session_state["selected_products_batch"] = set()
@@ -491,6 +495,20 @@ with st.sidebar:
     if st.session_state["is_admin"]:
         page = st.sidebar.selectbox("운영관리 기능", ["Summary Board", "전략 기획", "마케팅", "공급망 관리"], key="admin_page")
 
+        # 시스템 상태 (캐시 적중률 / 커넥션 풀 / 벡터DB 지연 시간 / 이벤트 로그 적재)
+        with st.sidebar.expander("⚙️ 시스템 상태"):
+            vector_stats = vector_store_stats()
+            if vector_stats["warm_error"]:
+                st.warning(f"벡터DB 워밍업 실패: {vector_stats['warm_error']}")
+            st.json({
+                "쿼리 임베딩 캐시": embedding_cache_stats(),
+                "검색 결과 캐시": search_cache_stats(),
+                "벡터DB": vector_stats,
+                "카탈로그 캐시": catalog_stats(),
+                "DB 커넥션 풀": pool_stats(),
+                "이벤트 로그": event_log_stats(),
+            })
+
 # ────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────── #
 
     # 사용자 사이드바
@@ -501,7 +519,9 @@ with st.sidebar:
         recipe_cart = st.session_state["recipe_cart"]
         df_recipe = st.session_state["df_recipe"]
 
-        df_recipe['parsedRecipe'] = df_recipe['inputRecipe'].apply(parse_recipe)
+        # 레시피 재료 파싱 결과 / 문자열 레시피 id (레시피 테이블 버전별로 한 번만 만들어 공유)
+        df_recipe['parsedRecipe'] = parsed_recipe_column(df_recipe)
+        df_recipe['id'] = recipe_id_strings(df_recipe)
 
 
         page = st.sidebar.selectbox("일반 기능", ["메인", "AIre봇", "사용자 설정", "레시피 추천 및 장바구니"], key="user_page")
@@ -549,7 +569,7 @@ with st.sidebar:
                     for _, r in recipe_cart_df.iterrows():
                         recipe_id = r["id"]
                         recipe_name = r["name"]
-                        parsed = parse_recipe(r['inputRecipe'])
+                        parsed = r['parsedRecipe']
                         port_num = int(r["portNum"])
                         price = recipe_serving_price(st.session_state.cart, parsed, port_num)
 
@@ -644,7 +664,6 @@ with st.sidebar:
                         st.success("🎉 구매가 완료되었습니다!")
 
                         # 레시피 정보 생성
-                        df_recipe['id'] = df_recipe['id'].astype(str)
                         matched_recipes = df_recipe[df_recipe['id'].isin(recipe_cart)]
                         recipe_info = matched_recipes[['id', 'name']].to_dict(orient='records')
 
@@ -953,23 +972,10 @@ if page == "메인":
                 st.rerun()
             st.stop()
        
-        # 재료 및 레시피 검색
+        # 재료 및 레시피 검색 (모든 세션이 공유하는 검색 결과 캐시 사용, 카탈로그가 다시 로드되면 자동 무효화)
         query = st.session_state.search_query
-        if (
-            "cached_recipe_query" not in st.session_state
-            or st.session_state["cached_recipe_query"] != query
-        ):
-            st.session_state["cached_recipe_query"] = query
-            st.session_state["cached_recipe_results"] = search_similar_recipes_with_vectordb(query, model, df_recipe)
-        if (
-            "cached_product_query" not in st.session_state
-            or st.session_state["cached_product_query"] != query
-        ):
-            st.session_state["cached_product_query"] = query
-            st.session_state["cached_product_results"] = search_products(query, df_product)
-
-        product_results = st.session_state["cached_product_results"]
-        recipe_results = st.session_state["cached_recipe_results"]
+        recipe_results = search_recipes_hybrid(query, model, df_recipe)
+        product_results = search_products(query, df_product)
 
         # 검색 결과가 아무것도 없을 때
         if product_results.empty and recipe_results.empty:
@@ -1061,7 +1067,7 @@ if page == "메인":
                                     )
                                 )
                         # 레시피 정보
-                        parsed = parse_recipe(r['inputRecipe'])
+                        parsed = r['parsedRecipe'] if isinstance(r.get('parsedRecipe'), list) else parse_recipe(r['inputRecipe'])
 
                         # "재료 수량" 형태로 문자열 리스트 만들기
                         ingredients_text = ", ".join(
@@ -1106,7 +1112,9 @@ if page == "메인":
         similarity_df=df_similarity,
         user_num=int(user['userNum']),
         mode="preference",
-        selected_recipe=list(map(str, st.session_state.recipe_cart))
+        selected_recipe=list(map(str, st.session_state.recipe_cart)),
+        preference_df=st.session_state["df_preference"],
+        exception_df=st.session_state["df_similarity_exception"]
     )
 
     top3 = top3[:3]
@@ -1265,7 +1273,7 @@ elif page == "사용자 설정":
         st.header("🍽️ 알러지나 기피 식재료를 선택해 주세요 🍽️")
 
         # 제외할 재료 카테고리 목록
-        options = ["곡류", "밀가루", "과일류", "닭고기", "돼지고기", "소고기", "채소류", "해물류"]
+        options = EXCEPTION_CATEGORIES
 
         # 제외할 항목 다중 선택
         excluded = st.multiselect("🚫 제외할 재료", options)
@@ -1284,19 +1292,26 @@ elif page == "사용자 설정":
         excluded = st.session_state.excluded
         user_id = int(user['userNum'])
 
-        # 유사도 테이블 및 인코딩 테이블 생성
-        df_similarity, df_encoded = generate_similarity_table(df_recipe, selected_ids, excluded)
-        df_preference = generate_preference_table(df_encoded, selected_ids)
+        # 유사도 테이블 및 선호도 테이블 생성 (레시피 원-핫 특성은 공유 저장소 재사용)
+        df_similarity, features = generate_similarity_table(df_recipe, selected_ids, excluded)
+        df_preference = generate_preference_table(features, selected_ids)
 
         # 사용자 ID 추가
         df_similarity["userNum"] = user_id
         df_preference["userNum"] = user_id
 
-        # 결과를 Mysql 임시 테이블에 저장
-        df_similarity.to_sql("similarity_tmp", con=get_mysql_connection(), if_exists="append", index=False)
-        df_preference.to_sql("preference_tmp", con=get_mysql_connection(), if_exists="append", index=False)
+        # 결과를 Mysql 임시 테이블에 저장 (topk 저장 방식이면 상위 K개 / 제외 재료 비트맵만 바로 저장)
+        # 스냅샷 백엔드(MySQL 없이 실행)에서는 저장하지 않고 결과만 보여줌
+        if get_backend() == "snapshot":
+            st.info("스냅샷 모드에서는 설문 결과를 DB에 저장하지 않습니다.")
+        else:
+            if get_similarity_storage() == "topk":
+                write_user_top_k_similarity(df_similarity, df_recipe)
+            else:
+                df_similarity.to_sql("similarity_tmp", con=get_mysql_connection(), if_exists="append", index=False)
+            df_preference.to_sql("preference_tmp", con=get_mysql_connection(), if_exists="append", index=False)
 
-        st.success(f"✅ {user_id} 저장 완료")
+            st.success(f"✅ {user_id} 저장 완료")
 
         # 추천 결과 Top3 출력
         st.subheader("🎯 추천 결과 Top 3")
@@ -1323,8 +1338,8 @@ elif page == "레시피 추천 및 장바구니":
 
     st.header("🍽️ 레시피 추천 시스템")
 
-    # 레시피 재료명 데이터 전처리
-    df_recipe['parsedRecipe'] = df_recipe['inputRecipe'].apply(parse_recipe)
+    # 레시피 재료명 데이터 전처리 (공유 파싱 결과 재사용)
+    df_recipe['parsedRecipe'] = parsed_recipe_column(df_recipe)
     left_col, right_col = st.columns([5, 3])
 
     # 레시피 출력
@@ -1339,7 +1354,9 @@ elif page == "레시피 추천 및 장바구니":
             similarity_df=df_similarity,
             user_num=int(user['userNum']),
             mode="preference",
-            selected_recipe=selected_ids
+            selected_recipe=selected_ids,
+            preference_df=st.session_state["df_preference"],
+            exception_df=st.session_state["df_similarity_exception"]
         )
 
         # 3개만 출력
@@ -1355,7 +1372,9 @@ elif page == "레시피 추천 및 장바구니":
             similarity_df=df_similarity,
             user_num=int(user['userNum']),
             mode="basic",
-            selected_recipe=selected_ids
+            selected_recipe=selected_ids,
+            preference_df=st.session_state["df_preference"],
+            exception_df=st.session_state["df_similarity_exception"]
         )
 
         # 3개만 출력
@@ -1365,7 +1384,7 @@ elif page == "레시피 추천 및 장바구니":
         render_recipe_recommendation(cart_based_recipes, "🛒 지금 담은 재료로 만들 수 있는 레시피", "cart", df_product)
 
         # recipe_cart에 담겨있는 레시피 ID랑 df_recipe에 있는 ID랑 매치
-        selected_recipes_df = df_recipe[df_recipe['id'].astype(str).isin(recipe_cart)]
+        selected_recipes_df = df_recipe[recipe_id_strings(df_recipe).isin(recipe_cart).to_numpy()]
 
         # 장바구니에 담아있는 상품이랑 recipe_cart에 담아있는 레시피에 있는 재료로 중량 계산해서 남는 재료 도출
         remain = get_remaining_cart(st.session_state.cart, selected_recipes_df)
@@ -1382,7 +1401,9 @@ elif page == "레시피 추천 및 장바구니":
             similarity_df=df_similarity,
             user_num=int(user['userNum']),
             mode="remain",
-            selected_recipe=selected_ids
+            selected_recipe=selected_ids,
+            preference_df=st.session_state["df_preference"],
+            exception_df=st.session_state["df_similarity_exception"]
         )
 
         # 3개만 출력
@@ -1,6 +1,18 @@
 from .search import (
     search_products,
+    search_products_batch,
     search_similar_recipes,
     generate_safe_key,
     search_similar_recipes_with_vectordb
+)
+from .cache import (
+    SearchResultCache,
+    cached_search,
+    search_cache_stats,
+    clear_search_cache
+)
+from .hybrid import (
+    RecipeLexicalIndex,
+    get_recipe_lexical_index,
+    search_recipes_hybrid
 )
\ No newline at end of file
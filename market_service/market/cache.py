@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from data import catalog_version
+from vectordb.embedding import normalize_query
+
+# 검색 결과 캐시 크기 / 유효 시간(초) (환경변수 SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL로 변경 가능)
+SEARCH_CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE", 1024))
+SEARCH_CACHE_TTL = float(os.environ.get("SEARCH_CACHE_TTL", 600))
+
+
+class SearchResultCache:
+    """
+    모든 세션이 공유하는 검색 결과 LRU / TTL 캐시.
+    키는 (검색 종류, 정규화된 쿼리, 카탈로그 이름, 카탈로그 버전, 추가 키)이므로
+    상품 / 레시피 테이블이 다시 로드되면 이전 버전의 결과는 더 이상 조회되지 않고, 새 버전 결과를 넣을 때 함께 지워진다.
+    (버전은 증가만 하므로, 늦게 끝난 이전 버전 계산 결과는 저장하지 않고 버린다.)
+    같은 키를 여러 세션이 동시에 조회하면 한 번만 계산하고 나머지는 그 결과를 사용한다.
+
+    Args:
+        maxsize: 최대 결과 수
+        ttl: 결과 유효 시간(초, None이면 만료 없음)
+    """
+
+    def __init__(self, maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._versions = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key, compute, is_current=None):
+        """
+        캐시된 결과를 반환하고, 없거나 만료되었으면 compute()로 계산해 저장하는 함수.
+
+        Args:
+            key: (검색 종류, 쿼리, 카탈로그 이름, 카탈로그 버전, ...) 튜플
+            compute: 인자 없이 결과를 계산하는 함수
+            is_current: 계산이 끝난 뒤 key의 카탈로그 버전이 아직 최신인지 확인하는 함수 (False면 저장하지 않음)
+
+        Returns:
+            compute()의 결과 (캐시된 값일 수 있음)
+        """
+        found, value = self._get(key)
+        if found:
+            return value
+
+        # 같은 키는 한 번만 계산 (먼저 들어온 세션이 계산하는 동안 나머지는 대기 후 캐시 사용)
+        with self._lock:
+            flight = self._inflight.setdefault(key, threading.Lock())
+        try:
+            with flight:
+                found, value = self._get(key, count=False)
+                if found:
+                    with self._lock:
+                        self.hits += 1
+                    return value
+
+                value = compute()
+                current = is_current is None or is_current()
+                with self._lock:
+                    self.misses += 1
+                    if current:
+                        self._put(key, value)
+                return value
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+
+    def _get(self, key, count=True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                return False, None
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return True, value
+
+    def _put(self, key, value):
+        catalog, version = key[2], key[3]
+        latest = self._versions.get(catalog)
+
+        # 이미 더 새 버전 결과가 있으면 늦게 끝난 이전 버전 결과는 버림
+        if latest is not None and version < latest:
+            return
+
+        # 카탈로그가 새 버전으로 바뀌었으면 이전 버전 결과 제거
+        if latest is not None and version > latest:
+            stale = [k for k in self._entries if k[2] == catalog and k[3] < version]
+            for k in stale:
+                del self._entries[k]
+            self.invalidations += len(stale)
+        self._versions[catalog] = version
+
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """
+        캐시 적중/미스 통계를 반환하는 함수.
+        """
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache():
+    """
+    프로세스 전체에서 공유하는 검색 결과 캐시를 반환하는 함수.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SearchResultCache()
+    return _cache
+
+
+def cached_search(kind, query, df, compute, *extra):
+    """
+    공유 캐시를 거쳐 검색 결과를 반환하는 함수.
+    카탈로그에서 오지 않은 데이터프레임(버전을 알 수 없음)이면 캐시 없이 바로 계산한다.
+    계산하는 동안 카탈로그가 다시 로드되었으면 결과는 반환만 하고 캐시에는 넣지 않는다.
+    반환된 데이터프레임은 얕은 복사본이므로 컬럼을 추가/변경해도 캐시된 결과에는 영향이 없다.
+
+    Args:
+        kind: 검색 종류 ("product", "recipe" 등)
+        query: 사용자 검색어 (정규화해서 키로 사용)
+        df: 검색 대상 카탈로그 데이터프레임
+        compute: 인자 없이 결과 데이터프레임을 계산하는 함수
+        extra: 결과에 영향을 주는 추가 키 (top_n 등)
+
+    Returns:
+        pd.DataFrame
+    """
+    version = catalog_version(df)
+    if version is None:
+        return compute()
+
+    key = (kind, normalize_query(query)) + version + extra
+    return get_search_cache().get_or_compute(
+        key, compute, lambda: catalog_version(df) == version
+    ).copy(deep=False)
+
+
+def search_cache_stats():
+    """
+    공유 검색 결과 캐시의 적중/미스 통계를 반환하는 함수.
+    """
+    return get_search_cache().stats()
+
+
+def clear_search_cache():
+    get_search_cache().clear()
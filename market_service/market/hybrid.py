@@ -0,0 +1,185 @@
+import re
+import unicodedata
+from collections import Counter
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from data import cached_derived
+from vectordb import get_vector_store, encode_query
+from .cache import cached_search
+
+# 어휘 검색 필드와 가중치 (레시피 이름 일치를 재료 언급보다 크게 반영)
+LEXICAL_FIELDS = {"name": 3.0, "ingredient": 1.0, "inputRecipe": 1.0}
+
+# BM25 파라미터
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 순위 융합(RRF) 상수 / 각 검색기에서 융합에 넣을 후보 수
+RRF_K = 60
+LEXICAL_CANDIDATES = 30
+VECTOR_CANDIDATES = 30
+
+# 수량 / 기호를 뺀 한글 / 영문 단어만 토큰으로 사용
+_WORD = re.compile(r"[가-힣a-z]+")
+
+
+def _normalize(text):
+    return unicodedata.normalize("NFC", text).lower() if isinstance(text, str) else ""
+
+
+def _ngrams(text):
+    """
+    정규화된 문자열의 문자 n-gram 목록. (단어별 bigram, 한 글자 단어는 그대로)
+    """
+    grams = []
+    for word in _WORD.findall(text):
+        if len(word) == 1:
+            grams.append(word)
+        else:
+            grams.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return grams
+
+
+def _name_key(text):
+    # 레시피 이름 완전 일치 비교용 (공백 무시)
+    return "".join(_normalize(text).split())
+
+
+class RecipeLexicalIndex:
+    """
+    레시피 이름 / 대표 재료 / 재료 목록(inputRecipe)에 대한 문자 bigram BM25 색인.
+    필드별 BM25 가중치를 LEXICAL_FIELDS 비율로 더한 (n-gram × 레시피) 희소 행렬을 미리 만들어 두고,
+    쿼리는 쿼리 n-gram 행들의 합 한 번으로 점수를 계산한다.
+
+    Args:
+        recipe_df: 레시피 데이터프레임 (id, name, ingredient, inputRecipe 컬럼 필수)
+    """
+
+    def __init__(self, recipe_df):
+        self.size = len(recipe_df)
+
+        # 1. 필드별 n-gram 빈도
+        vocabulary = {}
+        fields = {}
+        for field in LEXICAL_FIELDS:
+            rows, cols, counts = [], [], []
+            for pos, value in enumerate(recipe_df[field]):
+                for gram, count in Counter(_ngrams(_normalize(value))).items():
+                    rows.append(pos)
+                    cols.append(vocabulary.setdefault(gram, len(vocabulary)))
+                    counts.append(count)
+            fields[field] = (rows, cols, counts)
+        self.vocabulary = vocabulary
+
+        # 2. 문서 빈도는 어느 필드에든 n-gram이 있는 레시피 수
+        shape = (self.size, len(vocabulary))
+        tf = {
+            field: csr_matrix((np.array(counts, dtype=np.float64), (rows, cols)), shape=shape)
+            for field, (rows, cols, counts) in fields.items()
+        }
+        presence = sum(matrix for matrix in tf.values())
+        df = np.bincount(presence.indices, minlength=len(vocabulary))
+        idf = np.log(1 + (self.size - df + 0.5) / (df + 0.5))
+
+        # 3. 필드별 BM25 가중치 합 (길이 정규화는 필드마다 따로)
+        weights = csr_matrix(shape, dtype=np.float64)
+        for field, matrix in tf.items():
+            lengths = np.asarray(matrix.sum(axis=1)).ravel()
+            average = lengths.mean() if lengths.any() else 1.0
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average)
+            matrix = matrix.tocoo()
+            values = idf[matrix.col] * matrix.data * (BM25_K1 + 1) / (matrix.data + norm[matrix.row])
+            weights = weights + LEXICAL_FIELDS[field] * csr_matrix((values, (matrix.row, matrix.col)), shape=shape)
+        self.weights = weights.T.tocsr()
+
+        # 4. 레시피 이름 완전 일치 / id → 행 위치 (첫 번째 행)
+        self.names = {}
+        for pos, name in enumerate(recipe_df["name"]):
+            self.names.setdefault(_name_key(name), []).append(pos)
+        self.positions = {}
+        for pos, recipe_id in enumerate(recipe_df["id"]):
+            self.positions.setdefault(int(recipe_id), pos)
+
+    def search(self, query, k=LEXICAL_CANDIDATES):
+        """
+        쿼리의 BM25 상위 k개 레시피 행 위치를 반환하는 함수.
+        이름이 쿼리와 완전히 같은 레시피는 점수와 관계없이 맨 앞에 온다.
+
+        Returns:
+            (행 위치 배열, 이름 완전 일치 행 위치 집합) 튜플
+        """
+        exact = self.names.get(_name_key(query), [])
+        rows = [self.vocabulary[gram] for gram in set(_ngrams(_normalize(query))) if gram in self.vocabulary]
+        if not rows:
+            return np.array(exact, dtype=np.int64), set(exact)
+
+        scores = np.asarray(self.weights[rows].sum(axis=0)).ravel()
+        scores[exact] = np.inf
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        order = np.lexsort((matched, -scores[matched]))
+        return matched[order], set(exact)
+
+
+def get_recipe_lexical_index(recipe_df):
+    """
+    레시피 데이터프레임에 대한 RecipeLexicalIndex를 반환하는 함수. (레시피 테이블 버전별로 한 번만 생성)
+    """
+    return cached_derived(recipe_df, "recipe_lexical_index", RecipeLexicalIndex)
+
+
+def search_recipes_hybrid(query, model, recipe_df, top_n=8):
+    """
+    어휘(BM25 n-gram) 검색과 벡터 검색 결과를 순위 융합(RRF)해 레시피를 검색하는 함수.
+    쿼리 한 번에 미리 만든 어휘 색인 조회 한 번 + 벡터 검색 한 번만 수행한다.
+    이름이 쿼리와 완전히 같은 레시피("김치찌개" 등)는 항상 맨 앞에 온다.
+
+    Args:
+        query: 사용자 검색어 (str)
+        model: 쿼리 임베딩 모델 (SentenceTransformer)
+        recipe_df: 레시피 데이터프레임
+        top_n: 반환할 레시피 수
+
+    Returns:
+        pd.DataFrame: 레시피 행 + score(RRF 점수), similarity(벡터 유사도, 벡터 후보가 아니면 NaN) 컬럼
+    """
+    # 모든 세션이 공유하는 결과 캐시 (정규화된 쿼리 + 레시피 테이블 버전 + 벡터 검색 백엔드 기준)
+    store = get_vector_store()
+    return cached_search(
+        "recipe", query, recipe_df,
+        lambda: _search_recipes_hybrid(query, model, recipe_df, top_n, store),
+        store.backend, store.path, store.collection_name, top_n
+    )
+
+
+def _search_recipes_hybrid(query, model, recipe_df, top_n, store):
+    index = get_recipe_lexical_index(recipe_df)
+
+    # 1. 어휘 후보 (미리 만든 BM25 색인)
+    lexical, exact = index.search(query, LEXICAL_CANDIDATES)
+
+    # 2. 벡터 후보 (공유 벡터 검색 핸들, 쿼리 임베딩은 캐시 사용)
+    result = store.query(
+        query_embeddings=[encode_query(model, query).tolist()], n_results=VECTOR_CANDIDATES
+    )
+    vector, similarity = [], {}
+    for meta, distance in zip(result["metadatas"][0], result["distances"][0]):
+        pos = index.positions.get(int(meta["id"]))
+        if pos is not None and pos not in similarity:
+            vector.append(pos)
+            similarity[pos] = 1 - distance
+
+    # 3. RRF: 각 목록의 순위 r마다 1 / (RRF_K + r)를 더함
+    scores = {}
+    for ranking in (lexical, vector):
+        for rank, pos in enumerate(ranking, start=1):
+            scores[int(pos)] = scores.get(int(pos), 0.0) + 1.0 / (RRF_K + rank)
+
+    ranked = sorted(scores, key=lambda pos: (pos not in exact, -scores[pos], pos))[:top_n]
+    return recipe_df.iloc[ranked].assign(
+        score=[scores[pos] for pos in ranked],
+        similarity=[similarity.get(pos, np.nan) for pos in ranked]
+    )
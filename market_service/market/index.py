@@ -0,0 +1,128 @@
+from collections import defaultdict
+
+import numpy as np
+
+from data import cached_derived
+from vectordb.embedding import normalize_query
+
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+class _NgramIndex:
+    """
+    문자열 컬럼에 대한 문자 n-gram 역색인.
+    1글자 질의는 unigram, 2글자 이상은 bigram posting을 교집합한 뒤 실제 포함 여부를 확인한다.
+    """
+
+    def __init__(self, values):
+        # NaN 등 문자열이 아닌 값은 str.contains(na=False)처럼 절대 매칭되지 않음
+        self.texts = [v if isinstance(v, str) else None for v in values]
+        self.valid = np.array([i for i, t in enumerate(self.texts) if t is not None], dtype=np.int32)
+
+        unigrams = defaultdict(list)
+        bigrams = defaultdict(list)
+        for pos, text in enumerate(self.texts):
+            if text is None:
+                continue
+            for ch in set(text):
+                unigrams[ch].append(pos)
+            for gram in {text[i:i + 2] for i in range(len(text) - 1)}:
+                bigrams[gram].append(pos)
+
+        self.unigrams = {k: np.array(v, dtype=np.int32) for k, v in unigrams.items()}
+        self.bigrams = {k: np.array(v, dtype=np.int32) for k, v in bigrams.items()}
+
+    def search(self, query):
+        """
+        query를 부분 문자열로 포함하는 행 위치를 오름차순으로 반환.
+        """
+        if not query:
+            return self.valid
+        if len(query) == 1:
+            return self.unigrams.get(query, _EMPTY)
+
+        # 1. 질의의 모든 bigram posting 교집합 (가장 짧은 posting부터)
+        postings = []
+        for gram in {query[i:i + 2] for i in range(len(query) - 1)}:
+            posting = self.bigrams.get(gram)
+            if posting is None:
+                return _EMPTY
+            postings.append(posting)
+        postings.sort(key=len)
+
+        candidates = postings[0]
+        for posting in postings[1:]:
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+            if not candidates.size:
+                return _EMPTY
+
+        # 2. bigram이 모두 있어도 연속하지 않을 수 있으므로 실제 포함 여부 확인
+        if len(query) == 2:
+            return candidates
+        return np.array([pos for pos in candidates if query in self.texts[pos]], dtype=np.int32)
+
+
+class ProductIndex:
+    """
+    search_products()용 상품 역색인.
+    category는 '/'로 나눈 각 부분의 완전 일치, division / name은 문자 n-gram 부분 문자열 검색을 지원한다.
+
+    Args:
+        df: 상품 데이터프레임 (category, division, name 컬럼 필수)
+    """
+
+    def __init__(self, df):
+        self.size = len(df)
+
+        category = defaultdict(list)
+        for pos, value in enumerate(df['category'].fillna('')):
+            for part in set(value.split('/')):
+                category[part].append(pos)
+        self.category = {k: np.array(v, dtype=np.int32) for k, v in category.items()}
+
+        self.division = _NgramIndex(df['division'])
+        self.name = _NgramIndex(df['name'])
+
+    def lookup(self, query):
+        """
+        기존 search_products()와 같은 규칙(category → division → name 순)으로 매칭된 행 위치를 반환하는 함수.
+        쿼리는 먼저 정규화(유니코드 NFC + 공백 정리)하므로 단건 / 일괄 검색 모두 같은 결과를 얻는다.
+
+        Args:
+            query: 사용자 입력 검색어 (str)
+
+        Returns:
+            검색 결과 행 위치 배열 (np.ndarray, 결과 순서대로)
+        """
+        query = normalize_query(query)
+
+        # category 검색: '/'로 분할한 부분과 '완전 일치'
+        cat_pos = self.category.get(query, _EMPTY)
+
+        # 쿼리가 한 글자인지 확인
+        is_single_char = len(query) == 1
+
+        # category 매칭 결과가 없으면 division 검색
+        first = cat_pos if cat_pos.size else self.division.search(query)
+
+        # 쿼리가 한 글자이면 name 검색은 생략
+        if is_single_char:
+            return first
+
+        # name 검색 / 이미 앞 단계에서 매칭된 건 제외
+        name_pos = np.setdiff1d(self.name.search(query), first, assume_unique=True)
+        return np.concatenate([first, name_pos])
+
+
+def get_product_index(df):
+    """
+    상품 데이터프레임에 대한 ProductIndex를 반환하는 함수.
+    상품 테이블이 다시 로드되어 버전이 바뀐 경우에만 색인을 새로 만든다.
+
+    Args:
+        df: 상품 데이터프레임
+
+    Returns:
+        ProductIndex
+    """
+    return cached_derived(df, "product_index", ProductIndex)
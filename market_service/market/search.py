@@ -1,8 +1,8 @@
 import pandas as pd
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import hashlib
-from chromadb import PersistentClient
+from vectordb import get_vector_store, encode_query, load_embedding_model, get_title_embeddings, top_k_titles
+from .index import get_product_index
+from .cache import cached_search
 
 def search_products(query, df):
 
@@ -18,54 +18,44 @@ def search_products(query, df):
         검색 결과에 해당하는 데이터프레임 (DataFrame)
     """
 
-    # category 검색: '/'로 분할해서 query와 '완전 일치'하는 항목 찾기
-    mask_cat = df['category'].fillna('').apply(lambda s: query in s.split('/'))
-    cat_df = df[mask_cat]
-
-    # 쿼리가 한 글자인지 확인
-    is_single_char = len(query) == 1
-
-    # category 매칭 결과가 존재할 경우
-    if not cat_df.empty:
-
-        # 쿼리가 한 글자이면 name 검색은 생략
-        if is_single_char:
-            return cat_df.reset_index(drop=True)
-        
-        # 쿼리가 한 글자 이상이면 name 검색 / 이미 category로 매칭된 건 제외
-        else:
-            mask_name = (
-                df['name'].str.contains(query, na=False)
-                & ~mask_cat
-            )
-            name_df = df[mask_name]
-
-            # category + name 매칭 결과 합치기
-            return pd.concat([cat_df, name_df], ignore_index=True)
-
-    # category 매칭 결과가 존재하지 않을 경우(division 검색)
-    else:
-        mask_div = df['division'].str.contains(query, na=False)
-        div_df = df[mask_div]
-
-        # 쿼리가 한 글자이면 name 검색은 생략
-        if is_single_char:
-            return div_df.reset_index(drop=True)
-        
-        # 쿼리가 한 글자 이상이면 name 검색 / 이미 division으로 매칭된 건 제외
-        else:
-            mask_name = (
-                df['name'].str.contains(query, na=False)
-                & ~mask_div
-            )
-            name_df = df[mask_name]
-
-            # division + name 매칭 결과 합치기
-            return pd.concat([div_df, name_df], ignore_index=True)
-        
-
-
-def search_similar_recipes(query, df, top_n=8):
+    # 사전 구축된 상품 색인으로 category → division → name 순 매칭 (상품 테이블이 바뀔 때만 재구축)
+    def compute():
+        positions = get_product_index(df).lookup(query)
+        return df.iloc[positions].reset_index(drop=True)
+
+    # 모든 세션이 공유하는 결과 캐시 (정규화된 쿼리 + 상품 테이블 버전 기준)
+    return cached_search("product", query, df, compute)
+
+
+def search_products_batch(ingredients, df, limit=None):
+
+    """
+    여러 재료명을 한 번에 검색해 재료별 상품 id 목록을 반환하는 함수.
+    레시피 한 개의 부족한 재료 전체를 상품 색인 한 번으로 조회할 때 사용한다.
+
+    Args:
+        ingredients: 재료명 리스트 (list[str], 중복 가능)
+        df: 상품 데이터프레임 (DataFrame)
+        limit: 재료별 최대 상품 수 (None이면 전체)
+
+    Returns:
+        {재료명: [상품 id(df의 index), ...]} 딕셔너리 (search_products()와 같은 순위)
+    """
+
+    # 상품 색인은 한 번만 조회
+    index = get_product_index(df)
+
+    results = {}
+    for ingredient in ingredients:
+        if ingredient in results:
+            continue
+        positions = index.lookup(ingredient)[:limit]
+        results[ingredient] = df.index[positions].tolist()
+
+    return results
+
+
+def search_similar_recipes(query, df, top_n=8, model=None):
 
     """
     사용자 쿼리(query)와 레시피 이름들(df['name']) 간의 의미적 유사도를 계산해
@@ -75,41 +65,36 @@ def search_similar_recipes(query, df, top_n=8):
         query (str): 사용자가 입력한 검색 문장 또는 키워드
         df (pd.DataFrame): 레시피 데이터프레임 (name 컬럼 필수)
         top_n (int, optional): 반환할 유사 레시피 개수 (기본값: 8)
+        model (SentenceTransformer, optional): 임베딩 모델 (없으면 공유 모델 사용)
 
     Returns:
         pd.DataFrame: 유사도 상위 N개의 레시피 + similarity 컬럼 포함
     """
 
-    # 한국어 SBERT 임베딩 모델 로드
-    model = SentenceTransformer('snunlp/KR-SBERT-V40K-klueNLI-augSTS', device='cpu')
-
-    # 레시피 제목 리스트 생성
-    titles = df['name'].fillna("").tolist()
+    # 한국어 SBERT 임베딩 모델 (프로세스당 한 번만 로드)
+    if model is None:
+        model = load_embedding_model()
 
-    # 문장 임베딩 생성
-    embeddings = model.encode([query] + titles, convert_to_tensor=True)
+    # 레시피 제목 임베딩 행렬 (디스크에 저장된 행렬을 메모리 맵으로 사용, 레시피 테이블이 바뀔 때만 재생성)
+    title_matrix = get_title_embeddings(df, model)
 
-    # 코사인 유사도 계산
-    cos_sim = cosine_similarity(
-        embeddings[0].unsqueeze(0).cpu().numpy(),
-        embeddings[1:].cpu().numpy()
-    ).flatten()
+    # 쿼리 임베딩 생성 (캐시에 있으면 모델 forward 생략)
+    query_vector = encode_query(model, query)
 
-    # 유사도 기준 내림차순 상위 N개 인덱스 추출
-    top_indices = cos_sim.argsort()[::-1][:top_n]
+    # 코사인 유사도 상위 N개 추출 (행렬-벡터 곱 + argpartition)
+    top_indices, scores = top_k_titles(title_matrix, query_vector, top_n)
 
     # 상위 레시피 반환, 유사도 점수열 추가
-    return df.iloc[top_indices].assign(similarity=cos_sim[top_indices])
+    return df.iloc[top_indices].assign(similarity=scores)
 
 
 def search_similar_recipes_with_vectordb(query, model, recipe_df, top_n=8):
-    # ChromaDB 연결
-    client = PersistentClient(path="C:/Users/Admin/workspace/market_service/vectordb/chroma_db")
-    collection = client.get_collection(name="recipes_kr_sbert")
+    # 공유 벡터 검색 핸들 (VECTOR_BACKEND: ChromaDB 또는 로컬 ANN 인덱스, 프로세스당 한 번만 열림)
+    store = get_vector_store()
 
-    # 쿼리 임베딩 생성
-    query_embedding = model.encode([query]).tolist()
-    result = collection.query(query_embeddings=query_embedding, n_results=top_n)
+    # 쿼리 임베딩 생성 (캐시에 있으면 모델 forward 생략)
+    query_embedding = [encode_query(model, query).tolist()]
+    result = store.query(query_embeddings=query_embedding, n_results=top_n)
 
     # 메타데이터 + 유사도 DataFrame 생성
     metadatas = result["metadatas"][0]
@@ -120,8 +105,9 @@ def search_similar_recipes_with_vectordb(query, model, recipe_df, top_n=8):
     df["id"] = df["id"].astype(int)
     recipe_df["id"] = recipe_df["id"].astype(int)
 
-    # 이미지 URL 병합 (id 기준)
-    df = df.merge(recipe_df[["id", "imgUrl", "inputRecipe", "time"]], on="id", how="left")
+    # 이미지 URL 병합 (id 기준, 미리 파싱된 parsedRecipe가 있으면 함께 병합)
+    columns = [col for col in ["id", "imgUrl", "inputRecipe", "time", "parsedRecipe"] if col in recipe_df]
+    df = df.merge(recipe_df[columns], on="id", how="left")
 
     return df
 
@@ -1,4 +1,5 @@
 from .preference import (
     generate_similarity_table,
     generate_preference_table,
-)
\ No newline at end of file
+)
+from .features import RecipeFeatureStore, get_feature_store
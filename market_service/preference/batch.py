@@ -0,0 +1,452 @@
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from .features import FEATURE_COLUMNS, get_feature_store
+
+# 청크 하나가 사용할 메모리 예산 (바이트) / 사용자 × 레시피 원소 하나당 메모리
+# (점수 계산 중간 행렬 dots / denominator / scores float64 + 예외 bool 등, 레시피 200개면 청크당 약 5000명)
+BATCH_MEMORY_BYTES = 32 * 1024 * 1024
+BATCH_CELL_BYTES = 32
+
+# 병렬 계산 시 워커당 동시에 대기시킬 청크 수 (결과가 쓰기보다 빨리 쌓이지 않도록)
+BATCH_PREFETCH = 2
+
+# 전체 재계산 결과를 쓸 similarity 테이블 컬럼
+SIMILARITY_COLUMNS = ["userNum", "id", "name", "similarity", "exception", "partitionDate"]
+
+# 대량 쓰기 배치 크기 (executemany 한 번에 보낼 행 수)
+WRITE_BATCH_SIZE = 5000
+
+
+def build_profiles(features, interactions):
+    """
+    사용자별 프로필 벡터(상호작용한 레시피 특성의 가중 평균)를 쌓은 행렬을 만드는 함수.
+    온보딩의 user_vector()(선택한 레시피 특성 평균)를 사용자 전체로 확장한 것이다.
+
+    Args:
+        features: RecipeFeatureStore
+        interactions: userNum, id 컬럼(선택: weight)을 가진 데이터프레임
+                      (특성 저장소에 없는 레시피 / 가중치 합이 0 이하인 사용자는 제외)
+
+    Returns:
+        (사용자 번호 배열, 사용자 × 특성 프로필 행렬(dense float64)) 튜플
+    """
+    rows = pd.Series(np.arange(len(features)), index=features.ids)
+    rows = rows[~rows.index.duplicated()]
+
+    recipe_rows = rows.reindex(pd.to_numeric(interactions["id"], errors="coerce")).to_numpy()
+    weights = (
+        pd.to_numeric(interactions["weight"], errors="coerce").to_numpy(dtype=np.float64)
+        if "weight" in interactions else np.ones(len(interactions))
+    )
+    valid = ~np.isnan(recipe_rows) & ~np.isnan(weights)
+
+    user_codes, user_nums = pd.factorize(interactions["userNum"][valid], sort=True)
+    weight_matrix = csr_matrix(
+        (weights[valid], (user_codes, recipe_rows[valid].astype(np.int64))),
+        shape=(len(user_nums), len(features))
+    )
+
+    # 가중치 합으로 나눠 평균 (같은 사용자-레시피 쌍이 여러 번 있으면 가중치 합산)
+    totals = np.asarray(weight_matrix.sum(axis=1)).ravel()
+    keep = totals > 0
+    profiles = np.asarray((weight_matrix[keep] @ features.matrix).todense()) / totals[keep, None]
+    return np.asarray(user_nums)[keep], profiles
+
+
+def score_profiles(features, profiles):
+    """
+    프로필 행렬과 전체 레시피의 코사인 유사도 행렬을 계산하는 함수. (희소 행렬 × 밀집 행렬 곱 한 번)
+
+    Returns:
+        사용자 × 레시피 유사도 행렬 (float64, norm이 0이면 0)
+    """
+    dots = (features.matrix @ profiles.T).T
+    denominator = np.outer(np.linalg.norm(profiles, axis=1), features.norms)
+    scores = np.zeros_like(dots)
+    np.divide(dots, denominator, out=scores, where=denominator > 0)
+    return scores
+
+
+# 프로세스 풀 워커에 한 번만 전달되는 특성 저장소
+_worker_features = None
+
+
+def _init_worker(features):
+    global _worker_features
+    _worker_features = features
+
+
+def _score_worker(profiles):
+    return score_profiles(_worker_features, profiles)
+
+
+def batch_chunk_size(n_recipes):
+    """
+    청크 메모리가 BATCH_MEMORY_BYTES를 넘지 않는 청크당 사용자 수. (사용자 한 명 = 레시피 수 × BATCH_CELL_BYTES)
+    """
+    return max(1, BATCH_MEMORY_BYTES // (max(n_recipes, 1) * BATCH_CELL_BYTES))
+
+
+def iter_similarity_chunks(features, profiles, chunk_size=None, workers=1):
+    """
+    사용자 청크 단위로 유사도 행렬을 계산해 순서대로 내보내는 함수.
+    workers가 2 이상이면 프로세스 풀에서 계산하며, 대기 중인 청크는 workers × BATCH_PREFETCH개로 제한한다.
+
+    Args:
+        features: RecipeFeatureStore
+        profiles: build_profiles()의 프로필 행렬
+        chunk_size: 청크당 사용자 수 (기본값: batch_chunk_size())
+        workers: 계산 프로세스 수
+
+    Yields:
+        (시작 사용자 위치, 청크 사용자 × 레시피 유사도 행렬)
+    """
+    chunk_size = chunk_size or batch_chunk_size(len(features))
+    starts = range(0, len(profiles), chunk_size)
+
+    if workers <= 1:
+        for start in starts:
+            yield start, score_profiles(features, profiles[start:start + chunk_size])
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(features,)) as executor:
+        pending = deque()
+        for start in starts:
+            pending.append((start, executor.submit(_score_worker, profiles[start:start + chunk_size])))
+            if len(pending) >= workers * BATCH_PREFETCH:
+                first, future = pending.popleft()
+                yield first, future.result()
+        while pending:
+            first, future = pending.popleft()
+            yield first, future.result()
+
+
+def exception_matrix(features, user_nums, exceptions):
+    """
+    (사용자, 레시피) 예외 여부를 사용자 × 레시피 희소 bool 행렬로 만드는 함수.
+
+    Args:
+        exceptions: 예외인 userNum, id 쌍을 가진 데이터프레임 (None이면 예외 없음)
+    """
+    shape = (len(user_nums), len(features))
+    if exceptions is None or exceptions.empty:
+        return csr_matrix(shape, dtype=bool)
+
+    users = pd.Series(np.arange(len(user_nums)), index=user_nums)
+    users = users[~users.index.duplicated()]
+    recipes = pd.Series(np.arange(len(features)), index=features.ids)
+    recipes = recipes[~recipes.index.duplicated()]
+
+    user_rows = users.reindex(pd.to_numeric(exceptions["userNum"], errors="coerce")).to_numpy()
+    recipe_cols = recipes.reindex(pd.to_numeric(exceptions["id"], errors="coerce")).to_numpy()
+    valid = ~np.isnan(user_rows) & ~np.isnan(recipe_cols)
+    return csr_matrix(
+        (np.ones(valid.sum(), dtype=bool), (user_rows[valid].astype(np.int64), recipe_cols[valid].astype(np.int64))),
+        shape=shape
+    )
+
+
+def iter_similarity_rows(features, user_nums, scores, exceptions, partition_date, batch_size=WRITE_BATCH_SIZE):
+    """
+    청크 유사도 행렬을 similarity 테이블 행(SIMILARITY_COLUMNS 순서)으로 펼쳐 batch_size행 안팎씩 내보내는 함수.
+    청크 전체를 한 번에 튜플로 만들지 않으므로, 파이썬 객체는 배치 하나 분량만 메모리에 있다.
+
+    Yields:
+        행 튜플 목록 (사용자 단위로 끊으며, 사용자 한 명의 행은 항상 같은 배치)
+    """
+    n_users, n_recipes = scores.shape
+    users_per_batch = max(1, batch_size // max(n_recipes, 1))
+    user_nums = np.asarray(user_nums, dtype=np.int64)
+    recipe_ids = features.ids.tolist()
+
+    for start in range(0, n_users, users_per_batch):
+        end = min(start + users_per_batch, n_users)
+        count = end - start
+        yield list(zip(
+            np.repeat(user_nums[start:end], n_recipes).tolist(),
+            recipe_ids * count,
+            features.names * count,
+            scores[start:end].ravel().tolist(),
+            exceptions[start:end].toarray().ravel().astype(np.int8).tolist(),
+            [partition_date] * (count * n_recipes),
+        ))
+
+
+def top_k_rows(features, user_nums, scores, exceptions, k, partition_date):
+    """
+    청크 유사도 행렬에서 사용자별 상위 k개(예외 레시피 제외)만 similarity_topk 행 목록으로 만드는 함수.
+    """
+    n_users, n_recipes = scores.shape
+    k = min(k, n_recipes)
+    if n_users == 0 or k == 0:
+        return []
+
+    scores = np.where(exceptions.toarray(), -np.inf, scores)
+
+    # 사용자별 k번째로 큰 유사도 이상인 후보만 정렬 (유사도 내림차순, 같으면 레시피 id 순)
+    thresholds = np.partition(scores, n_recipes - k, axis=1)[:, n_recipes - k]
+    rows = []
+    for user, row_scores, threshold in zip(np.asarray(user_nums, dtype=np.int64).tolist(), scores, thresholds):
+        candidates = np.flatnonzero(row_scores >= threshold)
+        candidates = candidates[np.lexsort((features.ids[candidates], -row_scores[candidates]))][:k]
+        for pos in candidates.tolist():
+            if row_scores[pos] != -np.inf:
+                rows.append((user, int(features.ids[pos]), features.names[pos], float(row_scores[pos]), partition_date))
+    return rows
+
+
+def rebuild_similarity(recipe_df, interactions, write, exceptions=None, partition_date=None,
+                       chunk_size=None, workers=1, top_k=None, batch_size=WRITE_BATCH_SIZE):
+    """
+    전체 사용자 × 레시피 similarity를 한 번에 다시 계산하는 함수.
+    사용자 청크마다 유사도 행렬을 계산해 batch_size행 안팎의 배치로 write(rows)에 넘기므로,
+    메모리는 청크 행렬(BATCH_MEMORY_BYTES) + 행 배치 하나만큼만 사용한다.
+
+    Args:
+        recipe_df: 레시피 데이터프레임 (id, name, style, instruction, ingredient 컬럼 필수)
+        interactions: 프로필을 만들 userNum, id(, weight) 데이터프레임
+        write: SIMILARITY_COLUMNS(top_k가 있으면 TOP_K_SIMILARITY_COLUMNS) 순서의 행 목록을 받아 저장하는 함수
+               (배치마다 한 번씩 호출)
+        exceptions: 예외 userNum, id 쌍 데이터프레임 (기존 similarity의 exception 유지용)
+        partition_date: partitionDate 값 (기본값: 오늘)
+        chunk_size: 청크당 사용자 수
+        workers: 계산 프로세스 수
+        top_k: 사용자당 상위 k개만 내보내기 (None이면 사용자 × 레시피 전체)
+        batch_size: write() 한 번에 넘길 행 수 (사용자 단위로 끊으므로 대략적인 값)
+
+    Returns:
+        dict: 재계산한 사용자 번호(user_nums), 사용자 수, 행 수, 단계별 소요 시간(초)
+    """
+    partition_date = partition_date or date.today().strftime("%Y-%m-%d")
+    stats = {"users": 0, "rows": 0, "profile_seconds": 0.0, "score_seconds": 0.0, "write_seconds": 0.0}
+
+    started = time.perf_counter()
+    features = get_feature_store(recipe_df)
+    user_nums, profiles = build_profiles(features, interactions)
+    excluded = exception_matrix(features, user_nums, exceptions)
+    stats["user_nums"] = user_nums
+    stats["users"] = len(user_nums)
+    stats["profile_seconds"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for start, scores in iter_similarity_chunks(features, profiles, chunk_size, workers):
+        end = start + len(scores)
+        computed = time.perf_counter()
+        stats["score_seconds"] += computed - started
+
+        if top_k:
+            top_rows = top_k_rows(features, user_nums[start:end], scores, excluded[start:end], top_k, partition_date)
+            batches = [top_rows[i:i + batch_size] for i in range(0, len(top_rows), batch_size)]
+        else:
+            batches = iter_similarity_rows(
+                features, user_nums[start:end], scores, excluded[start:end], partition_date, batch_size
+            )
+        for rows in batches:
+            write(rows)
+            stats["rows"] += len(rows)
+
+        started = time.perf_counter()
+        stats["write_seconds"] += started - computed
+    return stats
+
+
+def score_user(recipe_df, interactions, k=None):
+    """
+    저장된 similarity가 없는 사용자(cold)의 레시피 유사도를 바로 계산하는 함수.
+
+    Args:
+        recipe_df: 레시피 데이터프레임
+        interactions: 해당 사용자의 userNum, id(, weight) 데이터프레임
+        k: 반환할 레시피 수 (None이면 전체)
+
+    Returns:
+        (레시피 id 배열, 유사도 배열) 튜플, 유사도 내림차순 (프로필을 만들 수 없으면 빈 배열)
+    """
+    features = get_feature_store(recipe_df)
+    user_nums, profiles = build_profiles(features, interactions)
+    if len(user_nums) == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+
+    scores = score_profiles(features, profiles[:1])[0]
+    order = np.lexsort((features.ids, -scores))[:k]
+    return features.ids[order], scores[order]
+
+
+def preference_interactions(preference_df):
+    """
+    선호도 테이블을 프로필 입력으로 바꾸는 함수. (가중치 = 세 선호도 점수의 평균, 야간 작업의 similarity와 같은 값)
+    """
+    return pd.DataFrame({
+        "userNum": pd.to_numeric(preference_df["userNum"], errors="coerce"),
+        "id": preference_df["id"],
+        "weight": preference_df[FEATURE_COLUMNS].astype(float).mean(axis=1),
+    }).dropna(subset=["userNum"])
+
+
+class StagingWriter:
+    """
+    similarity 결과를 {table}_staging 테이블에 배치 단위로 적재하고, 끝나면 이름 교체로 한 번에 바꾸는 writer.
+    교체 전까지 기존 테이블은 그대로 남아 있어, 재계산 중에도 읽는 쪽에서 빈 테이블을 보지 않는다.
+
+    Args:
+        conn: DB-API 커넥션 (MySQL)
+        table: 교체할 테이블 이름
+        columns: 적재할 컬럼 목록
+        batch_size: executemany 한 번에 보낼 행 수
+    """
+
+    def __init__(self, conn, table="similarity", columns=SIMILARITY_COLUMNS, batch_size=WRITE_BATCH_SIZE):
+        self.conn = conn
+        self.names = dict(table=table, staging=f"{table}_staging", old=f"{table}_old")
+        self.batch_size = batch_size
+        self.insert = "INSERT INTO {staging} ({columns}) VALUES ({values})".format(
+            columns=", ".join(columns),
+            values=", ".join(["%s"] * len(columns)),
+            **self.names
+        )
+        self.cursor = conn.cursor()
+        self.cursor.execute("DROP TABLE IF EXISTS {staging}".format(**self.names))
+        self.cursor.execute("DROP TABLE IF EXISTS {old}".format(**self.names))
+        self.cursor.execute("CREATE TABLE {staging} LIKE {table}".format(**self.names))
+
+    def __call__(self, rows):
+        for start in range(0, len(rows), self.batch_size):
+            self.cursor.executemany(self.insert, rows[start:start + self.batch_size])
+        self.conn.commit()
+
+    def swap(self):
+        swap_tables(self.conn, self)
+
+    def abort(self):
+        self.conn.rollback()
+        self.cursor.execute("DROP TABLE IF EXISTS {staging}".format(**self.names))
+        self.cursor.close()
+
+
+def swap_tables(conn, *writers):
+    """
+    여러 StagingWriter의 staging 테이블을 RENAME TABLE 한 문장으로 함께 교체하는 함수.
+    RENAME TABLE은 문장 전체가 원자적으로 실행되므로, 일부 테이블만 새 데이터로 바뀐 상태가 생기지 않는다.
+    (topk 저장 방식의 similarity_topk / similarity_exception처럼 함께 바뀌어야 하는 테이블용)
+
+    Args:
+        conn: writer들이 사용하는 DB-API 커넥션
+        writers: 교체할 StagingWriter 목록
+    """
+    cursor = conn.cursor()
+    cursor.execute("RENAME TABLE " + ", ".join(
+        "{table} TO {old}, {staging} TO {table}".format(**writer.names) for writer in writers
+    ))
+    for writer in writers:
+        cursor.execute("DROP TABLE IF EXISTS {old}".format(**writer.names))
+    conn.commit()
+    cursor.close()
+    for writer in writers:
+        writer.cursor.close()
+
+
+def main(argv=None):
+    """
+    선호도 테이블 기반 사용자 프로필로 similarity 테이블 전체를 다시 계산해 교체하는 배치 작업.
+    기존 exception(제외 재료)은 그대로 유지하며, 프로필을 만들 수 없는 사용자(선호도 행 없음)는 기존 행을 옮겨 쓴다.
+    topk 저장 방식(또는 --top-k)이면 similarity_topk / similarity_exception 테이블을 교체한다.
+    """
+    import argparse
+
+    from data import (
+        get_mysql_connection,
+        get_similarity_storage,
+        ensure_top_k_tables,
+        exception_masks,
+        mask_exception_pairs,
+        top_k_similarity,
+        load_recipes,
+        load_preference,
+        load_similarity,
+        load_similarity_exceptions,
+        SIMILARITY_TOP_K,
+        TOP_K_SIMILARITY_COLUMNS,
+        SIMILARITY_EXCEPTION_COLUMNS
+    )
+
+    parser = argparse.ArgumentParser(description="전체 사용자 similarity 일괄 재계산")
+    parser.add_argument("--chunk-size", type=int, default=None, help="청크당 사용자 수")
+    parser.add_argument("--workers", type=int, default=1, help="계산 프로세스 수")
+    parser.add_argument("--batch-size", type=int, default=WRITE_BATCH_SIZE, help="executemany 배치 크기")
+    parser.add_argument("--top-k", type=int, default=None,
+                        help="사용자별 상위 K개만 저장 (dense 저장 방식에서 지정하면 topk 테이블로 옮김)")
+    args = parser.parse_args(argv)
+
+    top_k = args.top_k or (SIMILARITY_TOP_K if get_similarity_storage() == "topk" else None)
+    partition_date = date.today().strftime("%Y-%m-%d")
+    recipe_df = load_recipes()
+    interactions = preference_interactions(load_preference())
+    similarity_df = load_similarity()
+
+    # 예외 (사용자, 레시피) 쌍 / 사용자별 제외 재료 비트맵
+    if get_similarity_storage() == "topk":
+        masks = load_similarity_exceptions()
+        exceptions = mask_exception_pairs(masks, recipe_df)
+    else:
+        exceptions = similarity_df.loc[similarity_df["exception"], ["userNum", "id"]]
+        masks = exception_masks(exceptions, recipe_df)
+
+    conn = get_mysql_connection()
+    writers = []
+    try:
+        if top_k:
+            ensure_top_k_tables(conn)
+        try:
+            if top_k:
+                writer = StagingWriter(conn, "similarity_topk", TOP_K_SIMILARITY_COLUMNS, args.batch_size)
+            else:
+                writer = StagingWriter(conn, batch_size=args.batch_size)
+            writers.append(writer)
+
+            stats = rebuild_similarity(
+                recipe_df, interactions, writer, exceptions, partition_date=partition_date,
+                chunk_size=args.chunk_size, workers=args.workers, top_k=top_k, batch_size=args.batch_size
+            )
+
+            kept = similarity_df[~similarity_df["userNum"].isin(stats["user_nums"])]
+            kept = kept.assign(
+                name=kept["name"].astype(object),
+                similarity=kept["similarity"].astype(float),
+                exception=kept["exception"].astype(np.int8),
+                partitionDate=partition_date
+            )
+            if top_k:
+                kept = top_k_similarity(kept, recipe_df, top_k)[0]
+                writer(kept[TOP_K_SIMILARITY_COLUMNS].values.tolist())
+            else:
+                writer(kept[SIMILARITY_COLUMNS].values.tolist())
+
+            if top_k:
+                mask_writer = StagingWriter(conn, "similarity_exception", SIMILARITY_EXCEPTION_COLUMNS, args.batch_size)
+                writers.append(mask_writer)
+                mask_writer(masks.assign(partitionDate=partition_date)[SIMILARITY_EXCEPTION_COLUMNS].values.tolist())
+
+            # top-K 행과 제외 재료 비트맵은 한 번에 교체 (둘 중 하나만 새 버전이 되지 않도록)
+            swap_tables(conn, *writers)
+        except Exception:
+            for staged in writers:
+                staged.abort()
+            raise
+    finally:
+        conn.close()
+
+    print(
+        f"similarity 재계산: 사용자 {stats['users']}명, {stats['rows']}행 (유지 {len(kept)}행) "
+        f"(프로필 {stats['profile_seconds']:.1f}s / 계산 {stats['score_seconds']:.1f}s / 쓰기 {stats['write_seconds']:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import hashlib
+import os
+import pickle
+import threading
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.preprocessing import OneHotEncoder
+
+from data import cached_derived
+
+# 인코더 / 특성 행렬 저장 경로 (환경변수 RECIPE_FEATURE_DIR로 변경 가능)
+RECIPE_FEATURE_DIR = os.environ.get(
+    "RECIPE_FEATURE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "feature_store")
+)
+
+# 원-핫 인코딩할 컬럼 (= 선호도 컬럼 그룹)
+FEATURE_COLUMNS = ["style", "instruction", "ingredient"]
+
+# 특성 행렬 저장 형식이 바뀌면 올려서 저장된 결과를 무효화
+FEATURE_VERSION = 1
+
+_build_lock = threading.Lock()
+
+
+class RecipeFeatureStore:
+    """
+    레시피 원-핫 특성 희소 행렬(CSR)과 컬럼 그룹별 열 범위 / 행 norm.
+    필수 컬럼(FEATURE_COLUMNS)이 모두 채워진 레시피만 행으로 가진다.
+
+    Attributes:
+        positions: 원본 레시피 데이터프레임에서의 행 위치 (int64)
+        ids: 레시피 id (int64)
+        names: 레시피 이름 (list[str])
+        ingredients: 대표 재료 (list[str], 예외 재료 판정용)
+        matrix: 레시피 × 특성 CSR 행렬 (float64)
+        groups: {컬럼 그룹: (시작 열, 끝 열)}
+    """
+
+    ARRAYS = ("positions", "ids", "data", "indices", "indptr", "shape", "bounds")
+
+    def __init__(self, positions, ids, names, ingredients, matrix, groups):
+        self.positions = positions
+        self.ids = ids
+        self.names = names
+        self.ingredients = ingredients
+        self.matrix = matrix
+        self.groups = groups
+
+        # 그룹별 열 슬라이스와 행 norm (유저 벡터와의 코사인 유사도 분모)
+        self._group_matrices = {
+            group: matrix[:, start:end].tocsr() for group, (start, end) in groups.items()
+        }
+        self.group_norms = {
+            group: np.sqrt(np.asarray(m.multiply(m).sum(axis=1)).ravel())
+            for group, m in self._group_matrices.items()
+        }
+        self.norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+
+    @classmethod
+    def build(cls, recipe_df, encoder):
+        """
+        학습된 인코더로 레시피 데이터프레임을 변환해 특성 행렬을 만드는 함수.
+        """
+        complete = recipe_df[FEATURE_COLUMNS].notna().all(axis=1).to_numpy()
+        filtered = recipe_df[complete]
+
+        bounds = np.cumsum([0] + [len(categories) for categories in encoder.categories_])
+        return cls(
+            positions=np.flatnonzero(complete).astype(np.int64),
+            ids=filtered["id"].to_numpy(dtype=np.int64),
+            names=filtered["name"].tolist(),
+            ingredients=filtered["ingredient"].tolist(),
+            matrix=csr_matrix(encoder.transform(filtered[FEATURE_COLUMNS]), dtype=np.float64),
+            groups={
+                column: (int(bounds[i]), int(bounds[i + 1])) for i, column in enumerate(FEATURE_COLUMNS)
+            }
+        )
+
+    def save(self, path):
+        arrays = {
+            "positions": self.positions,
+            "ids": self.ids,
+            "names": np.array(self.names, dtype=str),
+            "ingredients": np.array(self.ingredients, dtype=str),
+            "data": self.matrix.data,
+            "indices": self.matrix.indices,
+            "indptr": self.matrix.indptr,
+            "shape": np.array(self.matrix.shape, dtype=np.int64),
+            "bounds": np.array([self.groups[column] for column in FEATURE_COLUMNS], dtype=np.int64),
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in cls.ARRAYS}
+            names = data["names"].tolist()
+            ingredients = data["ingredients"].tolist()
+        return cls(
+            positions=arrays["positions"],
+            ids=arrays["ids"],
+            names=names,
+            ingredients=ingredients,
+            matrix=csr_matrix(
+                (arrays["data"], arrays["indices"], arrays["indptr"]), shape=tuple(arrays["shape"])
+            ),
+            groups={
+                column: (int(start), int(end)) for column, (start, end) in zip(FEATURE_COLUMNS, arrays["bounds"])
+            }
+        )
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def user_vector(self, selected_ids):
+        """
+        선택한 레시피들의 특성 평균 벡터를 반환. (선택한 레시피가 없으면 0 벡터)
+        """
+        rows = np.flatnonzero(np.isin(self.ids, list(selected_ids)))
+        if len(rows) == 0:
+            return np.zeros(self.matrix.shape[1])
+        return np.asarray(self.matrix[rows].mean(axis=0)).ravel()
+
+    def cosine(self, user_vector, group=None):
+        """
+        유저 벡터와 모든 레시피의 코사인 유사도를 희소 행렬-벡터 곱 한 번으로 계산.
+        norm이 0인 쪽이 있으면 0. (sklearn cosine_similarity와 같은 값)
+
+        Args:
+            user_vector: user_vector()의 결과
+            group: 컬럼 그룹 ("style", "instruction", "ingredient", None이면 전체 특성)
+
+        Returns:
+            레시피별 유사도 배열 (float64)
+        """
+        if group is None:
+            matrix, norms, vector = self.matrix, self.norms, user_vector
+        else:
+            start, end = self.groups[group]
+            matrix, norms, vector = self._group_matrices[group], self.group_norms[group], user_vector[start:end]
+
+        denominator = norms * np.linalg.norm(vector)
+        scores = np.zeros(len(self))
+        np.divide(matrix @ vector, denominator, out=scores, where=denominator > 0)
+        return scores
+
+
+def _encoder_path():
+    return os.path.join(RECIPE_FEATURE_DIR, "encoder.pkl")
+
+
+def _load_or_fit_encoder(values):
+    """
+    저장된 인코더를 불러오는 함수. 처음 보는 값(새 style 등)이 있거나 불러오지 못하면 다시 학습해 저장한다.
+    """
+    path = _encoder_path()
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                encoder = pickle.load(f)
+            known = all(
+                set(values[column].unique()) <= set(categories)
+                for column, categories in zip(FEATURE_COLUMNS, encoder.categories_)
+            )
+            if known and list(encoder.feature_names_in_) == FEATURE_COLUMNS:
+                return encoder
+        except Exception:
+            pass
+
+    encoder = OneHotEncoder(handle_unknown="ignore")
+    encoder.fit(values)
+    try:
+        os.makedirs(RECIPE_FEATURE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(encoder, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return encoder
+
+
+def _fingerprint(recipe_df, encoder):
+    digest = hashlib.sha1(f"features-v{FEATURE_VERSION}".encode("utf-8"))
+    for categories in encoder.categories_:
+        digest.update(b"\x02" + "\x00".join(map(str, categories)).encode("utf-8"))
+    for row in recipe_df[["id", "name"] + FEATURE_COLUMNS].itertuples(index=False):
+        digest.update(b"\x00")
+        digest.update("\x01".join(map(str, row)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _load_or_build(recipe_df):
+    with _build_lock:
+        encoder = _load_or_fit_encoder(recipe_df[FEATURE_COLUMNS].dropna())
+        path = os.path.join(RECIPE_FEATURE_DIR, f"{_fingerprint(recipe_df, encoder)}.npz")
+
+        # 1. 같은 레시피 목록 / 인코더로 만든 특성 행렬이 있으면 그대로 사용
+        if os.path.exists(path):
+            try:
+                return RecipeFeatureStore.load(path)
+            except Exception:
+                pass
+
+        # 2. 레시피 테이블이 바뀐 경우에만 변환 후 저장
+        store = RecipeFeatureStore.build(recipe_df, encoder)
+        try:
+            os.makedirs(RECIPE_FEATURE_DIR, exist_ok=True)
+            store.save(path)
+        except OSError:
+            pass
+    return store
+
+
+def get_feature_store(recipe_df):
+    """
+    레시피 데이터프레임의 원-핫 특성 저장소(RecipeFeatureStore)를 반환하는 함수.
+    인코더는 한 번 학습해 디스크에 저장하고, 특성 행렬은 레시피 테이블 버전별로 한 번만 만들어 모든 세션이 공유한다.
+
+    Args:
+        recipe_df: 레시피 데이터프레임 (id, name, style, instruction, ingredient 컬럼 필수)
+
+    Returns:
+        RecipeFeatureStore
+    """
+    return cached_derived(recipe_df, "recipe_features", _load_or_build)
@@ -0,0 +1,23 @@
+from .store import (
+    RecipeVectorStore,
+    configure_vector_store,
+    get_vector_store,
+    warm_up_vector_store,
+    vector_store_stats
+)
+from .ann import (
+    AnnVectorStore,
+    IVFIndex,
+    build_ann_index
+)
+from .embedding import (
+    MODEL_NAME,
+    QueryEmbeddingCache,
+    load_embedding_model,
+    encode_query,
+    embedding_cache_stats
+)
+from .titles import (
+    get_title_embeddings,
+    top_k_titles
+)
@@ -0,0 +1,461 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .store import CHROMA_PATH, COLLECTION_NAME, RecipeVectorStore
+
+# ANN 인덱스 저장 경로 (환경변수 ANN_INDEX_DIR로 변경 가능, 컬렉션 이름별 하위 폴더)
+ANN_INDEX_DIR = os.environ.get(
+    "ANN_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "ann_index")
+)
+
+# 쿼리마다 탐색할 클러스터 수 (클수록 recall↑ / 지연 시간↑)
+ANN_NPROBE = int(os.environ.get("ANN_NPROBE", 8))
+
+# k-means 반복 횟수 / 학습에 사용할 클러스터당 최대 표본 수
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLES_PER_LIST = 256
+
+# Chroma 컬렉션에서 임베딩을 읽어올 페이지 크기
+EXPORT_PAGE_SIZE = 5000
+
+# 거리 함수 (Chroma hnsw:space와 같은 정의, 기본값 l2 = 제곱 유클리드 거리)
+ANN_METRICS = ("l2", "cosine", "ip")
+
+# 인덱스 저장 형식이 바뀌면 올려서 저장된 인덱스를 무효화
+ANN_VERSION = 1
+
+# 메타데이터 파일에서 Chroma 문서 id를 담는 컬럼
+ID_COLUMN = "__id__"
+
+_build_lock = threading.Lock()
+
+
+def _sq_norms(vectors):
+    return np.einsum("ij,ij->i", vectors, vectors)
+
+
+def _unit_rows(vectors):
+    norms = np.sqrt(_sq_norms(vectors))[:, None]
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def content_fingerprint(ids, metadatas):
+    """
+    문서 id / doc_hash 목록의 해시. (컬렉션 내용이 인덱스를 만들 때와 같은지 비교하는 데 사용)
+    """
+    digest = hashlib.sha1()
+    for doc_id, doc_hash in sorted(zip(ids, ((meta or {}).get("doc_hash") for meta in metadatas)),
+                                   key=lambda pair: pair[0]):
+        digest.update(f"{doc_id}\t{doc_hash}\n".encode("utf-8"))
+    return f"{len(ids)}:{digest.hexdigest()}"
+
+
+def collection_fingerprint(collection, page_size=EXPORT_PAGE_SIZE):
+    """
+    Chroma 컬렉션의 현재 content_fingerprint를 계산하는 함수. (임베딩은 읽지 않고 메타데이터만 조회)
+    """
+    ids, metadatas = [], []
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        ids.extend(page["ids"])
+        metadatas.extend(page["metadatas"])
+        offset += len(page["ids"])
+    return content_fingerprint(ids, metadatas)
+
+
+def _assign(vectors, centroids, chunk_size=8192):
+    # 각 벡터의 가장 가까운 중심 (||c||² - 2x·c 최소)
+    centroid_norms = _sq_norms(centroids)
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        block = vectors[start:start + chunk_size]
+        labels[start:start + chunk_size] = np.argmin(centroid_norms - 2 * block @ centroids.T, axis=1)
+    return labels
+
+
+def train_centroids(vectors, nlist, iterations=KMEANS_ITERATIONS, seed=0):
+    """
+    k-means로 IVF 클러스터 중심을 학습하는 함수. (표본은 클러스터당 최대 KMEANS_SAMPLES_PER_LIST개)
+
+    Returns:
+        np.ndarray (nlist × 차원, float32)
+    """
+    rng = np.random.default_rng(seed)
+    if len(vectors) > nlist * KMEANS_SAMPLES_PER_LIST:
+        vectors = vectors[np.sort(rng.choice(len(vectors), nlist * KMEANS_SAMPLES_PER_LIST, replace=False))]
+
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].astype(np.float64)
+    for _ in range(iterations):
+        labels = _assign(vectors, centroids)
+        counts = np.bincount(labels, minlength=nlist)
+
+        # 클러스터별 평균 (라벨 순으로 정렬한 뒤 구간 합)
+        order = np.argsort(labels, kind="stable")
+        starts = np.searchsorted(labels[order], np.arange(nlist))
+        empty = counts == 0
+        sums = np.add.reduceat(vectors[order], starts[~empty], axis=0, dtype=np.float64)
+
+        # 빈 클러스터는 무작위 벡터로 다시 시작
+        centroids[~empty] = sums / counts[~empty, None]
+        centroids[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """
+    numpy로 만든 IVF(Inverted File) 근사 최근접 이웃 인덱스.
+    벡터를 클러스터 순서로 재배열해 저장하므로, 클러스터 하나는 vectors의 연속 구간 [offsets[c], offsets[c + 1])이다.
+    쿼리는 가까운 중심 nprobe개의 구간만 정확히 계산한다.
+
+    디스크 구성 (path 폴더):
+        manifest.json: 차원 / 거리 함수 / 클러스터 수 / 원본 컬렉션 내용 해시(fingerprint) 등
+        vectors.npy, sq_norms.npy, centroids.npy, offsets.npy: 메모리 맵으로 여는 배열
+        metadata.parquet: 벡터와 같은 행 순서의 메타데이터 (컬럼형, ID_COLUMN = Chroma 문서 id)
+
+    Attributes:
+        vectors: 재배열된 임베딩 (개수 × 차원, float32)
+        metadata: 메타데이터 데이터프레임
+        metric: 거리 함수 ("l2", "cosine", "ip")
+        fingerprint: 인덱스를 만든 컬렉션의 content_fingerprint (컬렉션이 바뀌었는지 확인용)
+    """
+
+    ARRAYS = ("vectors", "sq_norms", "centroids", "offsets")
+
+    def __init__(self, vectors, sq_norms, centroids, offsets, metadata, metric="l2", fingerprint=None):
+        if metric not in ANN_METRICS:
+            raise ValueError(f"지원하지 않는 거리 함수입니다: {metric} (가능: {', '.join(ANN_METRICS)})")
+        self.vectors = vectors
+        self.sq_norms = sq_norms
+        self.centroids = centroids
+        self.offsets = offsets
+        self.metadata = metadata
+        self.metric = metric
+        self.fingerprint = fingerprint
+
+        self._ids = metadata[ID_COLUMN].tolist()
+        self._columns = [column for column in metadata.columns if column != ID_COLUMN]
+
+    @classmethod
+    def build(cls, vectors, ids, metadatas, metric="l2", nlist=None, seed=0):
+        """
+        임베딩 / 문서 id / 메타데이터로 인덱스를 만드는 함수.
+
+        Args:
+            vectors: 임베딩 (개수 × 차원)
+            ids: Chroma 문서 id 목록
+            metadatas: 메타데이터 딕셔너리 목록
+            metric: 거리 함수 (Chroma 컬렉션의 hnsw:space)
+            nlist: 클러스터 수 (None이면 √개수)
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if metric == "cosine":
+            vectors = _unit_rows(vectors).astype(np.float32)
+        nlist = max(1, min(len(vectors), nlist or int(np.sqrt(len(vectors)))))
+
+        # cosine / ip는 방향 기준으로 클러스터링
+        train = vectors if metric == "l2" else _unit_rows(vectors)
+        centroids = train_centroids(train, nlist, seed=seed)
+        labels = _assign(train, centroids)
+
+        order = np.argsort(labels, kind="stable")
+        offsets = np.searchsorted(labels[order], np.arange(nlist + 1)).astype(np.int64)
+
+        metadata = pd.DataFrame(list(metadatas)).iloc[order].reset_index(drop=True)
+        metadata.insert(0, ID_COLUMN, np.asarray(ids, dtype=object)[order])
+
+        vectors = vectors[order]
+        return cls(vectors, _sq_norms(vectors).astype(np.float32), centroids, offsets, metadata, metric,
+                   content_fingerprint(ids, metadatas))
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        suffix = f".{os.getpid()}.tmp"
+        for name in self.ARRAYS:
+            with open(os.path.join(path, name + ".npy" + suffix), "wb") as f:
+                np.save(f, np.asarray(getattr(self, name)))
+        self.metadata.to_parquet(os.path.join(path, "metadata.parquet" + suffix), index=False)
+        with open(os.path.join(path, "manifest.json" + suffix), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": ANN_VERSION,
+                "metric": self.metric,
+                "count": len(self),
+                "dim": int(self.vectors.shape[1]),
+                "nlist": len(self.offsets) - 1,
+                "fingerprint": self.fingerprint,
+                "built_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }, f, ensure_ascii=False, indent=2)
+
+        # manifest를 마지막에 교체 (읽는 쪽은 manifest가 있어야 인덱스로 인정)
+        for name in [n + ".npy" for n in self.ARRAYS] + ["metadata.parquet", "manifest.json"]:
+            os.replace(os.path.join(path, name + suffix), os.path.join(path, name))
+
+    @classmethod
+    def load(cls, path):
+        """
+        저장된 인덱스를 여는 함수. 벡터 배열은 메모리 맵으로 열려 프로세스 간에 OS 페이지 캐시를 공유한다.
+        """
+        manifest = read_manifest(path)
+        if manifest is None:
+            raise FileNotFoundError(f"ANN 인덱스가 없습니다: {path}")
+        if manifest.get("version") != ANN_VERSION:
+            raise ValueError(f"ANN 인덱스 형식이 다릅니다: {manifest.get('version')} (필요: {ANN_VERSION})")
+
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if name == "vectors" else None)
+            for name in cls.ARRAYS
+        }
+        metadata = pd.read_parquet(os.path.join(path, "metadata.parquet"))
+        return cls(metadata=metadata, metric=manifest["metric"], fingerprint=manifest.get("fingerprint"), **arrays)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    @property
+    def nlist(self):
+        return len(self.offsets) - 1
+
+    def search(self, query, k=10, nprobe=ANN_NPROBE):
+        """
+        쿼리 벡터 하나의 근사 최근접 이웃 k개를 구하는 함수.
+        가까운 중심부터 nprobe개 클러스터를 보되, 후보가 k개보다 적으면 k개가 될 때까지 더 본다.
+
+        Returns:
+            (행 위치 배열, 거리 배열) 튜플 (거리 오름차순, 거리는 Chroma와 같은 정의)
+        """
+        query = np.asarray(query, dtype=np.float32).ravel()
+        if self.metric == "cosine":
+            query = _unit_rows(query[None, :])[0].astype(np.float32)
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        # 1. 가까운 클러스터 순서 (l2는 중심까지 거리, cosine / ip는 방향 기준)
+        if self.metric == "l2":
+            probe_order = np.argsort(_sq_norms(self.centroids) - 2 * self.centroids @ query)
+        else:
+            probe_order = np.argsort(-(self.centroids @ query))
+
+        # 2. 클러스터 구간별로 거리 계산
+        rows, distances, found = [], [], 0
+        for probed, cluster in enumerate(probe_order):
+            if probed >= nprobe and found >= k:
+                break
+            start, end = int(self.offsets[cluster]), int(self.offsets[cluster + 1])
+            if start == end:
+                continue
+            dots = self.vectors[start:end] @ query
+            if self.metric == "l2":
+                distances.append(self.sq_norms[start:end] - 2 * dots + query @ query)
+            else:
+                distances.append(1 - dots)
+            rows.append(np.arange(start, end))
+            found += end - start
+
+        rows, distances = np.concatenate(rows), np.concatenate(distances)
+
+        # 3. 상위 k개 (같은 거리는 행 위치 순)
+        if k < len(distances):
+            threshold = np.partition(distances, k - 1)[k - 1]
+            candidates = np.flatnonzero(distances <= threshold)
+        else:
+            candidates = np.arange(len(distances))
+        top = candidates[np.lexsort((rows[candidates], distances[candidates]))][:k]
+        if self.metric == "l2":
+            return rows[top], np.maximum(distances[top], 0)   # 부동소수점 오차로 생기는 음수 제거
+        return rows[top], distances[top]
+
+    def records(self, rows):
+        """
+        행 위치들의 (Chroma 문서 id 목록, 메타데이터 딕셔너리 목록)을 반환하는 함수. (빈 값은 키에서 제외)
+        """
+        frame = self.metadata.iloc[rows]
+        metadatas = [
+            {column: value for column, value in zip(self._columns, values) if not pd.isna(value)}
+            for values in frame[self._columns].itertuples(index=False, name=None)
+        ]
+        return [self._ids[row] for row in rows], metadatas
+
+
+def export_collection(collection, page_size=EXPORT_PAGE_SIZE):
+    """
+    Chroma 컬렉션의 문서 id / 임베딩 / 메타데이터를 페이지 단위로 모두 읽는 함수.
+
+    Returns:
+        (id 목록, 임베딩 행렬 float32, 메타데이터 목록) 튜플
+    """
+    ids, vectors, metadatas = [], [], []
+    offset = 0
+    while True:
+        page = collection.get(include=["embeddings", "metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        ids.extend(page["ids"])
+        vectors.append(np.asarray(page["embeddings"], dtype=np.float32))
+        metadatas.extend(meta or {} for meta in page["metadatas"])
+        offset += len(page["ids"])
+    matrix = np.concatenate(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+    return ids, matrix, metadatas
+
+
+def read_manifest(path):
+    """
+    저장된 인덱스의 manifest를 읽는 함수. (인덱스가 없으면 None)
+    """
+    manifest_path = os.path.join(path, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def index_path(collection_name=COLLECTION_NAME, index_dir=None):
+    return os.path.join(index_dir or ANN_INDEX_DIR, collection_name)
+
+
+def build_ann_index(collection, path=None, nlist=None, seed=0):
+    """
+    Chroma 컬렉션에서 ANN 인덱스를 만들어 저장하는 함수. (컬렉션 내용이 바뀐 뒤 다시 실행)
+
+    Args:
+        collection: Chroma 컬렉션
+        path: 저장 경로 (None이면 ANN_INDEX_DIR/컬렉션 이름)
+        nlist: 클러스터 수 (None이면 √문서 수)
+
+    Returns:
+        IVFIndex
+    """
+    ids, vectors, metadatas = export_collection(collection)
+    if not ids:
+        raise ValueError(f"컬렉션이 비어 있습니다: {collection.name}")
+    metric = (collection.metadata or {}).get("hnsw:space", "l2")
+    index = IVFIndex.build(vectors, ids, metadatas, metric=metric, nlist=nlist, seed=seed)
+    with _build_lock:
+        index.save(path or index_path(collection.name))
+    return index
+
+
+class AnnVectorStore(RecipeVectorStore):
+    """
+    로컬 IVF 인덱스 핸들. RecipeVectorStore와 같은 query() 인자/반환값(Chroma 형식)을 가진다.
+    인덱스는 처음 사용할 때 한 번만 메모리 맵으로 열고, 없거나 Chroma 컬렉션 내용과 다르면
+    (sync_collection()으로 문서가 추가/변경/삭제된 경우, manifest의 fingerprint로 비교) 다시 만들어 저장한다.
+    ChromaDB를 열 수 없으면 저장된 인덱스를 그대로 사용하고, 확인하지 못한 이유를 stats()의 index_status에 남긴다.
+
+    Args:
+        path: ANN 인덱스 저장 경로 (None이면 ANN_INDEX_DIR/컬렉션 이름)
+        collection_name: 컬렉션 이름
+        chroma_path: 인덱스가 없을 때 읽어올 ChromaDB 저장 경로
+        nprobe: 쿼리마다 탐색할 클러스터 수
+    """
+
+    backend = "ann"
+
+    def __init__(self, path=None, collection_name=COLLECTION_NAME, chroma_path=CHROMA_PATH, nprobe=ANN_NPROBE):
+        super().__init__(path or index_path(collection_name), collection_name)
+        self.chroma_path = chroma_path
+        self.nprobe = nprobe
+        self._index = None
+        self.index_status = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    started = time.perf_counter()
+                    self._refresh_index()
+                    self._index = IVFIndex.load(self.path)
+                    self.open_seconds = time.perf_counter() - started
+        return self._index
+
+    def _refresh_index(self):
+        # 저장된 인덱스가 없거나, 형식이 다르거나, 컬렉션 내용이 바뀌었으면 다시 생성
+        manifest = read_manifest(self.path)
+        try:
+            collection = RecipeVectorStore(self.chroma_path, self.collection_name).collection
+            fingerprint = collection_fingerprint(collection)
+        except Exception as e:
+            if manifest is None:
+                raise
+            self.index_status = f"unchecked: {e!r}"
+            return
+
+        if manifest is None:
+            self.index_status = "built"
+        elif manifest.get("version") != ANN_VERSION:
+            self.index_status = "rebuilt: version"
+        elif manifest.get("fingerprint") != fingerprint:
+            self.index_status = "rebuilt: collection changed"
+        else:
+            self.index_status = "fresh"
+            return
+        build_ann_index(collection, self.path)
+
+    def warm_up(self):
+        """
+        인덱스를 열고 벡터 배열 전체를 한 번 읽어 페이지 캐시에 올리는 함수.
+        """
+        index = self.index
+        if len(index):
+            index.search(index.vectors[0], k=1, nprobe=index.nlist)
+        self.warm = True
+
+    def _query(self, query_embeddings, n_results, **kwargs):
+        if kwargs:
+            raise ValueError(f"ANN 백엔드는 지원하지 않는 인자입니다: {', '.join(kwargs)}")
+
+        index = self.index
+        result = {"ids": [], "distances": [], "metadatas": []}
+        for query in query_embeddings:
+            rows, distances = index.search(query, n_results, self.nprobe)
+            ids, metadatas = index.records(rows)
+            result["ids"].append(ids)
+            result["distances"].append(distances.tolist())
+            result["metadatas"].append(metadatas)
+        return result
+
+    def stats(self):
+        stats = super().stats()
+        stats["nprobe"] = self.nprobe
+        stats["index_status"] = self.index_status
+        if self._index is not None:
+            stats["count"] = len(self._index)
+            stats["nlist"] = self._index.nlist
+        return stats
+
+
+def main(argv=None):
+    """
+    ChromaDB 컬렉션에서 ANN 인덱스를 다시 만드는 명령. (python -m vectordb.ann)
+
+    옵션:
+        --chroma-path PATH   ChromaDB 저장 경로
+        --collection NAME    컬렉션 이름
+        --nlist N            클러스터 수 (기본값: √문서 수)
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chroma-path", default=CHROMA_PATH)
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--nlist", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    index = build_ann_index(RecipeVectorStore(args.chroma_path, args.collection).collection, nlist=args.nlist)
+    print(f"✅ ANN 인덱스 생성 완료: {len(index)}개 / 클러스터 {index.nlist}개 / "
+          f"{index.metric} ({time.perf_counter() - started:.1f}초)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,133 +1,451 @@
 # 라이브러리 불러오기
 from sentence_transformers import SentenceTransformer
 import mysql.connector
-import chromadb
 from chromadb import PersistentClient
 import time
 from datetime import datetime
+import argparse
+import hashlib
+import json
+import queue
 import shutil
+import threading
 import os
 
-chroma_path = "./chroma_db"
-if os.path.exists(chroma_path):
-    shutil.rmtree(chroma_path)
-    print("✅ 기존 ChromaDB 삭제 완료!")
-else:
-    print("✅ 초기화할 ChromaDB가 없습니다.")
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+chroma_path = os.path.join(BASE_DIR, "chroma_db")
+collection_name = "recipes_kr_sbert"
+model_name = "snunlp/KR-SBERT-V40K-klueNLI-augSTS"
 
-# 임베딩 모델 로딩
-model = SentenceTransformer("snunlp/KR-SBERT-V40K-klueNLI-augSTS")
+# 중단 후 이어서 실행하기 위한 진행 상황 파일
+checkpoint_path = os.path.join(BASE_DIR, "chroma_sync_checkpoint.json")
+log_file_path = "chroma_insert_log.txt"
+
+# 배치 적재 파라미터 설정
+batch_size = 500            # MySQL에서 한 번에 읽어 적재하는 행 수
+encode_batch_size = 64      # model.encode() 내부 배치 크기
+encode_workers = 1          # 2 이상이면 SentenceTransformer 멀티 프로세스 풀로 임베딩
+queue_size = 4              # 단계 사이 대기열 크기 (메모리에 쌓이는 배치 수 상한)
 
-# MySQL 연결
-conn = mysql.connector.connect(
+DB_CONFIG = dict(
     host="192.168.14.53",
     user="dongdong",
     password="20250517",
     database="ai_re",
     connection_timeout=3600     # 1시간까지 MySQL 연결 유지
 )
-cursor = conn.cursor()
 
-# ChromaDB 연결 및 컬렉션 생성
-client = PersistentClient(path="./chroma_db")
-collection = client.get_or_create_collection(name="recipes_kr_sbert")
+RECIPE_COLUMNS = "id, name, instruction, role, ingredient, category, inputrecipe, portnum, level, timenum, style"
 
-# 중복 키 체크용 세트 (re_name + re_ingredient)
-existing_data = collection.get()
-existing_keys = set()
-for doc, meta in zip(existing_data["documents"], existing_data["metadatas"]):
-    key = f"{meta.get('name', '')}|{meta.get('ingredient', '')}"
-    existing_keys.add(key)
 
-# 배치 적재 파라미터 설정
-batch_size = 500
-offset = 0
-total_inserted = 0
-
-# 총 개수 파악 (예상 시간 계산용)
-cursor = conn.cursor()
-cursor.execute("SELECT COUNT(*) FROM recipe")
-total_rows = cursor.fetchone()[0]
-cursor.close()
-estimated_batches = total_rows // batch_size + 1
-print(f"\n🧲 전체 레시피 수: {total_rows}개 → 총 예상 루프 수: {estimated_batches}회")
-start_time = time.time()
-
-# 로그 파일 열기
-log_file_path = "chroma_insert_log.txt"
-with open(log_file_path, "a", encoding="utf-8") as log:
+def iter_recipe_batches(conn, columns, start_after=None, size=None):
+    """
+    id 기준 keyset 페이지네이션으로 recipe 테이블을 배치 단위로 읽는 함수.
+    (OFFSET을 쓰지 않으므로 뒤쪽 페이지도 인덱스 탐색 한 번으로 읽음)
 
-    # 루프 수행
+    Yields:
+        행 튜플 리스트 (첫 컬럼은 id, id 오름차순)
+    """
+    size = size or batch_size
+    last_id = start_after
     while True:
-        cursor = conn.cursor()  # 하위에서 컨널팅 오류 바인드 체크
-        query = f"""
-            SELECT id, name, instruction, role, ingredient, category, inputrecipe, portnum, level, timenum, style
-            FROM recipe
-            LIMIT {batch_size} OFFSET {offset}
-        """
-        cursor.execute(query)
+        cursor = conn.cursor()
+        if last_id is None:
+            cursor.execute(f"SELECT {columns} FROM recipe ORDER BY id LIMIT %s", (size,))
+        else:
+            cursor.execute(f"SELECT {columns} FROM recipe WHERE id > %s ORDER BY id LIMIT %s", (last_id, size))
         rows = cursor.fetchall()
         cursor.close()
 
         if not rows:
-            print("\n✅ 모든 레시피 생입 완료!")
-            log.write(f"[{datetime.now().strftime('%H:%M:%S')}] ✅ 모든 레시피 생입 완료!\n")
-            break
-
-        docs, metas, ids = [], [], []
-
-        for row in rows:
-            id, name, instruction, role, ingredient, category, inputrecipe, portnum, level, timenum, style = row      
-            text = f"{id}: {name}, 재료: {inputrecipe}, 카테고리: {category}, 조리방법: {instruction}, 유형: {style}, 주재료: {ingredient}"
-            key = f"{name}|{inputrecipe}"
-
-            if key in existing_keys:
-                continue  # 중복 건너떡
-
-            meta = {
-                "id": id,
-                "name": name,
-                "inputrecipe": inputrecipe,
-                "category": category,
-                "level": level,
-                "cook_time": timenum,
-                "portnum": portnum,
-                "role": role, 
-                "instructions": instruction,
-                "style": style,
-                "ingredient": ingredient,
-            }
-
-            docs.append(text)
-            metas.append(meta)
-            ids.append(f"rec_{id}")
-            existing_keys.add(key)
-
-        # 임벤드 및 생입
-        if docs:
-            embeddings = model.encode(docs).tolist()
-            collection.add(
-                documents=docs,
-                metadatas=metas,
-                embeddings=embeddings,
-                ids=ids
-            )
-            total_inserted += len(docs)
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def canonical_recipe_ids(conn):
+    """
+    적재 대상 레시피 id 집합을 구하는 함수.
+    이름 + 재료(inputrecipe)가 같은 레시피는 id가 가장 작은 것 하나만 적재한다. (중복 건너뜀)
+    """
+    seen_keys = set()
+    ids = set()
+    for rows in iter_recipe_batches(conn, "id, name, inputrecipe", size=batch_size * 20):
+        for id, name, inputrecipe in rows:
+            key = hashlib.sha1(f"{name}|{inputrecipe}".encode("utf-8")).digest()
+            if key not in seen_keys:
+                seen_keys.add(key)
+                ids.add(id)
+    return ids
+
+
+def build_document(row):
+    """
+    레시피 행으로 (문서 id, 문서 텍스트, 메타데이터)를 만드는 함수.
+    메타데이터의 doc_hash는 문서 텍스트 + 메타데이터의 해시로, 변경 여부 판단에 사용한다.
+    """
+    id, name, instruction, role, ingredient, category, inputrecipe, portnum, level, timenum, style = row
+    text = f"{id}: {name}, 재료: {inputrecipe}, 카테고리: {category}, 조리방법: {instruction}, 유형: {style}, 주재료: {ingredient}"
+
+    meta = {
+        "id": id,
+        "name": name,
+        "inputrecipe": inputrecipe,
+        "category": category,
+        "level": level,
+        "cook_time": timenum,
+        "portnum": portnum,
+        "role": role,
+        "instructions": instruction,
+        "style": style,
+        "ingredient": ingredient,
+    }
+    payload = json.dumps([text, meta], ensure_ascii=False, sort_keys=True, default=str)
+    meta["doc_hash"] = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    return f"rec_{id}", text, meta
+
+
+def stored_hashes(collection, page_size=5000):
+    """
+    컬렉션에 저장된 문서 id → doc_hash 딕셔너리를 반환하는 함수. (doc_hash가 없는 기존 문서는 None)
+    """
+    hashes = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            return hashes
+        for doc_id, meta in zip(page["ids"], page["metadatas"]):
+            hashes[doc_id] = (meta or {}).get("doc_hash")
+        offset += len(page["ids"])
+
+
+def load_checkpoint(path=checkpoint_path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(state, path=checkpoint_path):
+    # 쓰는 도중 중단되어도 이전 체크포인트가 깨지지 않도록 임시 파일에 쓴 뒤 교체
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class StageStats:
+    """
+    파이프라인 단계별 처리량 집계. (busy 시간 = 해당 단계가 실제로 일한 시간)
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.batches = 0
+        self.seconds = 0.0
+
+    def add(self, rows, seconds):
+        self.rows += rows
+        self.batches += 1
+        self.seconds += seconds
+
+    def summary(self):
+        rate = self.rows / self.seconds if self.seconds > 0 else 0.0
+        return f"{self.name}: {self.rows}행 / {self.seconds:.1f}s ({rate:,.0f}행/s)"
+
+
+_DONE = object()
+
+
+def _put(q, item, stop):
+    # 다른 단계가 실패하면(stop) 대기 중인 put을 포기
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def make_encoder(model, workers=None, batch=None):
+    """
+    임베딩 함수와 종료 함수를 만드는 함수.
+    workers가 2 이상이면 SentenceTransformer 멀티 프로세스 풀(CPU 프로세스 workers개)로 임베딩한다.
+
+    Returns:
+        (encode(docs) -> list[list[float]], close())
+    """
+    workers = workers or encode_workers
+    batch = batch or encode_batch_size
+
+    if workers <= 1:
+        return (lambda docs: model.encode(docs, batch_size=batch).tolist()), (lambda: None)
+
+    pool = model.start_multi_process_pool(target_devices=["cpu"] * workers)
+
+    def encode(docs):
+        return model.encode_multi_process(docs, pool, batch_size=batch).tolist()
 
-            elapsed = time.time() - start_time
-            eta = (elapsed / (offset // batch_size + 1)) * (estimated_batches - (offset // batch_size + 1)) / 60
+    return encode, (lambda: model.stop_multi_process_pool(pool))
 
-            log_line = f"[{datetime.now().strftime('%H:%M:%S')}] 현재까지 생입된 레시피 수: {total_inserted} | 예상 남은 시간: {eta:.1f}분\n"
-            print(log_line.strip())
-            log.write(log_line)
 
-            if total_inserted % 10000 < batch_size:
-                log.write("[CHECKPOINT] ---- 저장 시점 도달 ----\n")
+def run_pipeline(produce, transform, consume, size=None):
+    """
+    produce → transform → consume 세 단계를 대기열로 연결해 동시에 실행하는 함수.
+    (DB 조회 / 임베딩 / Chroma 쓰기가 서로를 기다리지 않도록 겹쳐서 실행)
+    consume은 호출한 스레드에서 produce 순서대로 실행되며, 어느 단계든 예외가 나면 전체를 멈추고 다시 발생시킨다.
+
+    Args:
+        produce: 항목을 차례로 반환하는 이터러블
+        transform: 항목 → 항목 함수 (별도 스레드)
+        consume: 항목을 받는 함수 (호출 스레드)
+        size: 단계 사이 대기열 크기
+    """
+    size = size or queue_size
+    fetched, encoded = queue.Queue(maxsize=size), queue.Queue(maxsize=size)
+    stop = threading.Event()
+    errors = []
+
+    def fetch_stage():
+        try:
+            for item in produce:
+                if not _put(fetched, item, stop):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(fetched, _DONE, stop)
+
+    def encode_stage():
+        try:
+            while True:
+                item = _get(fetched, stop)
+                if item is _DONE:
+                    return
+                if not _put(encoded, transform(item), stop):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(encoded, _DONE, stop)
+
+    threads = [
+        threading.Thread(target=fetch_stage, name="chroma-fetch", daemon=True),
+        threading.Thread(target=encode_stage, name="chroma-encode", daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            item = _get(encoded, stop)
+            if item is _DONE:
+                break
+            consume(item)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+
+
+def sync_collection(conn, collection, model, log, resume=True, path=checkpoint_path,
+                    workers=None, size=None):
+    """
+    MySQL recipe 테이블과 ChromaDB 컬렉션을 증분 동기화하는 함수.
+    1) 새로 생기거나 내용(doc_hash)이 바뀐 레시피만 임베딩해 upsert
+    2) MySQL에서 사라진(또는 중복이 된) 레시피는 컬렉션에서 삭제
+    배치마다 마지막 id를 체크포인트 파일에 기록하므로, 중단되면 다음 실행 시 그 다음 id부터 이어서 진행한다.
+    조회 → 임베딩 → 쓰기는 run_pipeline()으로 겹쳐서 실행되며, 체크포인트는 쓰기가 끝난 배치까지만 기록된다.
+
+    Args:
+        workers: 임베딩 프로세스 수 (기본값: encode_workers)
+        size: 단계 사이 대기열 크기 (기본값: queue_size)
+
+    Returns:
+        dict: 처리/적재/건너뜀/삭제 건수와 단계별 처리량
+    """
+    def write_log(message):
+        line = f"[{datetime.now().strftime('%H:%M:%S')}] {message}"
+        print(line)
+        log.write(line + "\n")
+        log.flush()
+
+    checkpoint = load_checkpoint(path) if resume else None
+    state = checkpoint or {"last_id": None, "scanned": 0, "upserted": 0, "skipped": 0}
+    if checkpoint:
+        write_log(f"🔁 체크포인트에서 이어서 진행 (마지막 id: {state['last_id']})")
+
+    # 1. 적재 대상 id / 이미 저장된 문서 해시
+    canonical_ids = canonical_recipe_ids(conn)
+    existing = stored_hashes(collection)
+    write_log(f"🧲 전체 레시피 수: {len(canonical_ids)}개 | 저장된 문서 수: {len(existing)}개")
+
+    start_time = time.time()
+    scanned_at_start = state["scanned"]
+    stages = {name: StageStats(name) for name in ("조회", "임베딩", "쓰기")}
+
+    # 2-1. 조회: keyset 페이지네이션 + 변경된 행만 선별
+    def produce():
+        batches = iter_recipe_batches(conn, RECIPE_COLUMNS, start_after=state["last_id"])
+        while True:
+            started = time.perf_counter()
+            rows = next(batches, None)
+            if rows is None:
+                return
+
+            docs, metas, ids = [], [], []
+            skipped = 0
+            for row in rows:
+                if row[0] not in canonical_ids:
+                    continue
+                doc_id, text, meta = build_document(row)
+                if existing.get(doc_id) == meta["doc_hash"]:
+                    skipped += 1
+                    continue
+                docs.append(text)
+                metas.append(meta)
+                ids.append(doc_id)
+
+            stages["조회"].add(len(rows), time.perf_counter() - started)
+            yield {"last_id": rows[-1][0], "scanned": len(rows), "skipped": skipped,
+                   "docs": docs, "metas": metas, "ids": ids}
+
+    # 2-2. 임베딩 (변경된 행이 없는 배치는 그대로 통과)
+    encode, close_encoder = make_encoder(model, workers)
+
+    def transform(batch):
+        if batch["docs"]:
+            started = time.perf_counter()
+            batch["embeddings"] = encode(batch["docs"])
+            stages["임베딩"].add(len(batch["docs"]), time.perf_counter() - started)
+        return batch
+
+    # 2-3. 쓰기 + 체크포인트 (조회 순서대로 실행)
+    def consume(batch):
+        if batch["docs"]:
+            started = time.perf_counter()
+            collection.upsert(documents=batch["docs"], metadatas=batch["metas"],
+                              embeddings=batch["embeddings"], ids=batch["ids"])
+            stages["쓰기"].add(len(batch["docs"]), time.perf_counter() - started)
+            state["upserted"] += len(batch["docs"])
+
+        state["last_id"] = batch["last_id"]
+        state["scanned"] += batch["scanned"]
+        state["skipped"] += batch["skipped"]
+        save_checkpoint(state, path)
+
+        elapsed = time.time() - start_time
+        done = state["scanned"] - scanned_at_start
+        remaining = max(len(canonical_ids) - state["scanned"], 0)
+        eta = elapsed / done * remaining / 60 if done else 0.0
+        write_log(
+            f"처리: {state['scanned']} | 적재: {state['upserted']} | 변경 없음: {state['skipped']} | 예상 남은 시간: {eta:.1f}분"
+        )
+
+    try:
+        run_pipeline(produce(), transform, consume, size)
+    finally:
+        close_encoder()
+
+    elapsed = time.time() - start_time
+    for stage in stages.values():
+        write_log(f"⏱ {stage.summary()}")
+    write_log(f"⏱ 전체: {state['scanned'] - scanned_at_start}행 / {elapsed:.1f}s")
+    state["stages"] = {
+        name: {"rows": stage.rows, "seconds": stage.seconds} for name, stage in stages.items()
+    }
+
+    # 3. MySQL에 없는 문서 삭제
+    canonical_doc_ids = {f"rec_{id}" for id in canonical_ids}
+    vanished = [doc_id for doc_id in existing if doc_id not in canonical_doc_ids]
+    for start in range(0, len(vanished), batch_size):
+        collection.delete(ids=vanished[start:start + batch_size])
+    state["deleted"] = len(vanished)
+
+    # 4. 완료 → 체크포인트 제거
+    if os.path.exists(path):
+        os.remove(path)
+    write_log(
+        f"✅ 동기화 완료! 적재: {state['upserted']} | 변경 없음: {state['skipped']} | 삭제: {state['deleted']}"
+    )
+    return state
+
+
+def main(argv=None):
+    """
+    실행 옵션
+        (기본)               증분 동기화, 체크포인트가 있으면 이어서 진행
+        --rebuild            기존 ChromaDB를 삭제하고 처음부터 다시 적재
+        --restart            체크포인트를 무시하고 처음부터 증분 동기화
+        --batch-size N       MySQL 조회 / Chroma 적재 배치 크기
+        --encode-batch-size N  model.encode() 배치 크기
+        --workers N          임베딩 프로세스 수 (2 이상이면 멀티 프로세스 풀 사용)
+        --queue-size N       단계 사이 대기열 크기
+    """
+    global batch_size, encode_batch_size
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rebuild", action="store_true")
+    parser.add_argument("--restart", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=batch_size)
+    parser.add_argument("--encode-batch-size", type=int, default=encode_batch_size)
+    parser.add_argument("--workers", type=int, default=encode_workers)
+    parser.add_argument("--queue-size", type=int, default=queue_size)
+    args = parser.parse_args(argv)
+
+    batch_size = args.batch_size
+    encode_batch_size = args.encode_batch_size
+
+    if args.rebuild:
+        if os.path.exists(chroma_path):
+            shutil.rmtree(chroma_path)
+            print("✅ 기존 ChromaDB 삭제 완료!")
+        else:
+            print("✅ 초기화할 ChromaDB가 없습니다.")
+
+    # 임베딩 모델 로딩
+    model = SentenceTransformer(model_name)
+
+    # MySQL 연결
+    conn = mysql.connector.connect(**DB_CONFIG)
+
+    # ChromaDB 연결 및 컬렉션 생성
+    client = PersistentClient(path=chroma_path)
+    collection = client.get_or_create_collection(name=collection_name)
+
+    try:
+        with open(log_file_path, "a", encoding="utf-8") as log:
+            sync_collection(
+                conn, collection, model, log,
+                resume=not (args.rebuild or args.restart),
+                workers=args.workers,
+                size=args.queue_size
+            )
+    finally:
+        # 연결 종료
+        conn.close()
 
-        offset += batch_size
-        
-# 연결 종료
-cursor.close()
-conn.close()
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+# 검색/챗봇에서 사용하는 한국어 SBERT 모델
+MODEL_NAME = "snunlp/KR-SBERT-V40K-klueNLI-augSTS"
+
+# 메모리 LRU 크기 / 디스크 캐시 경로 (환경변수 EMBEDDING_CACHE_PATH가 없으면 메모리만 사용)
+EMBEDDING_CACHE_SIZE = 4096
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH")
+
+
+@lru_cache(maxsize=None)
+def load_embedding_model(model_name=MODEL_NAME):
+    """
+    SentenceTransformer 모델을 프로세스당 한 번만 로드하는 함수.
+    """
+    return SentenceTransformer(model_name, device='cpu')
+
+
+def normalize_query(text):
+    """
+    캐시 키로 사용할 수 있도록 쿼리 문자열을 정규화하는 함수. (유니코드 NFC + 공백 정리)
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class QueryEmbeddingCache:
+    """
+    쿼리 임베딩 LRU 캐시. (키: 모델 이름 + 정규화된 쿼리)
+    path를 지정하면 SQLite 파일에도 저장해 프로세스 재시작 후에도 재사용한다.
+
+    Args:
+        maxsize: 메모리에 유지할 최대 임베딩 수
+        path: 디스크 캐시(SQLite) 파일 경로 (None이면 메모리만 사용)
+    """
+
+    def __init__(self, maxsize=EMBEDDING_CACHE_SIZE, path=None):
+        self.maxsize = maxsize
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._disk = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._disk = sqlite3.connect(path, check_same_thread=False)
+            self._disk.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_embedding (
+                    model TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (model, query)
+                )
+                """
+            )
+            self._disk.commit()
+
+    def encode(self, model, text, model_name=MODEL_NAME):
+        """
+        쿼리 임베딩을 반환하는 함수. 캐시에 있으면 모델 forward를 건너뛴다.
+
+        Args:
+            model: SentenceTransformer 모델
+            text: 쿼리 문자열
+            model_name: 캐시 키에 사용할 모델 이름
+
+        Returns:
+            np.ndarray (float32, 1차원, 읽기 전용)
+        """
+        query = normalize_query(text)
+        key = (model_name, query)
+
+        # 1. 메모리 LRU
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector
+
+        # 2. 디스크 캐시
+        vector = self._read_disk(key)
+        if vector is not None:
+            with self._lock:
+                self.disk_hits += 1
+                self._remember(key, vector)
+            return vector
+
+        # 3. 모델 forward
+        vector = np.asarray(model.encode([query])[0], dtype=np.float32)
+        vector.flags.writeable = False
+        with self._lock:
+            self.misses += 1
+            self._remember(key, vector)
+        self._write_disk(key, vector)
+        return vector
+
+    def stats(self):
+        """
+        캐시 적중/미스 통계를 반환하는 함수.
+        """
+        with self._lock:
+            requests = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._memory),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / requests if requests else 0.0,
+                "path": self.path,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        if self._disk is None:
+            return None
+        with self._lock:
+            row = self._disk.execute(
+                "SELECT vector FROM query_embedding WHERE model = ? AND query = ?", key
+            ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def _write_disk(self, key, vector):
+        if self._disk is None:
+            return
+        with self._lock:
+            self._disk.execute(
+                "INSERT OR REPLACE INTO query_embedding (model, query, vector) VALUES (?, ?, ?)",
+                (key[0], key[1], vector.tobytes())
+            )
+            self._disk.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """
+    프로세스 전체에서 공유하는 쿼리 임베딩 캐시를 반환하는 함수.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QueryEmbeddingCache(EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_PATH)
+    return _cache
+
+
+def encode_query(model, text, model_name=MODEL_NAME):
+    """
+    공유 캐시를 거쳐 쿼리 임베딩을 반환하는 함수. (model.encode([text])[0]와 같은 값)
+    """
+    return get_embedding_cache().encode(model, text, model_name)
+
+
+def embedding_cache_stats():
+    """
+    공유 쿼리 임베딩 캐시의 적중/미스 통계를 반환하는 함수.
+    """
+    return get_embedding_cache().stats()
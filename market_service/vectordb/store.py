@@ -0,0 +1,183 @@
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+from chromadb import PersistentClient
+
+# ChromaDB 저장 경로 (환경변수 CHROMA_PATH 또는 configure_vector_store()로 변경 가능)
+CHROMA_PATH = os.environ.get(
+    "CHROMA_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "chroma_db")
+)
+COLLECTION_NAME = "recipes_kr_sbert"
+
+# 벡터 검색 백엔드 (환경변수 VECTOR_BACKEND 또는 configure_vector_store()로 변경 가능)
+#   chroma: ChromaDB 컬렉션 (기본값)
+#   ann: ChromaDB 임베딩으로 만든 로컬 IVF 인덱스 (vectordb/ann.py, 읽기 전용)
+VECTOR_BACKENDS = ("chroma", "ann")
+VECTOR_BACKEND = os.environ.get("VECTOR_BACKEND", "chroma")
+
+# 지연 시간 통계에 사용할 최근 쿼리 수
+LATENCY_WINDOW = 1000
+
+
+class RecipeVectorStore:
+    """
+    레시피 임베딩 컬렉션(ChromaDB) 핸들.
+    PersistentClient와 컬렉션은 처음 사용할 때 한 번만 열고, 이후 쿼리는 같은 핸들을 재사용한다.
+
+    Args:
+        path: ChromaDB 저장 경로
+        collection_name: 컬렉션 이름
+    """
+
+    backend = "chroma"
+
+    def __init__(self, path=CHROMA_PATH, collection_name=COLLECTION_NAME):
+        self.path = path
+        self.collection_name = collection_name
+
+        self._lock = threading.Lock()
+        self._client = None
+        self._collection = None
+        self.open_seconds = None
+        self.warm = False
+        self.warm_error = None
+
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._queries = 0
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            with self._lock:
+                if self._collection is None:
+                    started = time.perf_counter()
+                    self._client = PersistentClient(path=self.path)
+                    self._collection = self._client.get_collection(name=self.collection_name)
+                    self.open_seconds = time.perf_counter() - started
+        return self._collection
+
+    def warm_up(self):
+        """
+        컬렉션을 열고 저장된 임베딩 하나로 쿼리를 실행해 HNSW 세그먼트를 미리 메모리에 올리는 함수.
+        """
+        collection = self.collection
+        sample = collection.peek(limit=1)
+        embeddings = sample.get("embeddings")
+        if embeddings is not None and len(embeddings):
+            collection.query(query_embeddings=[[float(x) for x in embeddings[0]]], n_results=1)
+        self.warm = True
+
+    def query(self, query_embeddings, n_results=10, **kwargs):
+        """
+        임베딩으로 유사 레시피를 검색하는 함수. (collection.query()와 같은 인자/반환값)
+        """
+        started = time.perf_counter()
+        result = self._query(query_embeddings, n_results, **kwargs)
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._latencies.append(elapsed)
+            self._queries += 1
+        return result
+
+    def _query(self, query_embeddings, n_results, **kwargs):
+        return self.collection.query(query_embeddings=query_embeddings, n_results=n_results, **kwargs)
+
+    def stats(self):
+        """
+        쿼리 지연 시간 통계를 반환하는 함수. (단위: ms, 최근 LATENCY_WINDOW개 기준)
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            queries = self._queries
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        return {
+            "backend": self.backend,
+            "path": self.path,
+            "collection": self.collection_name,
+            "warm": self.warm,
+            "warm_error": self.warm_error,
+            "open_ms": self.open_seconds * 1000 if self.open_seconds is not None else None,
+            "queries": queries,
+            "avg_ms": sum(latencies) / len(latencies) * 1000 if latencies else None,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": latencies[-1] * 1000 if latencies else None,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _create_store(backend, path=None, collection_name=COLLECTION_NAME):
+    if backend not in VECTOR_BACKENDS:
+        raise ValueError(f"지원하지 않는 벡터 검색 백엔드입니다: {backend} (가능: {', '.join(VECTOR_BACKENDS)})")
+    if backend == "ann":
+        from .ann import AnnVectorStore   # 순환 import 방지
+        return AnnVectorStore(path, collection_name)
+    return RecipeVectorStore(path or CHROMA_PATH, collection_name)
+
+
+def configure_vector_store(path=None, collection_name=COLLECTION_NAME, backend=None):
+    """
+    백엔드/경로/컬렉션을 바꿔 공유 핸들을 새로 만드는 함수.
+
+    Args:
+        path: 저장 경로 (chroma: ChromaDB 경로, ann: 인덱스 경로, None이면 기본 경로)
+        collection_name: 컬렉션 이름
+        backend: "chroma" 또는 "ann" (None이면 VECTOR_BACKEND)
+
+    Returns:
+        새로 생성된 RecipeVectorStore (ann이면 AnnVectorStore)
+    """
+    global _store
+    store = _create_store(backend or VECTOR_BACKEND, path, collection_name)
+    with _store_lock:
+        _store = store
+    return _store
+
+
+def get_vector_store():
+    """
+    프로세스 전체에서 공유하는 레시피 벡터 저장소 핸들을 반환하는 함수.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _create_store(VECTOR_BACKEND)
+    return _store
+
+
+def warm_up_vector_store():
+    """
+    공유 핸들을 열고 워밍업한 뒤 반환하는 함수. (앱 시작 시 호출)
+    워밍업은 최선 노력으로만 수행한다. ChromaDB 경로가 없거나 읽을 수 없어도 예외를 올리지 않고
+    오류를 기록(stats()의 warm_error)한 뒤 핸들을 그대로 반환하며, 컬렉션은 처음 검색할 때 다시 연다.
+    (벡터DB 문제로 로그인 / 상품 페이지까지 실패하지 않도록)
+    """
+    store = get_vector_store()
+    try:
+        store.warm_up()
+        store.warm_error = None
+    except Exception as e:
+        store.warm_error = repr(e)
+        print(f"⚠️ 벡터DB 워밍업 실패 (첫 검색 때 다시 연결): {store.warm_error}", file=sys.stderr)
+    return store
+
+
+def vector_store_stats():
+    """
+    공유 핸들의 쿼리 지연 시간 통계를 반환하는 함수.
+    """
+    return get_vector_store().stats()
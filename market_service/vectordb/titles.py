@@ -0,0 +1,98 @@
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from data import cached_derived
+from .embedding import MODEL_NAME
+
+# 레시피 제목 임베딩 행렬 저장 경로 (환경변수 TITLE_EMBEDDING_DIR로 변경 가능)
+TITLE_EMBEDDING_DIR = os.environ.get(
+    "TITLE_EMBEDDING_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "title_embeddings")
+)
+
+# 제목 임베딩 시 배치 크기
+ENCODE_BATCH_SIZE = 256
+
+_build_lock = threading.Lock()
+
+
+def _fingerprint(titles, model_name):
+    # 모델 이름 + 제목 목록(순서 포함)이 같으면 같은 행렬을 재사용
+    digest = hashlib.sha1(model_name.encode("utf-8"))
+    for title in titles:
+        digest.update(b"\x00")
+        digest.update(title.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def _load_or_build(titles, model, model_name):
+    path = os.path.join(TITLE_EMBEDDING_DIR, f"{_fingerprint(titles, model_name)}.npy")
+
+    with _build_lock:
+        # 1. 레시피 목록이 같으면 저장된 행렬을 메모리 맵으로 연결 (재임베딩 없음)
+        if not os.path.exists(path):
+
+            # 2. 레시피 테이블이 바뀐 경우 전체 제목을 한 번만 임베딩해 저장
+            embeddings = model.encode(titles, batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True)
+            matrix = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+
+            os.makedirs(TITLE_EMBEDDING_DIR, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, matrix)
+            os.replace(tmp_path, path)
+
+    return np.load(path, mmap_mode="r")
+
+
+def get_title_embeddings(df, model, model_name=MODEL_NAME):
+    """
+    레시피 제목(df['name'])의 정규화된 임베딩 행렬을 반환하는 함수.
+    행렬은 제목 목록의 해시로 디스크에 저장되어 메모리 맵(float32)으로 열리며,
+    레시피 테이블이 바뀌어 제목 목록이 달라진 경우에만 다시 임베딩한다.
+
+    Args:
+        df: 레시피 데이터프레임 (name 컬럼 필수)
+        model: SentenceTransformer 모델 (행렬을 새로 만들 때만 사용)
+        model_name: 저장 파일 구분용 모델 이름
+
+    Returns:
+        np.ndarray (레시피 수 × 임베딩 차원, 각 행은 단위 벡터)
+    """
+    def build(frame):
+        titles = frame['name'].fillna("").astype(str).tolist()
+        return _load_or_build(titles, model, model_name)
+
+    return cached_derived(df, f"title_embeddings:{model_name}", build)
+
+
+def top_k_titles(title_matrix, query_vector, top_n):
+    """
+    쿼리 벡터와 제목 임베딩의 코사인 유사도 상위 N개를 구하는 함수.
+    행렬-벡터 곱 한 번과 argpartition으로 전체 정렬 없이 상위 N개만 고른다.
+
+    Returns:
+        (상위 N개 행 위치, 유사도) 튜플 (유사도 내림차순)
+    """
+    query = np.asarray(query_vector, dtype=np.float32)
+    norm = np.linalg.norm(query)
+    if norm > 0:
+        query = query / norm
+
+    scores = title_matrix @ query
+    top_n = min(top_n, len(scores))
+    if top_n <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    top = np.argpartition(-scores, top_n - 1)[:top_n]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return top, scores[top]